@@ -0,0 +1,58 @@
+"""Create activity table partitioned by month
+
+Revision ID: 20261019_activity
+Revises: 20261019_list_version
+Create Date: 2026-10-19
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_activity'
+down_revision: Union[str, Sequence[str], None] = '20261019_list_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create activity with a default partition and the next few months."""
+    op.execute("""
+        CREATE TABLE activity (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            list_id INTEGER NOT NULL,
+            item_id INTEGER,
+            actor_id VARCHAR NOT NULL,
+            action VARCHAR(32) NOT NULL,
+            detail VARCHAR NOT NULL DEFAULT '{}',
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        CREATE INDEX ix_activity_list_id_created_at_id
+        ON activity (list_id, created_at, id)
+    """)
+    op.execute("""
+        CREATE INDEX ix_activity_actor_id_created_at_id
+        ON activity (actor_id, created_at, id)
+    """)
+    # Catches rows outside the monthly partitions; those are created ahead
+    # of time by `python -m app.services.activity`
+    op.execute("CREATE TABLE activity_default PARTITION OF activity DEFAULT")
+    today = date.today()
+    for offset in range(3):
+        year, month = today.year + (today.month - 1 + offset) // 12, (today.month - 1 + offset) % 12 + 1
+        end_year, end_month = year + month // 12, month % 12 + 1
+        op.execute(
+            f"CREATE TABLE activity_y{year:04d}m{month:02d} PARTITION OF activity "
+            f"FOR VALUES FROM ('{year:04d}-{month:02d}-01') TO ('{end_year:04d}-{end_month:02d}-01')"
+        )
+
+
+def downgrade() -> None:
+    """Drop activity and all of its partitions."""
+    op.execute("DROP TABLE IF EXISTS activity")
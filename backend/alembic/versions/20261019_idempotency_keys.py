@@ -0,0 +1,40 @@
+"""Create idempotency_keys for replaying retried creates
+
+Revision ID: 20261019_idempotency_keys
+Revises: 20261019_rate_limit_buckets
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_idempotency_keys'
+down_revision: Union[str, Sequence[str], None] = '20261019_rate_limit_buckets'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create idempotency_keys with an index for purging expired keys."""
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.LargeBinary(length=16), nullable=False),
+        sa.Column('fingerprint', sa.LargeBinary(length=16), nullable=False),
+        sa.Column('status_code', sa.SmallInteger(), nullable=True),
+        sa.Column('response', sa.String(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop idempotency_keys."""
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,45 @@
+"""Create import_jobs for bulk item imports
+
+Revision ID: 20261019_import_jobs
+Revises: 20261019_item_version
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_import_jobs'
+down_revision: Union[str, Sequence[str], None] = '20261019_item_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create import_jobs, indexed by user."""
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('list_id', sa.Integer(), nullable=False),
+        sa.Column('format', sa.String(length=8), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('rows_read', sa.Integer(), nullable=False),
+        sa.Column('rows_failed', sa.Integer(), nullable=False),
+        sa.Column('rows_imported', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.String(), nullable=False),
+        sa.Column('detail', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_import_jobs_user_id'), 'import_jobs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop import_jobs."""
+    op.drop_index(op.f('ix_import_jobs_user_id'), table_name='import_jobs')
+    op.drop_table('import_jobs')
@@ -0,0 +1,46 @@
+"""Add item tombstones and list/updated_at index for delta sync
+
+Revision ID: 20261019_item_changes_sync
+Revises: 20260220_remove_is_completed
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_item_changes_sync'
+down_revision: Union[str, Sequence[str], None] = '20260220_remove_is_completed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create item_tombstones and index todo_items by list and updated_at."""
+    op.create_index(
+        'ix_todo_items_list_id_updated_at',
+        'todo_items',
+        ['list_id', 'updated_at'],
+    )
+    op.create_table(
+        'item_tombstones',
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('list_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('item_id'),
+    )
+    op.create_index(
+        'ix_item_tombstones_list_id_deleted_at',
+        'item_tombstones',
+        ['list_id', 'deleted_at'],
+    )
+
+
+def downgrade() -> None:
+    """Drop item_tombstones and the delta sync index."""
+    op.drop_index('ix_item_tombstones_list_id_deleted_at', table_name='item_tombstones')
+    op.drop_table('item_tombstones')
+    op.drop_index('ix_todo_items_list_id_updated_at', table_name='todo_items')
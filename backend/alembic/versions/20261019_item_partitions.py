@@ -0,0 +1,98 @@
+"""Index live items by list and optionally hash-partition todo_items by list_id
+
+Revision ID: 20261019_item_partitions
+Revises: 20261019_items_archive
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_item_partitions'
+down_revision: Union[str, Sequence[str], None] = '20261019_items_archive'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE_INDEX = """
+    CREATE INDEX ix_todo_items_live_list_id_created_at
+    ON todo_items (list_id, created_at) WHERE deleted_at IS NULL
+"""
+
+
+def _rebuild(partitions: int) -> None:
+    """
+    Copy todo_items into a new table, hash-partitioned by list_id into
+    ``partitions`` tables or unpartitioned if 0, and swap it in.
+
+    The indexes and foreign keys of the old table are created again on the
+    new one, under their names, after the copy. The id sequence carries
+    over, so ids continue where they were.
+    """
+    bind = op.get_bind()
+    indexes = bind.execute(text("""
+        SELECT pg_get_indexdef(indexrelid) FROM pg_index
+        WHERE indrelid = 'todo_items'::regclass AND NOT indisprimary
+    """)).scalars().all()
+    foreign_keys = bind.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = 'todo_items'::regclass AND contype = 'f'
+    """)).all()
+    sequence = bind.execute(text("SELECT pg_get_serial_sequence('todo_items', 'id')")).scalar_one()
+
+    partition_by = ' PARTITION BY HASH (list_id)' if partitions else ''
+    op.execute(f'CREATE TABLE todo_items_new (LIKE todo_items INCLUDING DEFAULTS){partition_by}')
+    for remainder in range(partitions):
+        op.execute(
+            f'CREATE TABLE todo_items_p{remainder:02d} PARTITION OF todo_items_new '
+            f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        )
+    op.execute('INSERT INTO todo_items_new SELECT * FROM todo_items')
+
+    # Keep the sequence when its table is dropped
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+    op.execute('DROP TABLE todo_items')
+    op.execute('ALTER TABLE todo_items_new RENAME TO todo_items')
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY todo_items.id')
+
+    # Unique constraints of a partitioned table include the partition key
+    primary_key = 'id, list_id' if partitions else 'id'
+    op.execute(f'ALTER TABLE todo_items ADD CONSTRAINT todo_items_pkey PRIMARY KEY ({primary_key})')
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE todo_items ADD CONSTRAINT {name} {definition}')
+    for definition in indexes:
+        # Indexes of a partitioned table are listed as ON ONLY the parent
+        op.execute(definition.replace(' ON ONLY ', ' ON '))
+
+
+def _partitioned() -> bool:
+    return op.get_bind().execute(text("""
+        SELECT EXISTS (
+            SELECT FROM pg_partitioned_table WHERE partrelid = to_regclass('todo_items')
+        )
+    """)).scalar_one()
+
+
+def upgrade() -> None:
+    """
+    Index each list's live items by creation time, for list reads.
+
+    With ITEM_PARTITIONS set, todo_items is also rebuilt as that many hash
+    partitions by list_id, with its indexes carried over. This copies every
+    item and holds an exclusive lock on the table while it runs.
+    """
+    op.execute(LIVE_INDEX)
+    if settings.item_partitions > 0:
+        _rebuild(settings.item_partitions)
+
+
+def downgrade() -> None:
+    """Rebuild todo_items unpartitioned if it was partitioned, and drop the index."""
+    if _partitioned():
+        _rebuild(0)
+    op.execute('DROP INDEX ix_todo_items_live_list_id_created_at')
@@ -0,0 +1,63 @@
+"""Create todo_items_archive for old completed items
+
+Revision ID: 20261019_items_archive
+Revises: 20261019_import_jobs
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_items_archive'
+down_revision: Union[str, Sequence[str], None] = '20261019_import_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRIORITY = postgresql.ENUM('LOW', 'MEDIUM', 'HIGH', name='priority', create_type=False)
+
+
+def upgrade() -> None:
+    """Create todo_items_archive with the columns of todo_items plus archived_at."""
+    # Shared with todo_items.priority
+    PRIORITY.create(op.get_bind(), checkfirst=True)
+    op.create_table(
+        'todo_items_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('list_id', sa.Integer(), nullable=False),
+        sa.Column('text', sa.String(length=500), nullable=False),
+        sa.Column('description', sa.String(length=2000), nullable=True),
+        sa.Column('tags', sa.String(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=True),
+        sa.Column('priority', PRIORITY, nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['list_id'], ['todo_lists.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_todo_items_archive_list_id_created_at',
+        'todo_items_archive',
+        ['list_id', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Move archived items back into todo_items and drop the archive."""
+    columns = (
+        'id, list_id, text, description, tags, status, due_date, priority, '
+        'created_at, updated_at, deleted_at, created_by, version'
+    )
+    op.execute(f'INSERT INTO todo_items ({columns}) SELECT {columns} FROM todo_items_archive')
+    op.drop_index('ix_todo_items_archive_list_id_created_at', table_name='todo_items_archive')
+    op.drop_table('todo_items_archive')
@@ -0,0 +1,42 @@
+"""Create list_members for list sharing
+
+Revision ID: 20261019_list_members
+Revises: 20261019_outbox
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_list_members'
+down_revision: Union[str, Sequence[str], None] = '20261019_outbox'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create list_members and make every list's owner its first member."""
+    op.create_table(
+        'list_members',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('list_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=16), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        # (user_id, list_id) serves access checks and a user's list overview
+        sa.PrimaryKeyConstraint('user_id', 'list_id'),
+    )
+    op.create_index('ix_list_members_list_id', 'list_members', ['list_id'])
+    op.execute(
+        "INSERT INTO list_members (user_id, list_id, role, created_at) "
+        "SELECT owner_id, id, 'owner', created_at FROM todo_lists"
+    )
+
+
+def downgrade() -> None:
+    """Drop list_members."""
+    op.drop_index('ix_list_members_list_id', table_name='list_members')
+    op.drop_table('list_members')
@@ -0,0 +1,31 @@
+"""Add version counter to todo_lists
+
+Revision ID: 20261019_list_version
+Revises: 20261019_item_changes_sync
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_list_version'
+down_revision: Union[str, Sequence[str], None] = '20261019_item_changes_sync'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add todo_lists.version, starting every existing list at 0."""
+    op.add_column(
+        'todo_lists',
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Drop todo_lists.version."""
+    op.drop_column('todo_lists', 'version')
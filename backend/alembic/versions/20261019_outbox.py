@@ -0,0 +1,38 @@
+"""Create outbox table for domain events
+
+Revision ID: 20261019_outbox
+Revises: 20261019_activity
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_outbox'
+down_revision: Union[str, Sequence[str], None] = '20261019_activity'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create outbox; the relay reads it in id order."""
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('list_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=32), nullable=False),
+        sa.Column('actor_id', sa.String(), nullable=True),
+        sa.Column('payload', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Drop outbox."""
+    op.drop_table('outbox')
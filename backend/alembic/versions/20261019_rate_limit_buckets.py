@@ -0,0 +1,36 @@
+"""Create rate_limit_buckets for shared per-user rate limits
+
+Revision ID: 20261019_rate_limit_buckets
+Revises: 20261019_list_members
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_rate_limit_buckets'
+down_revision: Union[str, Sequence[str], None] = '20261019_list_members'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create rate_limit_buckets, unlogged since its rows are disposable."""
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('granted', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.execute('ALTER TABLE rate_limit_buckets SET UNLOGGED')
+
+
+def downgrade() -> None:
+    """Drop rate_limit_buckets."""
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,92 @@
+"""Conditional requests: GETs keyed on list versions, item mutations on item versions."""
+
+import re
+
+from fastapi import Request, Response, status
+
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+
+# Compressed responses carry the encoding after the version (see app.middleware.compression)
+_ITEM_ETAG = re.compile(r'"item-(\d+)-(\d+)(?:-[a-z]+)?"')
+
+
+def list_etag(todo_list: TodoList, resource: str = "list") -> str:
+    """
+    Weak ETag for a representation derived from one list.
+
+    Every list and item mutation bumps the list version, so the version
+    identifies both the list itself and its items.
+
+    Args:
+        todo_list: The list the representation is built from
+        resource: Distinguishes representations of the same list
+
+    Returns:
+        ETag header value
+    """
+    return f'W/"{resource}-{todo_list.id}-{todo_list.version}"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """
+    Set the ETag header and answer a matching If-None-Match.
+
+    Args:
+        request: Incoming request
+        response: Response the endpoint's result will be rendered into
+        etag: Current ETag of the resource
+
+    Returns:
+        A 304 response if the client's copy is current, otherwise None
+    """
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def item_etag(item: TodoItem) -> str:
+    """
+    Strong ETag of an item, changing with every change to the item.
+
+    Args:
+        item: The item
+
+    Returns:
+        ETag header value
+    """
+    return f'"item-{item.id}-{item.version}"'
+
+
+def if_match_versions(request: Request, item_id: int) -> set[int] | None:
+    """
+    Item versions an If-Match header allows a mutation to apply to.
+
+    Only this item's strong ETags count, whatever encoding they were sent
+    with; weak ones never match an If-Match.
+
+    Args:
+        request: Incoming request
+        item_id: ID of the item being changed
+
+    Returns:
+        The versions (possibly none, so any change fails), or None without
+        If-Match or for "*"
+    """
+    if_match = request.headers.get("if-match")
+    if if_match is None:
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        match = _ITEM_ETAG.fullmatch(tag)
+        if match and int(match.group(1)) == item_id:
+            versions.add(int(match.group(2)))
+    return versions
@@ -0,0 +1,112 @@
+"""Idempotency-Key support for create endpoints."""
+
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import deadline
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services import idempotency
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+requests_total = registry.counter(
+    "idempotent_requests_total",
+    "Requests sent with an Idempotency-Key, by outcome "
+    "(executed, replayed, mismatch or in_progress).",
+    ["outcome"],
+)
+
+
+async def idempotent(
+    db: AsyncSession,
+    request: Request,
+    user_id: str,
+    key: Optional[str],
+    payload: BaseModel,
+    create: Callable[[], Awaitable[Any]],
+    response_model: type[BaseModel],
+    status_code: int = status.HTTP_201_CREATED,
+) -> Any:
+    """
+    Run a create at most once per Idempotency-Key.
+
+    The first request with a key runs ``create`` and its response is stored;
+    a retry gets the stored response back, with Idempotent-Replayed: true,
+    without running ``create`` again. A retry arriving while the first
+    request is still running waits for it.
+
+    Args:
+        db: Database session
+        request: Incoming request
+        user_id: ID of the user; keys are scoped to the user
+        key: The Idempotency-Key header, None to just run ``create``
+        payload: The validated request body
+        create: Runs the request, returning what the endpoint returns
+        response_model: Schema the result is serialized with
+        status_code: Status of a successful response
+
+    Returns:
+        The result of ``create`` without a key, otherwise the response to send
+
+    Raises:
+        HTTPException: 400 for a malformed key, 422 if the key was used for a
+            different request, 409 if its first request is still running
+    """
+    if key is None:
+        return await create()
+    if not 1 <= len(key) <= 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key must be 1 to 255 characters",
+        )
+
+    key_id = idempotency.key_digest(user_id, key)
+    fingerprint = idempotency.fingerprint(
+        request.method, request.url.path, payload.model_dump_json()
+    )
+    existing = await idempotency.claim(db, key_id, fingerprint)
+    if existing is not None and existing.fingerprint == fingerprint and existing.status_code is None:
+        timeout = settings.idempotency_wait_seconds
+        left = deadline.remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        existing = await idempotency.wait(db, key_id, timeout)
+        if existing is None:
+            # The first request failed; this one runs instead
+            existing = await idempotency.claim(db, key_id, fingerprint)
+
+    if existing is not None:
+        if existing.fingerprint != fingerprint:
+            requests_total.inc("mismatch")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if existing.status_code is None:
+            requests_total.inc("in_progress")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        requests_total.inc("replayed")
+        return Response(
+            existing.response,
+            status_code=existing.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    try:
+        result = await create()
+    except BaseException:
+        await idempotency.release(db, key_id)
+        raise
+    body = response_model.model_validate(result).model_dump_json()
+    await idempotency.complete(db, key_id, fingerprint, status_code, body)
+    requests_total.inc("executed")
+    return Response(body, status_code=status_code, media_type="application/json")
@@ -0,0 +1,76 @@
+"""Custom route classes shared by the API routers."""
+
+import functools
+import inspect
+import time
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core import deadline
+from app.core.timing import current_timings, mark_endpoint_done
+
+# Deadlines (seconds; 0 for none) of routes whose budget differs from
+# settings.request_timeout_seconds, by "METHOD /path/template"
+ROUTE_DEADLINES: dict[str, float] = {
+    # Whole-list reads may legitimately take longer than a mutation
+    "GET /api/v1/lists/{list_id}/items": 30.0,
+    "GET /api/v1/lists/{list_id}/items/changes": 30.0,
+    # Only the access check runs under the deadline; the stream itself is open-ended
+    "GET /api/v1/lists/{list_id}/events": 5.0,
+    # Likewise only the format check; the export streams as fast as the client reads
+    "GET /api/v1/export": 5.0,
+    # Imports read the whole upload inside the handler
+    "POST /api/v1/import": 600.0,
+}
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that marks when the endpoint function returns and runs the
+    request under its deadline (see ``app.core.deadline``).
+
+    Everything between that mark and the response start is attributed to
+    response validation and serialization by the timing middleware.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        # Set first: APIRoute builds the route handler in __init__
+        budgets = [ROUTE_DEADLINES.get(f"{method} {path}") for method in kwargs.get("methods") or ()]
+        self.deadline: Optional[float] = next((b for b in budgets if b is not None), None)
+        super().__init__(path, _mark_on_return(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        route_budget = self.deadline
+
+        async def with_deadline(request: Request) -> Response:
+            timings = current_timings.get()
+            started_at = timings.start if timings is not None else time.perf_counter()
+            seconds = deadline.budget(request.headers.get(deadline.TIMEOUT_HEADER), route_budget)
+            token = deadline.start(started_at, seconds)
+            try:
+                deadline.check("start")
+                return await handler(request)
+            finally:
+                deadline.reset(token)
+
+        return with_deadline
+
+
+def _mark_on_return(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if not inspect.iscoroutinefunction(endpoint):
+        # Sync endpoints run in a threadpool; leave them untouched
+        return endpoint
+
+    # functools.wraps sets __wrapped__, so FastAPI still resolves the
+    # endpoint's real signature and dependencies.
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            mark_endpoint_done()
+
+    return wrapper
@@ -0,0 +1,76 @@
+"""Activity feed endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import CurrentUser, require_list_access
+from app.api.routing import TimedRoute
+from app.db.database import get_db
+from app.schemas.activity import ActivityPage, ActivityResponse
+from app.services.activity import (
+    InvalidActivityCursor,
+    decode_cursor,
+    encode_cursor,
+    get_list_activity,
+    get_user_activity,
+)
+
+router = APIRouter(tags=["activity"], route_class=TimedRoute)
+
+
+def _parse_cursor(before: Optional[str]):
+    try:
+        return decode_cursor(before) if before else None
+    except InvalidActivityCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _page(entries, next_cursor) -> ActivityPage:
+    return ActivityPage(
+        items=[ActivityResponse.model_validate(entry) for entry in entries],
+        next_cursor=encode_cursor(next_cursor) if next_cursor else None,
+    )
+
+
+@router.get("/lists/{list_id}/activity", response_model=ActivityPage)
+async def get_list_activity_feed(
+    list_id: int,
+    current_user: CurrentUser,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the activity of a list, newest first.
+
+    Pass ``next_cursor`` from a page as ``before`` to get the next one.
+    Activity is written in the background, so the latest changes can take
+    a moment to appear.
+    Returns 400 if the cursor is malformed.
+    Returns 404 if list not found.
+    Returns 403 if user doesn't have access to the list.
+    """
+    cursor = _parse_cursor(before)
+
+    await require_list_access(db, list_id, current_user["id"])
+
+    return _page(*await get_list_activity(db, list_id, limit, cursor))
+
+
+@router.get("/activity", response_model=ActivityPage)
+async def get_my_activity_feed(
+    current_user: CurrentUser,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the current user's own activity across lists, newest first.
+
+    Pass ``next_cursor`` from a page as ``before`` to get the next one.
+    Returns 400 if the cursor is malformed.
+    """
+    cursor = _parse_cursor(before)
+    return _page(*await get_user_activity(db, current_user["id"], limit, cursor))
@@ -0,0 +1,48 @@
+"""List change feed over Server-Sent Events."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import CurrentUser, require_list_access
+from app.api.routing import TimedRoute
+from app.db.database import get_db
+from app.services.events import hub
+
+router = APIRouter(
+    prefix="/lists/{list_id}/events", tags=["events"], route_class=TimedRoute
+)
+
+
+@router.get("")
+async def stream_list_events(
+    list_id: int,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Stream item changes in a list as Server-Sent Events.
+
+    Sends item.created, item.updated, item.toggled, item.deleted and
+    item.restored events carrying the item, list.updated and
+    list.deleted (which ends the stream) for the list, and member.added,
+    member.updated and member.removed when sharing changes; the removed
+    member's own stream ends after it. Reconnecting clients send
+    Last-Event-ID to receive what they missed; if that is no longer
+    available a ``reset`` event tells them to refetch the list.
+    Returns 404 if list not found.
+    Returns 403 if user doesn't have access to the list.
+    """
+    await require_list_access(db, list_id, current_user["id"])
+
+    # Return the pooled connection now rather than holding it for the stream
+    await db.close()
+
+    return StreamingResponse(
+        hub.stream(list_id, last_event_id, current_user["id"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
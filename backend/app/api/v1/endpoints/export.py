@@ -0,0 +1,47 @@
+"""Export of the caller's lists and items."""
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.deps import CurrentUser
+from app.api.routing import TimedRoute
+from app.core.config import settings
+from app.db.database import get_session_maker
+from app.services import export_service
+
+router = APIRouter(prefix="/export", tags=["export"], route_class=TimedRoute)
+
+
+@router.get("")
+async def export_items(
+    current_user: CurrentUser,
+    format: Literal["ndjson", "csv"] = Query(export_service.NDJSON),
+    session_maker: async_sessionmaker = Depends(get_session_maker),
+):
+    """
+    Stream every list the user is a member of, with its items.
+
+    ``ndjson`` sends a ``{"type": "list", ...}`` line for each list followed
+    by a ``{"type": "item", ...}`` line for each of its items; ``csv`` sends
+    one row per item with its list's id and name (lists without items get a
+    row with empty item columns). Deleted items are left out. The export is
+    read and sent in batches as the client reads it, so it can be any size.
+    """
+    user_id = current_user["id"]
+
+    async def chunks():
+        # The session lives as long as the stream, not the request handler
+        async with session_maker() as db:
+            async for chunk in export_service.export_chunks(
+                db, user_id, format, settings.export_batch_size
+            ):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="export.{format}"'},
+    )
@@ -0,0 +1,81 @@
+"""Bulk import of items into a list."""
+
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.deps import CurrentUser, get_db, require_list_access
+from app.api.routing import TimedRoute
+from app.core.config import settings
+from app.db.database import get_session_maker
+from app.schemas.import_job import ImportJobResponse
+from app.services import import_service, policy
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/import", tags=["import"], route_class=TimedRoute)
+
+
+@router.post("", response_model=ImportJobResponse, status_code=status.HTTP_201_CREATED)
+async def import_items(
+    list_id: int,
+    current_user: CurrentUser,
+    request: Request,
+    response: Response,
+    format: Literal["ndjson", "csv"] = import_service.NDJSON,
+    db: AsyncSession = Depends(get_db),
+    session_maker: async_sessionmaker = Depends(get_session_maker),
+):
+    """
+    Import items into a list from an NDJSON or CSV request body.
+
+    The body is read and validated as it streams in. Valid rows are added
+    to the list together when the body ends; rejected rows are listed in
+    the job's ``errors`` with their line and what was wrong. The job can
+    be polled at ``GET /api/v1/import/{job_id}`` while the import runs.
+
+    Requires authentication. User must be allowed to add items to the list.
+    Returns 400 if the body is not UTF-8, or a CSV record is longer than
+    ``import_max_line_length``.
+    Returns 404 if list not found.
+    Returns 403 if user doesn't have access to the list.
+    """
+    user_id = current_user["id"]
+    await require_list_access(db, list_id, user_id, policy.ITEM_CREATE)
+
+    job = await import_service.create_job(session_maker, user_id, list_id, format)
+    response.headers["Location"] = f"/api/v1/import/{job.id}"
+    try:
+        await import_service.run_import(
+            db,
+            session_maker,
+            job,
+            import_service.parse_rows(request.stream(), format, settings.import_max_line_length),
+            settings.import_batch_size,
+            settings.import_max_errors,
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import must be UTF-8 encoded")
+    except import_service.RecordTooLong as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Import {job.id} into list {list_id} by user {user_id} finished")
+    return await import_service.get_job(db, job.id, user_id)
+
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+async def get_import(
+    job_id: str,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the progress or outcome of an import.
+
+    Returns 404 if there is no such import by the user.
+    """
+    job = await import_service.get_job(db, job_id, current_user["id"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
@@ -1,15 +1,26 @@
 """TodoItem API endpoints."""
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.item_service import UNSET, get_item
 from sqlalchemy import select
 
-from app.api.deps import CurrentUser, get_db
-from app.schemas.todo_item import TodoItemCreate, TodoItemResponse
+from app.api.deps import CurrentUser, get_db, require_list_access
+from app.api.etag import if_match_versions, item_etag, list_etag, not_modified
+from app.api.idempotency import idempotent
+from app.api.routing import TimedRoute
+from app.core.deadline import DeadlineExceeded
+from app.db.loader import get_loader
+from app.schemas.todo_item import (
+    ItemChangesResponse,
+    ItemTombstoneResponse,
+    TodoItemCreate,
+    TodoItemResponse,
+)
 from app.services.item_service import (
+    VersionConflict,
     create_item,
     get_items_by_list,
     update_item,
@@ -20,16 +31,24 @@ from app.services.item_service import (
     set_item_due_date,
     set_item_priority,
 )
+from app.services.sync_service import (
+    InvalidSyncToken,
+    decode_sync_token,
+    get_item_changes,
+)
 from app.models.todo_list import TodoList
 from app.models.todo_item import Priority
+from app.services import membership, policy
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import date
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/lists/{list_id}/items", tags=["items"])
-items_router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(
+    prefix="/lists/{list_id}/items", tags=["items"], route_class=TimedRoute
+)
+items_router = APIRouter(prefix="/items", tags=["items"], route_class=TimedRoute)
 
 
 class UpdateItemTextRequest(BaseModel):
@@ -49,12 +68,19 @@ class UpdateItemTextRequest(BaseModel):
 async def get_items(
     list_id: int,
     current_user: CurrentUser,
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get all TODO items for a specific list.
 
+    Old completed items are moved to an archive and left out unless
+    ``include_archived`` is true.
+
     Requires authentication. User must have access to the list.
+    Returns 304 if If-None-Match matches the current ETag of the items.
     Returns 404 if list not found.
     Returns 403 if user doesn't have access to the list.
     """
@@ -62,39 +88,87 @@ async def get_items(
     logger.info(f"Getting items from list {list_id} for user {current_user['id']}")
 
     try:
-        result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-        list_obj = result.scalars().first()
-
-        if list_obj is None:
-            raise HTTPException(status_code=404, detail="List not found")
+        await require_list_access(db, list_id, current_user["id"])
+        # The list's version identifies the current state of its items
+        list_obj = await get_loader(db, TodoList).load(list_id)
 
-        # Check if user has access (owner only for now - Epic 4 will add sharing)
-        if list_obj.owner_id != current_user["id"]:
-            raise HTTPException(
-                status_code=403, detail="You don't have access to this list"
-            )
+        resource = "items-archived" if include_archived else "items"
+        cached = not_modified(request, response, list_etag(list_obj, resource))
+        if cached is not None:
+            return cached
 
         # Get items for the list
-        items = await get_items_by_list(db, list_id)
+        items = await get_items_by_list(db, list_id, include_archived)
         return items
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         logger.error(f"Error getting items: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.get("/changes", response_model=ItemChangesResponse)
+async def get_item_changes_since(
+    list_id: int,
+    current_user: CurrentUser,
+    since: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the items of a list that changed since a sync token.
+
+    Without ``since`` all live items are returned. Pass the returned
+    ``token`` as ``since`` on the next call to receive only items created or
+    changed in between, plus the ids of items deleted or archived in
+    between. Changes near the token boundary may be repeated; apply them
+    by item id.
+
+    Requires authentication. User must have access to the list.
+    Returns 400 if the token is malformed.
+    Returns 404 if list not found.
+    Returns 403 if user doesn't have access to the list.
+    """
+    try:
+        cursor = decode_sync_token(since) if since else None
+    except InvalidSyncToken:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    try:
+        await require_list_access(db, list_id, current_user["id"])
+        # The list's version identifies the current state of its items
+        list_obj = await get_loader(db, TodoList).load(list_id)
+
+        changes = await get_item_changes(db, list_id, cursor, list_obj.version)
+        return ItemChangesResponse(
+            items=[TodoItemResponse.model_validate(item) for item in changes.items],
+            deleted=[
+                ItemTombstoneResponse(id=item_id, deleted_at=deleted_at)
+                for item_id, deleted_at in changes.deleted
+            ],
+            token=changes.token,
+        )
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Error getting item changes: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.post("", response_model=TodoItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_todo_item(
     list_id: int,
     item_data: TodoItemCreate,
     current_user: CurrentUser,
+    request: Request,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """
     Create a new TODO item in a list.
 
     Requires authentication. User must have access to the list.
+    A retry with the same Idempotency-Key gets the first response back
+    instead of creating another item.
     Returns 404 if list not found.
     Returns 403 if user doesn't have access to the list.
     """
@@ -102,30 +176,27 @@ async def create_todo_item(
     logger.info(f"Creating item in list {list_id} for user {current_user['id']}")
 
     try:
-        result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-        list_obj = result.scalars().first()
-
-        if list_obj is None:
-            raise HTTPException(status_code=404, detail="List not found")
-
-        # Check if user has access (owner only for now - Epic 4 will add sharing)
-        if list_obj.owner_id != current_user["id"]:
-            raise HTTPException(
-                status_code=403, detail="You don't have access to this list"
-            )
+        await require_list_access(db, list_id, current_user["id"], policy.ITEM_CREATE)
 
-        # Create the item
-        new_item = await create_item(
+        # Create the item, or replay the response to an earlier try
+        return await idempotent(
             db,
-            list_id,
-            item_data.text,
+            request,
             current_user["id"],
-            description=item_data.description,
-            tags=item_data.tags,
-            status=item_data.status,
+            idempotency_key,
+            item_data,
+            lambda: create_item(
+                db,
+                list_id,
+                item_data.text,
+                current_user["id"],
+                description=item_data.description,
+                tags=item_data.tags,
+                status=item_data.status,
+            ),
+            TodoItemResponse,
         )
-        return new_item
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         logger.error(f"Error creating item: {e}", exc_info=True)
@@ -138,6 +209,7 @@ async def update_todo_item(
     item_id: int,
     text_data: UpdateItemTextRequest,
     current_user: CurrentUser,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     request: Request = None,  # type: ignore[assignment]
 ):
@@ -145,36 +217,26 @@ async def update_todo_item(
     Update a TODO item in a list.
 
     Requires authentication. User must have access to the list.
+    With If-Match, only updates the item if it is still at that ETag.
     Returns 404 if list or item not found.
     Returns 403 if user doesn't have access to the list.
+    Returns 412 with the current item if it has changed since.
     """
     logger.info(
         f"Updating item {item_id} in list {list_id} by user {current_user['id']}"
     )
 
     try:
-        # Check if list exists and user has access
-        result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-        list_obj = result.scalars().first()
-
-        if list_obj is None:
-            raise HTTPException(status_code=404, detail="List not found")
-
-        # Check if user has access (owner only for now)
-        if list_obj.owner_id != current_user["id"]:
-            raise HTTPException(
-                status_code=403, detail="You don't have access to this list"
-            )
+        # Check if list exists and user may edit it
+        await require_list_access(db, list_id, current_user["id"], policy.ITEM_UPDATE)
 
-        item = await get_item(db, item_id)
+        # Archived items too: the update moves them back
+        item = await get_item(db, item_id, include_archived=True, list_id=list_id)
 
+        # Only found if it belongs to this list
         if item is None:
             raise HTTPException(status_code=404, detail="Item not found")
 
-        # Verify item belongs to this list
-        if item.list_id != list_id:
-            raise HTTPException(status_code=404, detail="Item not found in this list")
-
         # Parse the request body directly to see what fields were sent
         body = await request.json()
         logger.info(f"Request body: {body}")
@@ -201,13 +263,16 @@ async def update_todo_item(
             status=provided_fields.get("status", UNSET),
             due_date=provided_fields.get("due_date", UNSET),
             priority=provided_fields.get("priority", UNSET),
+            if_match=if_match_versions(request, item_id),
+            list_id=list_id,
         )
 
         if updated_item is None:
             raise HTTPException(status_code=500, detail="Failed to update item")
 
+        response.headers["ETag"] = item_etag(updated_item)
         return updated_item
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded, VersionConflict):
         raise
     except Exception as e:
         logger.error(f"Error updating item: {e}", exc_info=True)
@@ -219,6 +284,7 @@ async def update_todo_item_text(
     item_id: int,
     text_data: UpdateItemTextRequest,
     current_user: CurrentUser,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     request: Request = None,  # type: ignore[assignment]
 ):
@@ -226,8 +292,10 @@ async def update_todo_item_text(
     Update a TODO item's text.
 
     Requires authentication. User must have permission to edit the item.
+    With If-Match, only updates the item if it is still at that ETag.
     Returns 404 if item not found.
     Returns 403 if user doesn't have permission to edit the item.
+    Returns 412 with the current item if it has changed since.
     """
     logger.info(f"Updating item {item_id} by user {current_user.get('id')}")
 
@@ -255,26 +323,25 @@ async def update_todo_item_text(
         status=provided_fields.get("status", UNSET),
         due_date=provided_fields.get("due_date", UNSET),
         priority=provided_fields.get("priority", UNSET),
+        if_match=if_match_versions(request, item_id),
     )
 
     if updated_item is None:
-        item = await get_item(db, item_id)
+        item = await get_item(db, item_id, include_archived=True)
         if item is None:
             logger.warning(f"Item {item_id} not found")
             raise HTTPException(status_code=404, detail="Item not found")
         else:
-            # Check the list to see why permission failed
-            list_result = await db.execute(
-                select(TodoList).where(TodoList.id == item.list_id)
-            )
-            todo_list = list_result.scalars().first()
+            # Check the user's role to see why permission failed
+            role = await membership.get_role(db, item.list_id, current_user["id"])
             logger.warning(
-                f"Permission denied: user={current_user.get('id')}, list_owner={todo_list.owner_id if todo_list else 'list not found'}"
+                f"Permission denied: user={current_user.get('id')}, list={item.list_id}, role={role}"
             )
             raise HTTPException(
                 status_code=403, detail="You don't have permission to edit this item"
             )
 
+    response.headers["ETag"] = item_etag(updated_item)
     return updated_item
 
 
@@ -282,17 +349,23 @@ async def update_todo_item_text(
 async def toggle_todo_item_completion(
     item_id: int,
     current_user: CurrentUser,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Toggle a TODO item's completion status.
 
     Requires authentication. User must have permission to edit the item (Owner/Editor only).
+    With If-Match, only toggles the item if it is still at that ETag.
     Returns 404 if item not found.
     Returns 403 if user doesn't have permission to edit the item.
+    Returns 412 with the current item if it has changed since.
     """
     # Toggle the item completion
-    updated_item, error = await toggle_item_completion(db, item_id, current_user["id"])
+    updated_item, error = await toggle_item_completion(
+        db, item_id, current_user["id"], if_match=if_match_versions(request, item_id)
+    )
 
     if error == "not_found":
         raise HTTPException(status_code=404, detail="Item not found")
@@ -303,6 +376,7 @@ async def toggle_todo_item_completion(
     elif updated_item is None:
         raise HTTPException(status_code=500, detail="Failed to toggle item completion")
 
+    response.headers["ETag"] = item_etag(updated_item)
     return updated_item
 
 
@@ -310,17 +384,22 @@ async def toggle_todo_item_completion(
 async def delete_todo_item(
     item_id: int,
     current_user: CurrentUser,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a TODO item (soft delete for undo support).
 
     Requires authentication. User must have permission to delete the item (Owner/Editor only).
+    With If-Match, only deletes the item if it is still at that ETag.
     Returns 204 on success.
     Returns 404 if item not found.
     Returns 403 if user doesn't have permission to delete the item.
+    Returns 412 with the current item if it has changed since.
     """
-    success, error = await delete_item(db, item_id, current_user["id"])
+    success, error = await delete_item(
+        db, item_id, current_user["id"], if_match=if_match_versions(request, item_id)
+    )
 
     if error == "not_found":
         raise HTTPException(status_code=404, detail="Item not found")
@@ -336,17 +415,23 @@ async def delete_todo_item(
 async def restore_todo_item(
     item_id: int,
     current_user: CurrentUser,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Restore a recently deleted TODO item.
 
     Requires authentication. User must have permission to restore the item.
+    With If-Match, only restores the item if it is still at that ETag.
     Returns 200 with restored item on success.
     Returns 404 if item not found, not deleted, or undo timeout expired.
     Returns 403 if user doesn't have permission to restore the item.
+    Returns 412 with the current item if it has changed since.
     """
-    restored_item, error = await restore_item(db, item_id, current_user["id"])
+    restored_item, error = await restore_item(
+        db, item_id, current_user["id"], if_match=if_match_versions(request, item_id)
+    )
 
     if error == "not_found":
         raise HTTPException(
@@ -365,6 +450,7 @@ async def restore_todo_item(
     elif restored_item is None:
         raise HTTPException(status_code=500, detail="Failed to restore item")
 
+    response.headers["ETag"] = item_etag(restored_item)
     return restored_item
 
 
@@ -385,18 +471,26 @@ async def set_due_date(
     item_id: int,
     data: SetDueDateRequest,
     current_user: CurrentUser,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Set or clear a TODO item's due date.
 
     Requires authentication. User must have permission to edit the item.
+    With If-Match, only updates the item if it is still at that ETag.
     Returns 200 with updated item on success.
     Returns 404 if item not found.
     Returns 403 if user doesn't have permission.
+    Returns 412 with the current item if it has changed since.
     """
     updated_item, error = await set_item_due_date(
-        db, item_id, data.due_date, current_user["id"]
+        db,
+        item_id,
+        data.due_date,
+        current_user["id"],
+        if_match=if_match_versions(request, item_id),
     )
 
     if error == "not_found":
@@ -408,6 +502,7 @@ async def set_due_date(
     elif updated_item is None:
         raise HTTPException(status_code=500, detail="Failed to update due date")
 
+    response.headers["ETag"] = item_etag(updated_item)
     return updated_item
 
 
@@ -416,15 +511,19 @@ async def set_priority(
     item_id: int,
     data: SetPriorityRequest,
     current_user: CurrentUser,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Set or clear a TODO item's priority.
 
     Requires authentication. User must have permission to edit the item.
+    With If-Match, only updates the item if it is still at that ETag.
     Returns 200 with updated item on success.
     Returns 404 if item not found.
     Returns 403 if user doesn't have permission.
+    Returns 412 with the current item if it has changed since.
     """
     # Convert string priority to enum if provided
     priority_value = None
@@ -432,7 +531,11 @@ async def set_priority(
         priority_value = Priority[data.priority.upper()]
 
     updated_item, error = await set_item_priority(
-        db, item_id, priority_value, current_user["id"]
+        db,
+        item_id,
+        priority_value,
+        current_user["id"],
+        if_match=if_match_versions(request, item_id),
     )
 
     if error == "not_found":
@@ -444,4 +547,5 @@ async def set_priority(
     elif updated_item is None:
         raise HTTPException(status_code=500, detail="Failed to update priority")
 
+    response.headers["ETag"] = item_etag(updated_item)
     return updated_item
@@ -2,13 +2,19 @@
 
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import CurrentUser
+from app.api.deps import CurrentUser, require_list_access
+from app.api.etag import list_etag, not_modified
+from app.api.idempotency import idempotent
+from app.api.routing import TimedRoute
 from app.db.database import get_db
 from app.schemas.todo_list import TodoListCreate, TodoListResponse
+from app.services import policy
 from app.services.list_service import (
     create_list,
     get_user_lists,
@@ -19,7 +25,7 @@ from app.services.list_service import (
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/lists", tags=["lists"])
+router = APIRouter(prefix="/lists", tags=["lists"], route_class=TimedRoute)
 
 
 class UpdateListNameRequest(BaseModel):
@@ -34,21 +40,32 @@ class UpdateListNameRequest(BaseModel):
 async def create_todo_list(
     list_data: TodoListCreate,
     current_user: CurrentUser,
+    request: Request,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """
     Create a new TODO list.
 
     Requires authentication. List will be owned by the authenticated user.
+    A retry with the same Idempotency-Key gets the first response back
+    instead of creating another list.
     """
-    new_list = await create_list(db, list_data.name, current_user["id"])
-    return new_list
+    return await idempotent(
+        db,
+        request,
+        current_user["id"],
+        idempotency_key,
+        list_data,
+        lambda: create_list(db, list_data.name, current_user["id"]),
+        TodoListResponse,
+    )
 
 
 @router.get("", response_model=list[TodoListResponse])
 async def get_lists(current_user: CurrentUser, db: AsyncSession = Depends(get_db)):
     """
-    Get all TODO lists for the authenticated user.
+    Get all TODO lists the authenticated user owns or is a member of.
     """
     logger.info(f"Getting list for user {current_user['id']}")
 
@@ -60,34 +77,24 @@ async def get_lists(current_user: CurrentUser, db: AsyncSession = Depends(get_db
 async def get_list_detail(
     list_id: int,
     current_user: CurrentUser,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get a specific TODO list by ID.
 
     Requires authentication.
+    Returns 304 if If-None-Match matches the list's current ETag.
     Returns 404 if list not found.
     Returns 403 if user doesn't have access to the list.
     """
+    await require_list_access(db, list_id, current_user["id"])
     list_obj = await get_list(db, list_id, current_user["id"])
-
     if list_obj is None:
-        # First check if list exists at all (might be 404 or 403)
-        from sqlalchemy import select
-        from app.models.todo_list import TodoList
-
-        result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-        existing_list = result.scalars().first()
-
-        if existing_list is None:
-            raise HTTPException(status_code=404, detail="List not found")
-        else:
-            # List exists but user doesn't own it
-            raise HTTPException(
-                status_code=403, detail="You don't have access to this list"
-            )
+        raise HTTPException(status_code=404, detail="List not found")
 
-    return list_obj
+    return not_modified(request, response, list_etag(list_obj)) or list_obj
 
 
 @router.put("/{list_id}/name", response_model=TodoListResponse)
@@ -102,23 +109,10 @@ async def update_todo_list_name(
 
     Requires authentication.
     Returns 404 if list not found.
-    Returns 403 if user doesn't own the list.
+    Returns 403 if user is not the list's owner or an editor.
     """
-    # First check if list exists
-    from sqlalchemy import select
-    from app.models.todo_list import TodoList
-
-    result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-    existing_list = result.scalars().first()
-
-    if existing_list is None:
-        raise HTTPException(status_code=404, detail="List not found")
-
-    # Check ownership
-    if existing_list.owner_id != current_user["id"]:
-        raise HTTPException(
-            status_code=403, detail="You don't have access to this list"
-        )
+    # Owners and editors may rename
+    await require_list_access(db, list_id, current_user["id"], policy.LIST_UPDATE)
 
     # Update the name
     list_obj = await update_list_name(db, list_id, current_user["id"], name_data.name)
@@ -138,21 +132,8 @@ async def delete_todo_list(
     Returns 404 if list not found.
     Returns 403 if user doesn't own the list.
     """
-    # First check if list exists
-    from sqlalchemy import select
-    from app.models.todo_list import TodoList
-
-    result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-    existing_list = result.scalars().first()
-
-    if existing_list is None:
-        raise HTTPException(status_code=404, detail="List not found")
-
-    # Check ownership
-    if existing_list.owner_id != current_user["id"]:
-        raise HTTPException(
-            status_code=403, detail="You don't have access to this list"
-        )
+    # Only the owner may delete
+    await require_list_access(db, list_id, current_user["id"], policy.LIST_DELETE)
 
     # Delete the list
     await delete_list(db, list_id, current_user["id"])
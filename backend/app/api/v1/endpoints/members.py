@@ -0,0 +1,89 @@
+"""List sharing endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import CurrentUser
+from app.api.routing import TimedRoute
+from app.db.database import get_db
+from app.schemas.list_member import ListMemberResponse, ListMemberUpdate
+from app.services.membership import get_members, remove_member, set_member_role
+
+router = APIRouter(
+    prefix="/lists/{list_id}/members", tags=["members"], route_class=TimedRoute
+)
+
+_ERRORS = {
+    "not_found": (status.HTTP_404_NOT_FOUND, "List not found"),
+    "forbidden": (status.HTTP_403_FORBIDDEN, "You don't have access to this list"),
+    "owner": (status.HTTP_400_BAD_REQUEST, "The list's owner cannot be changed or removed"),
+    "not_a_member": (status.HTTP_404_NOT_FOUND, "Member not found"),
+}
+
+
+def _raise(error: str) -> None:
+    status_code, detail = _ERRORS[error]
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+@router.get("", response_model=list[ListMemberResponse])
+async def get_list_members(
+    list_id: int,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the members of a list and their roles, owner first.
+
+    Returns 404 if list not found.
+    Returns 403 if user is not a member of the list.
+    """
+    members, error = await get_members(db, list_id, current_user["id"])
+    if error:
+        _raise(error)
+    return members
+
+
+@router.put("/{user_id}", response_model=ListMemberResponse)
+async def share_list(
+    list_id: int,
+    user_id: str,
+    member_data: ListMemberUpdate,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Share a list with a user as editor or viewer, or change their role.
+
+    Only the list's owner may share it.
+    Returns 400 if the user is the list's owner.
+    Returns 404 if list not found.
+    Returns 403 if user doesn't own the list.
+    """
+    member, error = await set_member_role(
+        db, list_id, user_id, member_data.role, current_user["id"]
+    )
+    if error:
+        _raise(error)
+    return member
+
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unshare_list(
+    list_id: int,
+    user_id: str,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stop sharing a list with a user.
+
+    The owner may remove anyone else; members may remove themselves.
+    Returns 400 if the user is the list's owner.
+    Returns 404 if list or member not found.
+    Returns 403 if user may not remove the member.
+    """
+    _, error = await remove_member(db, list_id, user_id, current_user["id"])
+    if error:
+        _raise(error)
+    return None
@@ -0,0 +1,182 @@
+"""WebSocket mutation channel for interactive list editing."""
+
+import json
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, WebSocketException, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.deps import WebSocketUser
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.database import get_session_maker
+from app.models.todo_item import Priority
+from app.schemas.mutation import (
+    DeleteOp,
+    EditOp,
+    MutationAck,
+    MutationOp,
+    ReorderOp,
+    RestoreOp,
+    ToggleOp,
+    mutation_op_adapter,
+)
+from app.schemas.todo_item import TodoItemResponse
+from app.services import membership, policy, rate_limit
+from app.services.item_service import (
+    VersionConflict,
+    delete_item,
+    get_item,
+    restore_item,
+    toggle_item_completion,
+    update_item,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/lists/{list_id}/ws", tags=["mutations"])
+
+op_latency = registry.histogram(
+    "ws_mutation_duration_seconds",
+    "Time to apply one WebSocket mutation command.",
+    ("op",),
+)
+ops_total = registry.counter(
+    "ws_mutations_total",
+    "WebSocket mutation commands by op and result.",
+    ("op", "result"),
+)
+
+# Edit fields passed through to update_item only when the client sent them
+EDIT_FIELDS = ("description", "tags", "status", "due_date", "priority")
+
+
+@router.websocket("")
+async def list_mutations(
+    websocket: WebSocket,
+    list_id: int,
+    current_user: WebSocketUser,
+    session_maker: async_sessionmaker = Depends(get_session_maker),
+):
+    """
+    Apply item mutations for one list over a single authenticated socket.
+
+    Clients send JSON commands ``{"id": <op id>, "op": "toggle" | "edit" |
+    "delete" | "restore" | "reorder", "item_id": ..., ...}`` and receive one
+    ack per command, in order: ``{"id": ..., "ok": true, "item": {...}}`` or
+    ``{"id": ..., "ok": false, "error": "..."}``. Authentication and the
+    membership check happen once, at the handshake; each command then runs
+    the item service in its own short session, which checks the user may
+    edit the list (viewers get "forbidden"). Changes are announced to
+    other clients through the list event stream as usual. Each command is
+    charged to the user's write rate; over it, the ack is "rate_limited"
+    with ``retry_after`` in seconds. A command with ``"version"`` applies only
+    if the item is still at that version; otherwise the ack is "conflict"
+    with the current item.
+    Closes with 1008 if the list is not found or the user is not a member.
+    """
+    origin = websocket.headers.get("origin")
+    if origin and origin not in settings.cors_origins.split(","):
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Origin not allowed")
+
+    async with session_maker() as db:
+        # Viewers may connect; each command checks the user may edit
+        if await membership.check_access(db, list_id, current_user["id"]):
+            raise WebSocketException(
+                code=status.WS_1008_POLICY_VIOLATION, reason="List not found"
+            )
+
+    await websocket.accept()
+    user_id = current_user["id"]
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                op = mutation_op_adapter.validate_json(message)
+            except ValidationError as e:
+                ops_total.inc("unknown", "invalid")
+                await websocket.send_text(
+                    MutationAck(id=_op_id(message), ok=False, error="invalid").model_dump_json()
+                )
+                logger.debug(f"Invalid mutation on list {list_id}: {e}")
+                continue
+
+            wait = await rate_limit.limiter.take(user_id, rate_limit.WRITE)
+            if wait is not None:
+                ops_total.inc(op.op, "rate_limited")
+                await websocket.send_text(
+                    MutationAck(
+                        id=op.id, ok=False, error="rate_limited", retry_after=wait
+                    ).model_dump_json()
+                )
+                continue
+
+            start = time.perf_counter()
+            async with session_maker() as db:
+                try:
+                    ack = await _apply(db, op, list_id, user_id)
+                except Exception:
+                    logger.exception(f"Mutation {op.op} on item {op.item_id} failed")
+                    await db.rollback()
+                    ack = MutationAck(id=op.id, ok=False, error="internal_error")
+            op_latency.observe(time.perf_counter() - start, op.op)
+            ops_total.inc(op.op, "ok" if ack.ok else ack.error)
+            await websocket.send_text(ack.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+
+
+def _op_id(message: str) -> Optional[str]:
+    """Best-effort op id from a command that failed validation."""
+    try:
+        value = json.loads(message).get("id")
+    except (ValueError, AttributeError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+async def _apply(db: AsyncSession, op: MutationOp, list_id: int, user_id: str) -> MutationAck:
+    # The edits below are scoped to the connection's list too, and reuse the
+    # item; archived items are moved back by the edit
+    item = await get_item(db, op.item_id, include_archived=True, list_id=list_id)
+    if item is None:
+        return MutationAck(id=op.id, ok=False, error="not_found")
+
+    if isinstance(op, ReorderOp):
+        # Items have no position column yet; ordering is by creation time
+        return MutationAck(id=op.id, ok=False, error="unsupported")
+
+    error = None
+    item = None
+    if_match = {op.version} if op.version is not None else None
+    try:
+        if isinstance(op, ToggleOp):
+            item, error = await toggle_item_completion(db, op.item_id, user_id, if_match, list_id)
+        elif isinstance(op, EditOp):
+            fields = {name: getattr(op, name) for name in EDIT_FIELDS if name in op.model_fields_set}
+            if fields.get("status") is not None:
+                fields["status"] = fields["status"].value
+            if fields.get("priority") is not None:
+                fields["priority"] = Priority(fields["priority"].value)
+            item = await update_item(
+                db, op.item_id, op.text, user_id, **fields, if_match=if_match, list_id=list_id
+            )
+            if item is None:
+                denied = await membership.check_access(db, list_id, user_id, policy.ITEM_UPDATE)
+                error = "forbidden" if denied else "not_found"
+        elif isinstance(op, DeleteOp):
+            _, error = await delete_item(db, op.item_id, user_id, if_match, list_id)
+        else:
+            item, error = await restore_item(db, op.item_id, user_id, if_match, list_id)
+    except VersionConflict as conflict:
+        current = TodoItemResponse.model_validate(conflict.item) if conflict.item else None
+        return MutationAck(id=op.id, ok=False, error="conflict", item=current)
+
+    if error:
+        return MutationAck(id=op.id, ok=False, error=error)
+    return MutationAck(
+        id=op.id, ok=True, item=TodoItemResponse.model_validate(item) if item else None
+    )
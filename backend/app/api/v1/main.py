@@ -1,15 +1,24 @@
 """FastAPI v1 router."""
-from fastapi import APIRouter
-
-from app.api.deps import CurrentUser
-from app.api.v1.endpoints import lists, items
-
-router = APIRouter(prefix="/api/v1")
-
-# Include endpoint routers
-router.include_router(lists.router)
-router.include_router(items.router)
-router.include_router(items.items_router)
+from fastapi import APIRouter, Depends
+
+from app.api.deps import CurrentUser, admit_request, throttle_request
+from app.api.routing import TimedRoute
+from app.api.v1.endpoints import lists, items, events, mutations, activity, members, export, imports
+
+router = APIRouter(prefix="/api/v1", route_class=TimedRoute)
+
+# Include endpoint routers, admitted under per-user rate limits; event
+# streams are only rate limited, mutation sockets limit each command
+admitted = [Depends(admit_request)]
+router.include_router(lists.router, dependencies=admitted)
+router.include_router(items.router, dependencies=admitted)
+router.include_router(items.items_router, dependencies=admitted)
+router.include_router(events.router, dependencies=[Depends(throttle_request)])
+router.include_router(mutations.router)
+router.include_router(activity.router, dependencies=admitted)
+router.include_router(members.router, dependencies=admitted)
+router.include_router(export.router, dependencies=admitted)
+router.include_router(imports.router, dependencies=admitted)
 
 
 @router.get("/health")
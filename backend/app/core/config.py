@@ -11,6 +11,97 @@ class Settings(BaseSettings):
     database_url: str
     secret_key: str
     cors_origins: str = "http://localhost:3001"
+    # Statements slower than this are logged with their bind-parameter shapes
+    slow_query_ms: int = 200
+    # Output directory for request profiles and sampled stacks
+    profile_dir: str = "profiles"
+    # Continuous stack sampling rate for list/item requests (0 disables)
+    profile_sample_hz: float = 0.0
+    # List event streams: per-subscriber queue bound (slower clients are
+    # evicted), resume buffer size, keep-alive and client reconnect delay
+    event_queue_size: int = 256
+    event_history_size: int = 2048
+    event_heartbeat_seconds: float = 15.0
+    event_retry_ms: int = 3000
+    # Window for gathering a burst of cross-worker notifications (ms)
+    broadcast_coalesce_ms: float = 20.0
+    # Delta sync tokens rewind by this much so changes stamped just before a
+    # read but committed after it are still picked up (clients dedupe by id)
+    sync_overlap_seconds: float = 5.0
+    # Activity feed writer: rows per INSERT, longest wait before a partial
+    # batch is written (ms), and rows buffered before new ones are dropped
+    activity_batch_size: int = 500
+    activity_flush_ms: float = 250.0
+    activity_queue_size: int = 10000
+    # Outbox relay: events per delivery batch, poll interval for events
+    # committed by other workers (ms), failed deliveries before an event is
+    # set aside
+    outbox_batch_size: int = 200
+    outbox_poll_ms: float = 1000.0
+    outbox_max_attempts: int = 10
+    # List access checks: how long a worker trusts a cached role (seconds;
+    # 0 disables the cache) and how many (list, user) roles it keeps
+    membership_cache_ttl_seconds: float = 5.0
+    membership_cache_size: int = 10000
+    # Memoized conditional authorization decisions per worker
+    policy_cache_size: int = 100000
+    # Per-user admission control, with separate budgets for reads (GET) and
+    # writes: sustained requests per second, burst size, and requests in
+    # flight at once per worker. "local" keeps the token buckets in each
+    # worker; "postgres" shares them between workers, each taking
+    # rate_limit_lease tokens at a time
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "local"
+    rate_limit_read_per_second: float = 50.0
+    rate_limit_read_burst: int = 100
+    rate_limit_read_concurrency: int = 16
+    rate_limit_write_per_second: float = 10.0
+    rate_limit_write_burst: int = 30
+    rate_limit_write_concurrency: int = 8
+    rate_limit_lease: int = 5
+    # Load shedding: low-priority requests get 503 while pool checkout waits
+    # or event loop lag stay above their target for a whole interval (ms)
+    load_shed_enabled: bool = True
+    load_shed_pool_wait_target_ms: float = 50.0
+    load_shed_loop_lag_target_ms: float = 50.0
+    load_shed_interval_ms: float = 500.0
+    loop_lag_sample_ms: float = 100.0
+    # Request deadlines (seconds; 0 = none) bounding pool checkout waits and
+    # Postgres statement_timeout; clients may ask for another budget with
+    # X-Request-Timeout, up to the max
+    request_timeout_seconds: float = 15.0
+    request_timeout_max_seconds: float = 60.0
+    # Idempotency-Key on creates: how long a response is replayed for
+    # (seconds), how long a duplicate waits for the request still running
+    # with its key, how long that request's claim holds if it never
+    # finishes, and keys deleted per statement when purging expired ones
+    idempotency_ttl_seconds: int = 86400
+    idempotency_wait_seconds: float = 10.0
+    idempotency_lease_seconds: float = 60.0
+    idempotency_purge_batch_size: int = 1000
+    # Response compression (gzip, or zstd/brotli when installed): smallest
+    # body compressed, bytes per streamed chunk, smallest body compressed in
+    # a worker thread, and compressed bodies cached per worker
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_chunk_size: int = 65536
+    compression_offload_size: int = 262144
+    compression_cache_size: int = 256
+    # Rows read from the database, and encoded, at a time by exports
+    export_batch_size: int = 1000
+    # Bulk imports: valid rows staged (and progress saved) at a time,
+    # rejected rows listed on the job, and characters allowed in an NDJSON
+    # line or a CSV record
+    import_batch_size: int = 1000
+    import_max_errors: int = 1000
+    import_max_line_length: int = 1048576
+    # Completed items unchanged for this many days are moved to the archive,
+    # this many per transaction
+    archive_after_days: float = 28.0
+    archive_batch_size: int = 1000
+    # Hash partitions of todo_items by list_id, made when its partitioning
+    # migration runs on Postgres; 0 leaves the table unpartitioned
+    item_partitions: int = 0
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env",
@@ -0,0 +1,95 @@
+"""
+Request deadlines.
+
+Every API request gets a deadline when its route handler starts: the
+route's budget (``app.api.routing.ROUTE_DEADLINES``, else
+``request_timeout_seconds``), or what the client asks for in the
+``X-Request-Timeout`` header (seconds, capped at
+``request_timeout_max_seconds``), counted from when the request arrived.
+The database layer reads it from here: pool checkouts wait no longer than
+what is left, each Postgres transaction gets ``SET LOCAL statement_timeout``
+for the remainder, and work that starts after the deadline fails at once.
+Anything cut short raises ``DeadlineExceeded``, answered with 504.
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+TIMEOUT_HEADER = "x-request-timeout"
+
+# perf_counter() value by which the current request must be done
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+exceeded_total = registry.counter(
+    "request_deadline_exceeded_total",
+    "Requests cut short by their deadline, by where (pool, statement or start).",
+    ["where"],
+)
+
+
+class DeadlineExceeded(Exception):
+    """The current request ran out of time."""
+
+    def __init__(self, where: str):
+        super().__init__(f"Request deadline exceeded ({where})")
+        self.where = where
+        exceeded_total.inc(where)
+
+
+def budget(header: Optional[str], route_budget: Optional[float]) -> Optional[float]:
+    """
+    Seconds a request may take.
+
+    Args:
+        header: The X-Request-Timeout header, if sent
+        route_budget: The route's own budget, if it has one
+
+    Returns:
+        The budget, or None for no deadline
+    """
+    if header is not None:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = None
+        if requested is not None and requested >= 0:
+            return min(requested, settings.request_timeout_max_seconds)
+    seconds = settings.request_timeout_seconds if route_budget is None else route_budget
+    return seconds if seconds > 0 else None
+
+
+def start(started_at: float, seconds: Optional[float]) -> Token:
+    """Set the deadline of the current request; pass the token to ``reset``."""
+    return current_deadline.set(None if seconds is None else started_at + seconds)
+
+
+def reset(token: Token) -> None:
+    current_deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current request's deadline, None without one."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.perf_counter()
+
+
+def check(where: str) -> Optional[float]:
+    """
+    Fail fast if the current request is already out of time.
+
+    Returns:
+        Seconds left, or None without a deadline
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(where)
+    return left
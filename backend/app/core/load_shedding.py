@@ -0,0 +1,176 @@
+"""
+Overload detection for load shedding.
+
+Two delays are watched: how long a request waits to check a connection out
+of the pool (fed by ``app.db.instrumentation.TimedQueuePool``) and how late
+the event loop runs a periodic timer (``LoopLagMonitor``). As in CoDel, a
+burst of delay is not overload, a standing queue is: a delay signal counts
+as overloaded once it has stayed above its target for a whole interval
+without dipping below it once, and stops as soon as a sample is back under
+target. While a signal is overloaded, ``app.middleware.load_shedding``
+refuses low-priority requests.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+POOL = "pool"
+LOOP = "loop"
+
+pool_wait = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time to check a connection out of the pool, including connecting.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+loop_lag = registry.gauge(
+    "event_loop_lag_seconds", "How late the event loop ran the last lag probe."
+)
+overloaded = registry.gauge(
+    "load_shedding_overloaded", "1 while a delay signal (pool or loop) is overloaded.", ["signal"]
+)
+
+
+class DelayDetector:
+    """CoDel's standing-queue test applied to one stream of delay samples."""
+
+    def __init__(self, name: str, target: float, interval: float):
+        self.name = name
+        self.target = target
+        self.interval = interval
+        self._first_above: Optional[float] = None
+        self._last_sample = float("-inf")
+        self._overloaded = False
+
+    def observe(self, delay: float, now: Optional[float] = None) -> None:
+        """Record one delay sample (seconds)."""
+        now = time.monotonic() if now is None else now
+        self._last_sample = now
+        if delay < self.target:
+            self._first_above = None
+            self._set(False)
+        elif self._first_above is None:
+            self._first_above = now + self.interval
+        elif now >= self._first_above:
+            self._set(True)
+
+    def is_overloaded(self, now: Optional[float] = None) -> bool:
+        """Whether the delay is standing above target."""
+        if not self._overloaded:
+            return False
+        now = time.monotonic() if now is None else now
+        # No samples means nothing is queueing (or being measured) any more
+        if now - self._last_sample > self.interval:
+            self._first_above = None
+            self._set(False)
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._first_above = None
+        self._last_sample = float("-inf")
+        self._set(False)
+
+    def _set(self, value: bool) -> None:
+        if value != self._overloaded:
+            self._overloaded = value
+            overloaded.set(self.name, value=1 if value else 0)
+            if value:
+                logger.warning(f"Overloaded: {self.name} delay above target; shedding load")
+            else:
+                logger.info(f"No longer overloaded: {self.name} delay back under target")
+
+
+class LoadShedder:
+    """The pool and loop delay detectors, consulted per low-priority request."""
+
+    def __init__(
+        self,
+        pool_target: float,
+        loop_target: float,
+        interval: float,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.pool = DelayDetector(POOL, pool_target, interval)
+        self.loop = DelayDetector(LOOP, loop_target, interval)
+
+    def overloaded_signal(self) -> Optional[str]:
+        """The overloaded signal, "pool" or "loop", or None if neither is."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        if self.pool.is_overloaded(now):
+            return POOL
+        if self.loop.is_overloaded(now):
+            return LOOP
+        return None
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        pool_wait.observe(seconds)
+        self.pool.observe(seconds)
+
+    def observe_loop_lag(self, seconds: float) -> None:
+        loop_lag.set(value=seconds)
+        self.loop.observe(seconds)
+
+    def clear(self) -> None:
+        self.pool.clear()
+        self.loop.clear()
+
+
+shedder = LoadShedder(
+    settings.load_shed_pool_wait_target_ms / 1000,
+    settings.load_shed_loop_lag_target_ms / 1000,
+    settings.load_shed_interval_ms / 1000,
+    enabled=settings.load_shed_enabled,
+)
+
+
+class LoopLagMonitor:
+    """Measures event loop lag as the lateness of a periodic sleep."""
+
+    def __init__(self, target: LoadShedder, period: float):
+        self.target = target
+        self.period = period
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.period)
+            self.target.observe_loop_lag(max(0.0, time.monotonic() - start - self.period))
+
+
+monitor: Optional[LoopLagMonitor] = None
+
+
+def start_monitor() -> None:
+    """Start this worker's event loop lag probe."""
+    global monitor
+    if not settings.load_shed_enabled:
+        return
+    monitor = LoopLagMonitor(shedder, settings.loop_lag_sample_ms / 1000)
+    monitor.start()
+
+
+async def stop_monitor() -> None:
+    global monitor
+    if monitor is not None:
+        await monitor.stop()
+        monitor = None
@@ -0,0 +1,154 @@
+"""On-demand request profiling and continuous low-rate stack sampling."""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Only frames from the app package are kept in sampled stacks
+_APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+def sign_profile_token(expires_at: int, secret: Optional[str] = None) -> str:
+    """
+    Create an admin profiling token valid until ``expires_at`` (unix seconds).
+
+    Send it as the ``X-Profile-Token`` header or ``?profile=`` query flag.
+    """
+    secret = secret or settings.secret_key
+    digest = hmac.new(
+        secret.encode(), f"profile:{expires_at}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{expires_at}.{digest}"
+
+
+def verify_profile_token(token: str, secret: Optional[str] = None) -> bool:
+    """Check signature and expiry of a profiling token."""
+    expires, _, _ = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(token, sign_profile_token(int(expires), secret))
+
+
+def new_profile_id(method: str, path: str) -> str:
+    """Unique, filesystem-safe name for one profiled request."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{method} {path}").strip("_")
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{os.urandom(3).hex()}"
+
+
+def write_profile(profiler, directory: Path, profile_id: str, metadata: dict) -> None:
+    """Dump a cProfile run plus a JSON metadata sidecar."""
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(directory / f"{profile_id}.prof"))
+    (directory / f"{profile_id}.json").write_text(json.dumps(metadata, indent=2))
+
+
+class StackSampler:
+    """
+    Background thread sampling the event-loop thread's stack at a low rate.
+
+    Samples are only taken while ``active`` > 0 (requests of interest are in
+    flight) and are aggregated as folded stacks (``a;b;c count``), the input
+    format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, hz: float, output: Path, flush_interval: float = 60.0):
+        self.interval = 1.0 / hz
+        self.output = output
+        self.flush_interval = flush_interval
+        self.active = 0
+        self.stacks: Counter[str] = Counter()
+        self._target_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling the calling thread (the event loop thread)."""
+        self._target_thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and write the aggregated stacks."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def sample(self) -> None:
+        """Take one sample of the target thread, if it is running app code."""
+        frame = sys._current_frames().get(self._target_thread_id)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename.startswith(_APP_ROOT):
+                names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+            frame = frame.f_back
+        if names:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def flush(self) -> None:
+        """Write folded stacks to ``output``."""
+        if not self.stacks:
+            return
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        self.output.write_text("\n".join(lines) + "\n")
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while not self._stop.wait(self.interval):
+            if self.active > 0:
+                self.sample()
+            if time.monotonic() - last_flush >= self.flush_interval:
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception("Failed to write sampled stacks")
+                last_flush = time.monotonic()
+
+
+# Process-wide sampler, created on startup when PROFILE_SAMPLE_HZ > 0
+sampler: Optional[StackSampler] = None
+
+
+def start_sampler() -> None:
+    """Start continuous sampling if enabled in settings."""
+    global sampler
+    if settings.profile_sample_hz <= 0 or sampler is not None:
+        return
+    output = Path(settings.profile_dir) / f"stacks-{os.getpid()}.folded"
+    sampler = StackSampler(settings.profile_sample_hz, output)
+    sampler.start()
+    logger.info(
+        "Stack sampler running at %.1f Hz, writing %s",
+        settings.profile_sample_hz, output,
+    )
+
+
+def stop_sampler() -> None:
+    """Stop continuous sampling and flush collected stacks."""
+    global sampler
+    if sampler is not None:
+        sampler.stop()
+        sampler = None
+
+
+if __name__ == "__main__":
+    # Print a profiling token: python -m app.core.profiling [ttl_seconds]
+    ttl = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    print(sign_profile_token(int(time.time()) + ttl))
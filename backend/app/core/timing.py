@@ -0,0 +1,51 @@
+"""Request-scoped timing state shared by the middleware, dependencies and DB hooks."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class RequestTimings:
+    """Accumulated phase durations (seconds) for the current request."""
+
+    __slots__ = ("start", "phases", "endpoint_done")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.phases: dict[str, float] = {}
+        # perf_counter() value when the endpoint function returned
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add ``seconds`` to ``phase``."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Add a duration to the current request, if one is being timed."""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+    """Time the enclosed block into ``phase`` of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+def mark_endpoint_done() -> None:
+    """Record the moment the endpoint returned; the rest is serialization."""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.endpoint_done = time.perf_counter()
@@ -2,6 +2,7 @@
 import sys
 import asyncio
 from collections.abc import AsyncGenerator
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlmodel import SQLModel
 
@@ -10,14 +11,29 @@ if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 from app.core.config import settings
+from app.db import deadlines  # noqa: F401  (statement timeouts from request deadlines)
+from app.db.instrumentation import TimedQueuePool, instrument_engine
+
+# In-memory SQLite needs its static pool; other databases get a queue pool
+# that reports checkout waits for load shedding
+_url = make_url(settings.database_url)
+_pool_options = (
+    {}
+    if _url.get_backend_name() == "sqlite" and _url.database in (None, "", ":memory:")
+    else {"poolclass": TimedQueuePool}
+)
 
 # Create async engine with psycopg
 engine = create_async_engine(
     settings.database_url,
     echo=False,
-    future=True
+    future=True,
+    **_pool_options,
 )
 
+# Per-request statement counts, DB time and slow-query logging
+instrument_engine(engine)
+
 # Create async session factory
 async_session_maker = async_sessionmaker(
     engine,
@@ -26,6 +42,11 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def get_session_maker() -> async_sessionmaker:
+    """Dependency for code that manages its own short-lived sessions."""
+    return async_session_maker
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async database session."""
     async with async_session_maker() as session:
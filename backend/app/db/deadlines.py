@@ -0,0 +1,35 @@
+"""Request deadlines (``app.core.deadline``) applied to database work."""
+
+import math
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core import deadline
+
+# Postgres SQLSTATE for a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session: Session, transaction, connection) -> None:
+    """Bound every Postgres statement of the transaction by what is left of the deadline."""
+    if connection.dialect.name != "postgresql":
+        return
+    left = deadline.check("statement")
+    if left is not None:
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {max(1, math.ceil(left * 1000))}"
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _statement_timeout_error(context):
+    """Report a statement the deadline cancelled as DeadlineExceeded."""
+    if (
+        getattr(context.original_exception, "sqlstate", None) == QUERY_CANCELED
+        and deadline.current_deadline.get() is not None
+    ):
+        return deadline.DeadlineExceeded("statement")
+    return None
@@ -0,0 +1,198 @@
+"""Per-request SQL instrumentation: statement counts, DB time, N+1 and slow queries, pool waits."""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core import deadline
+from app.core.config import settings
+from app.core.load_shedding import shedder
+from app.core.timing import record_phase
+
+logger = logging.getLogger(__name__)
+
+# Same statement with different parameters this many times suggests N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+
+class QueryStats:
+    """Statements executed while handling one request (or one test block)."""
+
+    __slots__ = ("count", "total_time", "statements", "executions")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        # statement -> executions, regardless of parameters
+        self.statements: Counter[str] = Counter()
+        # (statement, parameters) -> executions
+        self.executions: Counter[tuple[str, str]] = Counter()
+
+    def record(self, statement: str, parameters: Any, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+        self.executions[(statement, repr(parameters))] += 1
+
+    def duplicates(self) -> list[tuple[str, int]]:
+        """Identical statements with identical parameters executed more than once."""
+        return [
+            (statement, n)
+            for (statement, _params), n in self.executions.items()
+            if n > 1
+        ]
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statements repeated ``threshold`` or more times with varying parameters."""
+        return [
+            (statement, n)
+            for statement, n in self.statements.items()
+            if n >= threshold
+        ]
+
+    def log_findings(self, route: str) -> None:
+        """Warn about duplicate fetches and N+1 patterns seen in this request."""
+        for statement, n in self.duplicates():
+            logger.warning(
+                "Duplicate query on %s: executed %d times with identical parameters: %s",
+                route, n, _shorten(statement),
+            )
+        for statement, n in self.n_plus_one():
+            logger.warning(
+                "Possible N+1 on %s: statement executed %d times: %s",
+                route, n, _shorten(statement),
+            )
+
+    # Assertion helpers for tests
+
+    def assert_count(self, expected: int) -> None:
+        assert self.count == expected, (
+            f"Expected {expected} statements, got {self.count}:\n" + self._listing()
+        )
+
+    def assert_max(self, limit: int) -> None:
+        assert self.count <= limit, (
+            f"Expected at most {limit} statements, got {self.count}:\n" + self._listing()
+        )
+
+    def assert_no_duplicates(self) -> None:
+        duplicates = self.duplicates()
+        assert not duplicates, "Duplicate statements:\n" + "\n".join(
+            f"  {n}x {_shorten(statement)}" for statement, n in duplicates
+        )
+
+    def _listing(self) -> str:
+        return "\n".join(
+            f"  {n}x {_shorten(statement)}" for statement, n in self.statements.items()
+        )
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """
+    Collect statements executed inside the block.
+
+    Usage in tests::
+
+        with capture_queries() as queries:
+            await get_items_by_list(db, list_id)
+        queries.assert_count(1)
+    """
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Describe bind parameters by type only, so values never reach the logs."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: report batch size and the first row's shape
+            return {"rows": len(parameters), "shape": parameter_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _shorten(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attach statement counting, DB timing and slow-query logging to ``engine``."""
+    slow_threshold = settings.slow_query_ms / 1000
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start_time"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_start_time")
+        # Attribute statement time to the "db" phase of the current request
+        record_phase("db", elapsed)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, parameters, elapsed)
+        if elapsed >= slow_threshold:
+            logger.warning(
+                "Slow query (%.1f ms) params=%s: %s",
+                elapsed * 1000, parameter_shape(parameters), _shorten(statement),
+            )
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool reporting how long each checkout waited, for load shedding,
+    and waiting no longer than the current request's deadline allows.
+    """
+
+    # QueuePool reads self._timeout when a checkout starts waiting; reading
+    # it per call keeps the configured timeout for work without a deadline
+    @property
+    def _timeout(self) -> float:
+        left = deadline.remaining()
+        if left is None:
+            return self._pool_timeout
+        return max(0.0, min(self._pool_timeout, left))
+
+    @_timeout.setter
+    def _timeout(self, value: float) -> None:
+        self._pool_timeout = value
+
+    def recreate(self) -> "TimedQueuePool":
+        # QueuePool.recreate() configures the new pool with self._timeout,
+        # which inside a request is cut short by its deadline
+        pool = super().recreate()
+        pool._pool_timeout = self._pool_timeout
+        return pool
+
+    def connect(self):
+        deadline.check("pool")
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError as e:
+            left = deadline.remaining()
+            if left is not None and left < self._pool_timeout:
+                raise deadline.DeadlineExceeded("pool") from e
+            raise
+        finally:
+            shedder.observe_pool_wait(time.perf_counter() - start)
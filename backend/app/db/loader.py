@@ -0,0 +1,151 @@
+"""
+Request-scoped batching loader for lists and items by id.
+
+Endpoints and services of one request share a session, and through it one
+``Loader`` per model (see ``get_loader``). Each id is fetched at most once
+per session: repeated loads return the same object. Loads issued in the
+same event loop tick, e.g. from ``asyncio.gather`` or ``load_many``, are
+sent as one ``WHERE id = ANY(:ids)`` query (``IN`` on SQLite); on Postgres
+the statement text does not depend on the number of ids, so it is prepared
+once. Items may be looked up within a list, when it is known: the query
+then also filters on ``list_id``, so on a partitioned ``todo_items`` only
+those lists' partitions are read. A rollback expires loaded objects, so it
+also empties the loaders.
+"""
+
+import asyncio
+from typing import Generic, Iterable, Optional, TypeVar
+
+from sqlalchemy import Integer, any_, bindparam, event, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+
+_LOADERS = "loaders"
+
+T = TypeVar("T")
+
+batches_total = registry.counter(
+    "loader_batches_total", "Batched lookups by id sent to the database.", ["model"]
+)
+keys_total = registry.counter(
+    "loader_keys_total", "Lookups by id, by whether they were already loaded.", ["model", "source"]
+)
+
+
+class Loader(Generic[T]):
+    """Dedupes and batches lookups of one model by primary key within a session."""
+
+    def __init__(self, db: AsyncSession, model: type[T]):
+        self.db = db
+        self.model = model
+        self.name = model.__tablename__
+        # By id, then by the list the lookup was within (None for none)
+        self._futures: dict[int, dict[Optional[int], asyncio.Future]] = {}
+        self._queue: list[tuple[int, Optional[int]]] = []
+        self._dispatch: Optional[asyncio.Task] = None
+
+    async def load(self, key: int, list_id: Optional[int] = None) -> Optional[T]:
+        """
+        Get one object by id.
+
+        Args:
+            key: Primary key
+            list_id: ID of the list the object must be in, for models with a
+                ``list_id`` (items)
+
+        Returns:
+            The object, or None if there is no row with that id (in that list)
+        """
+        futures = self._futures.setdefault(key, {})
+        future = futures.get(list_id)
+        if future is None:
+            keys_total.inc(self.name, "database")
+            future = asyncio.get_running_loop().create_future()
+            futures[list_id] = future
+            self._queue.append((key, list_id))
+            if self._dispatch is None:
+                # Runs after everything already scheduled for this tick
+                self._dispatch = asyncio.get_running_loop().create_task(self._run())
+        else:
+            keys_total.inc(self.name, "cache")
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[int]) -> list[Optional[T]]:
+        """Get several objects by id in one query, in the order of ``keys``."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, obj: T) -> None:
+        """Record an object loaded or created elsewhere so later loads reuse it."""
+        futures = self._futures.setdefault(obj.id, {})
+        for list_id in {None, getattr(obj, "list_id", None)}:
+            future = futures.get(list_id)
+            if future is None or future.done():
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(obj)
+                futures[list_id] = future
+
+    def forget(self, key: int) -> None:
+        """Drop a loaded id, e.g. once its row is deleted."""
+        futures = self._futures.get(key, {})
+        for list_id, future in list(futures.items()):
+            if future.done():
+                del futures[list_id]
+
+    def _any(self, column, name: str, values: list[int]):
+        if self.db.get_bind().dialect.name == "postgresql":
+            return column == any_(bindparam(name, values, type_=ARRAY(Integer)))
+        return column.in_(values)
+
+    async def _select(self, keys: list[tuple[int, Optional[int]]]) -> list[T]:
+        condition = self._any(self.model.id, "ids", [key for key, _ in keys])
+        list_ids = sorted({list_id for _, list_id in keys if list_id is not None})
+        if list_ids:
+            condition &= self._any(self.model.list_id, "list_ids", list_ids)
+        batches_total.inc(self.name)
+        return list((await self.db.execute(select(self.model).where(condition))).scalars())
+
+    async def _run(self) -> None:
+        keys, self._queue, self._dispatch = self._queue, [], None
+        futures = [self._futures[key][list_id] for key, list_id in keys]
+        try:
+            # Lookups within lists and by id alone go in separate queries
+            found = {}
+            for scoped in (False, True):
+                batch = [(key, list_id) for key, list_id in keys if (list_id is not None) == scoped]
+                if batch:
+                    found.update((obj.id, obj) for obj in await self._select(batch))
+        except BaseException as e:
+            for (key, list_id), future in zip(keys, futures):
+                # A later load retries instead of seeing this failure
+                if self._futures.get(key, {}).get(list_id) is future:
+                    del self._futures[key][list_id]
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for (key, list_id), future in zip(keys, futures):
+            obj = found.get(key)
+            if obj is not None and list_id is not None and obj.list_id != list_id:
+                obj = None
+            if not future.done():
+                future.set_result(obj)
+        for obj in found.values():
+            self.prime(obj)
+
+
+def get_loader(db: AsyncSession, model: type[T]) -> Loader[T]:
+    """The session's loader for ``model``, created on first use."""
+    loaders = db.info.setdefault(_LOADERS, {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader = loaders[model] = Loader(db, model)
+    return loader
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_loaders(session: Session) -> None:
+    session.info.pop(_LOADERS, None)
@@ -1,23 +1,59 @@
 """Main FastAPI application."""
 import sys
 import asyncio
+from contextlib import asynccontextmanager
 
 # Fix for Windows asyncio event loop with psycopg
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.core import load_shedding, profiling
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded
+from app.core.metrics import registry
+from app.api.etag import item_etag
 from app.api.v1.main import router as v1_router
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.timing import TimingMiddleware
+from app.schemas.todo_item import TodoItemResponse
+from app.services import activity, broadcast, outbox, rate_limit
+from app.services.item_service import VersionConflict
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background components."""
+    profiling.start_sampler()
+    load_shedding.start_monitor()
+    rate_limit.start_limiter()
+    activity.start_writer()
+    broadcast.start_broadcaster()
+    outbox.start_relay([broadcast.deliver, activity.deliver])
+    yield
+    await outbox.stop_relay()
+    await broadcast.stop_broadcaster()
+    await activity.stop_writer()
+    await load_shedding.stop_monitor()
+    profiling.stop_sampler()
+
 
 app = FastAPI(
     title="SleekFlow Chatbot API",
     version="0.1.0",
-    description="FastAPI backend for SleekFlow Chatbot TODO application"
+    description="FastAPI backend for SleekFlow Chatbot TODO application",
+    lifespan=lifespan,
 )
 
+# Innermost: refuse low-priority requests while the pool or event loop is
+# overloaded (inside CORS, so browsers can read the 503)
+app.add_middleware(LoadSheddingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -25,12 +61,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Compress large JSON responses (outside CORS, which only touches headers)
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in per-request profiling (admin token) and continuous sampling
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost: per-route latency histograms and Server-Timing header
+app.add_middleware(TimingMiddleware)
+
 # Include API v1 router
 app.include_router(v1_router)
 
 
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    """Requests that ran out of time get 504, not a generic 500."""
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+
+
+@app.exception_handler(VersionConflict)
+async def version_conflict(request: Request, exc: VersionConflict):
+    """
+    Item changes that lost to a concurrent one get the item as it is now:
+    412 if the client sent If-Match, 409 if its unconditional change kept
+    losing races (it is otherwise re-applied, last writer wins).
+    """
+    item = exc.item
+    return JSONResponse(
+        status_code=412 if "if-match" in request.headers else 409,
+        content={
+            "detail": "Item was changed by someone else",
+            "item": TodoItemResponse.model_validate(item).model_dump(mode="json") if item else None,
+        },
+        headers={"ETag": item_etag(item)} if item else None,
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint for health check."""
@@ -41,3 +111,11 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
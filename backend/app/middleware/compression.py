@@ -0,0 +1,352 @@
+"""
+Response compression middleware.
+
+Compresses JSON and text responses with the best encoding the client
+accepts: zstd or brotli when their packages (``zstandard``, ``brotli``) are
+installed, otherwise gzip. Responses smaller than ``compression_min_size``
+go out as they are, since compressing them costs more than it saves.
+
+Complete bodies are compressed in one go, in a worker thread once they
+reach ``compression_offload_size``, and sent in ``compression_chunk_size``
+pieces. Compressed copies of bodies sent with an ETag are kept in a small
+per-worker cache keyed by a digest of the uncompressed body, so a
+representation many clients fetch (a popular list) is compressed once.
+Streamed responses are compressed as they stream, flushed every chunk.
+
+A strong ETag names the exact bytes sent, so a compressed response gets
+the encoding appended to it (``"item-5-3"`` goes out as ``"item-5-3-gzip"``);
+weak ETags are left alone. Either way ``Vary: Accept-Encoding`` is set.
+"""
+
+import asyncio
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson", "application/javascript")
+# Event streams must reach the client event by event
+UNBUFFERED_TYPES = ("text/event-stream",)
+
+compressed_total = registry.counter(
+    "http_responses_compressed_total",
+    "Responses compressed, by encoding and source (compressed, cached or streamed).",
+    ["encoding", "source"],
+)
+compressed_bytes_total = registry.counter(
+    "http_response_compression_bytes_total",
+    "Response bytes before (in) and after (out) compression, by encoding.",
+    ["encoding", "direction"],
+)
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._z = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        # Quality 5: most of brotli's gain at a fraction of its maximum cost
+        self._c = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+# Available encoders, best first
+ENCODERS: dict[str, Callable[[], object]] = {
+    name: encoder
+    for name, encoder, module in (
+        ("zstd", _Zstd, zstandard),
+        ("br", _Brotli, brotli),
+        ("gzip", _Gzip, zlib),
+    )
+    if module is not None
+}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The encoding to compress with for an Accept-Encoding header.
+
+    Returns:
+        The available encoding with the highest q-value (ties go to the
+        better encoder), or None if the client accepts none of them
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    """Compress a whole body."""
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(body) + encoder.finish()
+
+
+class CompressedCache:
+    """Compressed bodies by digest of the uncompressed body and encoding, least recently used dropped."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+
+    @staticmethod
+    def key(body: bytes, encoding: str) -> tuple[bytes, str]:
+        return hashlib.blake2b(body, digest_size=16).digest(), encoding
+
+    def get(self, key: tuple[bytes, str]) -> Optional[bytes]:
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self._entries.move_to_end(key)
+        return compressed
+
+    def put(self, key: tuple[bytes, str], compressed: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = compressed
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+cache = CompressedCache(settings.compression_cache_size)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    The ETag of a representation once compressed with ``encoding``.
+
+    Args:
+        etag: ETag of the uncompressed representation
+        encoding: Content-Encoding the body is sent with
+
+    Returns:
+        A strong ETag with the encoding appended, or a weak one unchanged
+    """
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _encode_headers(headers: MutableHeaders, encoding: str) -> None:
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    if "etag" in headers:
+        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+    content_type = headers.get("content-type", "")
+    if content_type.startswith(UNBUFFERED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing responses above a size threshold.
+
+    Args:
+        app: The wrapped application
+        min_size: Smallest body worth compressing (bytes)
+        chunk_size: Bytes per compressed message sent, and input compressed
+            between flushes of a streamed response
+        offload_size: Smallest body compressed in a worker thread rather
+            than on the event loop
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int = settings.compression_min_size,
+        chunk_size: int = settings.compression_chunk_size,
+        offload_size: int = settings.compression_offload_size,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.chunk_size = chunk_size
+        self.offload_size = offload_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, encoding, send).run(scope, receive)
+
+
+class _CompressedResponse:
+    """Send state of one response: passed through, buffered, or streaming compressed."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.eligible = False
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+        self.encoder = None
+        self.pending = 0
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.on_send)
+
+    async def on_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.eligible = message["status"] not in (204, 304) and _compressible(
+                Headers(raw=message["headers"])
+            )
+            if not self.eligible:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or not self.eligible:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            await self._stream(body, more_body)
+            return
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if not more_body:
+            await self._send_whole(b"".join(self.buffer))
+        elif self.buffered >= self.middleware.chunk_size:
+            # A large streamed response: compress it as it goes
+            body, self.buffer = b"".join(self.buffer), []
+            await self._start_stream()
+            await self._stream(body, more_body)
+
+    async def _send_whole(self, body: bytes) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        if len(body) < self.middleware.min_size:
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        key = CompressedCache.key(body, self.encoding) if "etag" in headers else None
+        compressed = cache.get(key) if key is not None else None
+        if compressed is not None:
+            compressed_total.inc(self.encoding, "cached")
+        else:
+            if len(body) >= self.middleware.offload_size:
+                compressed = await asyncio.to_thread(compress, self.encoding, body)
+            else:
+                compressed = compress(self.encoding, body)
+            if key is not None:
+                cache.put(key, compressed)
+            compressed_total.inc(self.encoding, "compressed")
+        compressed_bytes_total.inc(self.encoding, "in", amount=len(body))
+        compressed_bytes_total.inc(self.encoding, "out", amount=len(compressed))
+
+        _encode_headers(headers, self.encoding)
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(self.start)
+        chunk_size = self.middleware.chunk_size
+        for offset in range(0, len(compressed), chunk_size):
+            await self.send(
+                {
+                    "type": "http.response.body",
+                    "body": compressed[offset:offset + chunk_size],
+                    "more_body": offset + chunk_size < len(compressed),
+                }
+            )
+
+    async def _start_stream(self) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        _encode_headers(headers, self.encoding)
+        if "content-length" in headers:
+            del headers["content-length"]
+        self.encoder = ENCODERS[self.encoding]()
+        compressed_total.inc(self.encoding, "streamed")
+        await self.send(self.start)
+
+    async def _stream(self, body: bytes, more_body: bool) -> None:
+        encoder = self.encoder
+        if len(body) >= self.middleware.offload_size:
+            out = await asyncio.to_thread(encoder.compress, body)
+        else:
+            out = encoder.compress(body)
+        self.pending += len(body)
+        if not more_body:
+            out += encoder.finish()
+        elif self.pending >= self.middleware.chunk_size:
+            # Let the client have what has been produced so far
+            out += encoder.flush()
+            self.pending = 0
+        compressed_bytes_total.inc(self.encoding, "in", amount=len(body))
+        compressed_bytes_total.inc(self.encoding, "out", amount=len(out))
+        if out or not more_body:
+            await self.send({"type": "http.response.body", "body": out, "more_body": more_body})
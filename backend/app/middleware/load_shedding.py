@@ -0,0 +1,65 @@
+"""Load shedding middleware: refuses low-priority requests while overloaded."""
+
+import re
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.load_shedding import shedder
+from app.core.metrics import registry
+
+# Requests shed first, by name: whole-list reads and feed pages are the most
+# expensive to serve and the easiest for clients to retry. Mutations, auth,
+# delta syncs, event streams and WebSockets are never shed.
+LOW_PRIORITY: tuple[tuple[str, str, re.Pattern], ...] = (
+    ("lists", "GET", re.compile(r"/api/v1/lists")),
+    ("items", "GET", re.compile(r"/api/v1/lists/\d+/items")),
+    ("full_sync", "GET", re.compile(r"/api/v1/lists/\d+/items/changes")),
+    ("activity", "GET", re.compile(r"/api/v1/(lists/\d+/)?activity")),
+    ("export", "GET", re.compile(r"/api/v1/export")),
+)
+
+shed_total = registry.counter(
+    "requests_shed_total",
+    "Low-priority requests refused with 503 while overloaded, by signal and kind.",
+    ["signal", "kind"],
+)
+
+
+def low_priority_kind(scope: Scope) -> Optional[str]:
+    """The LOW_PRIORITY name of a request, or None if it must not be shed."""
+    method, path = scope["method"], scope["path"]
+    for name, pattern_method, pattern in LOW_PRIORITY:
+        if method == pattern_method and pattern.fullmatch(path):
+            # A sync with a token only reads what changed
+            if name == "full_sync" and b"since=" in scope.get("query_string", b""):
+                return None
+            return name
+    return None
+
+
+class LoadSheddingMiddleware:
+    """
+    Pure ASGI middleware answering low-priority requests with 503 and
+    Retry-After while ``app.core.load_shedding`` reports overload, so they
+    do not queue for the pool in front of work that matters more.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            kind = low_priority_kind(scope)
+            signal = shedder.overloaded_signal() if kind is not None else None
+            if signal is not None:
+                shed_total.inc(signal, kind)
+                response = JSONResponse(
+                    {"detail": "Server is overloaded, retry later"},
+                    status_code=503,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
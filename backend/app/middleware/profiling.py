@@ -0,0 +1,105 @@
+"""Opt-in request profiling middleware."""
+
+import cProfile
+import logging
+import time
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import profiling
+from app.core.config import settings
+from app.middleware.timing import route_template
+
+logger = logging.getLogger(__name__)
+
+# Requests under these prefixes are covered by the continuous sampler
+SAMPLED_PREFIXES = ("/api/v1/lists", "/api/v1/items")
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request when it carries a valid admin token.
+
+    The token (see ``app.core.profiling.sign_profile_token``) is accepted
+    from the ``X-Profile-Token`` header or the ``profile`` query parameter.
+    The request runs under cProfile and the result is written to
+    ``settings.profile_dir`` with route and user metadata; the response
+    carries the profile id in ``X-Profile-Id``.
+
+    cProfile observes the whole event-loop thread, so concurrent requests
+    show up in the profile too; profile on a quiet worker when possible.
+    Only one request is profiled at a time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampler = profiling.sampler
+        if sampler is not None and scope["path"].startswith(SAMPLED_PREFIXES):
+            sampler.active += 1
+            try:
+                await self._dispatch(scope, receive, send)
+            finally:
+                sampler.active -= 1
+        else:
+            await self._dispatch(scope, receive, send)
+
+    async def _dispatch(self, scope: Scope, receive: Receive, send: Send) -> None:
+        token = _profile_token(scope)
+        if token is None or self._busy or not profiling.verify_profile_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profiler = cProfile.Profile()
+        profile_id = profiling.new_profile_id(scope["method"], scope["path"])
+        started = time.time()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._busy = False
+            metadata = {
+                "method": scope["method"],
+                "route": route_template(scope),
+                "path": scope["path"],
+                "user_id": scope.get("state", {}).get("user_id"),
+                "started_at": started,
+                "duration_ms": round((time.time() - started) * 1000, 2),
+            }
+            try:
+                profiling.write_profile(
+                    profiler, Path(settings.profile_dir), profile_id, metadata
+                )
+                logger.info("Wrote request profile %s", profile_id)
+            except OSError:
+                logger.exception("Failed to write request profile")
+
+
+def _profile_token(scope: Scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile-token":
+            return value.decode("latin-1")
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        values = parse_qs(query.decode("latin-1")).get("profile")
+        if values:
+            return values[0]
+    return None
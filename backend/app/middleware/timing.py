@@ -0,0 +1,121 @@
+"""Request timing middleware: per-route latency histograms and Server-Timing."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+from app.core.timing import RequestTimings, current_timings
+from app.db.instrumentation import QueryStats, current_query_stats
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Phases reported separately from the overall request latency
+PHASES = ("auth", "db", "serialize")
+
+request_latency = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route"),
+)
+phase_latency = registry.histogram(
+    "http_request_phase_duration_seconds",
+    "Time spent per request phase (auth, db, serialize) by route template.",
+    ("method", "route", "phase"),
+)
+db_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request by route template.",
+    ("method", "route"),
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+duplicate_queries_total = registry.counter(
+    "http_request_duplicate_queries_total",
+    "Statements re-executed with identical parameters within one request.",
+    ("method", "route"),
+)
+requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Route template matched for this request (``/lists/{list_id}``), not the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template.
+
+    Adds a ``Server-Timing`` header with auth, DB and serialization time.
+    Auth and DB time are fed through ``app.core.timing`` by the auth
+    dependency and the engine hooks; serialization is the time between the
+    endpoint returning and the response starting. Statement counts come from
+    ``app.db.instrumentation``, which also flags duplicate and N+1 queries.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(time.perf_counter())
+        queries = QueryStats()
+        token = current_timings.set(timings)
+        queries_token = current_query_stats.set(queries)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                now = time.perf_counter()
+                if timings.endpoint_done is not None:
+                    timings.add("serialize", now - timings.endpoint_done)
+                headers = list(message.get("headers", []))
+                server_timing = _server_timing(timings, queries, now)
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - timings.start
+            current_timings.reset(token)
+            current_query_stats.reset(queries_token)
+            method = scope["method"]
+            route = route_template(scope)
+            request_latency.observe(elapsed, method, route)
+            for phase in PHASES:
+                seconds = timings.phases.get(phase)
+                if seconds is not None:
+                    phase_latency.observe(seconds, method, route, phase)
+            if queries.count:
+                db_queries.observe(queries.count, method, route)
+                duplicates = queries.duplicates()
+                if duplicates:
+                    duplicate_queries_total.inc(
+                        method, route, amount=sum(n - 1 for _, n in duplicates)
+                    )
+                queries.log_findings(f"{method} {route}")
+            requests_total.inc(method, route, str(status_code))
+
+
+def _server_timing(timings: RequestTimings, queries: QueryStats, now: float) -> str:
+    entries = []
+    for phase in PHASES:
+        if phase in timings.phases:
+            entry = f"{phase};dur={timings.phases[phase] * 1000:.2f}"
+            if phase == "db":
+                entry += f';desc="{queries.count} queries"'
+            entries.append(entry)
+    entries.append(f"app;dur={(now - timings.start) * 1000:.2f}")
+    return ", ".join(entries)
@@ -0,0 +1,36 @@
+"""Activity database model."""
+
+from sqlalchemy import BigInteger, Index, Integer
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class Activity(SQLModel, table=True):
+    """
+    Append-only record of who did what to which list or item.
+
+    On Postgres the table is range-partitioned by month on ``created_at``
+    (see the migration and ``app.services.activity``), so its primary key
+    there is ``(id, created_at)``.
+    """
+
+    __tablename__ = "activity"
+    __table_args__ = (
+        # Keyset pagination of the per-list and per-user feeds, newest first
+        Index("ix_activity_list_id_created_at_id", "list_id", "created_at", "id"),
+        Index("ix_activity_actor_id_created_at_id", "actor_id", "created_at", "id"),
+    )
+
+    id: Optional[int] = Field(
+        default=None,
+        primary_key=True,
+        # SQLite only autoincrements INTEGER PRIMARY KEY
+        sa_type=BigInteger().with_variant(Integer, "sqlite"),
+    )
+    list_id: int
+    item_id: Optional[int] = Field(default=None, nullable=True)
+    actor_id: str  # References BetterAuth user.id (text)
+    action: str = Field(max_length=32)  # Event type, e.g. item.created
+    detail: str = Field(default="{}")  # JSON object stored as string
+    created_at: datetime = Field(default_factory=datetime.utcnow)
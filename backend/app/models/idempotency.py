@@ -0,0 +1,24 @@
+"""IdempotencyKey database model."""
+
+from sqlalchemy import LargeBinary, SmallInteger
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    The outcome of a request sent with an Idempotency-Key header.
+
+    Keys and request fingerprints are stored as 16-byte digests so rows stay
+    small whatever clients send. A row without a status code is a claim by a
+    request still in flight.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id: bytes = Field(primary_key=True, sa_type=LargeBinary(16))  # Digest of user id and key
+    fingerprint: bytes = Field(sa_type=LargeBinary(16))  # Digest of method, path and body
+    status_code: Optional[int] = Field(default=None, nullable=True, sa_type=SmallInteger)
+    response: Optional[str] = Field(default=None, nullable=True)  # Response body (JSON)
+    expires_at: datetime = Field(index=True)
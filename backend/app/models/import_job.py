@@ -0,0 +1,29 @@
+"""ImportJob database model."""
+
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class ImportJob(SQLModel, table=True):
+    """
+    Progress and outcome of one bulk import of items into a list.
+
+    Updated in its own transactions while the import runs, so it can be
+    polled before the import's transaction commits.
+    """
+
+    __tablename__ = "import_jobs"
+
+    id: str = Field(primary_key=True, max_length=32)  # uuid4 hex
+    user_id: str = Field(index=True)  # References BetterAuth user.id (text)
+    list_id: int
+    format: str = Field(max_length=8)  # ndjson or csv
+    status: str = Field(default="running", max_length=16)  # running, completed or failed
+    rows_read: int = 0
+    rows_failed: int = 0
+    rows_imported: int = 0
+    errors: str = Field(default="[]")  # JSON array of row errors, the first import_max_errors
+    detail: Optional[str] = Field(default=None, nullable=True)  # Why a failed import failed
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None, nullable=True)
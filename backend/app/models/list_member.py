@@ -0,0 +1,42 @@
+"""ListMember database model."""
+
+from sqlalchemy import event, insert
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from enum import Enum
+
+from app.models.todo_list import TodoList
+
+
+class ListRole(str, Enum):
+    """What a member may do with a list."""
+
+    OWNER = "owner"  # Everything, including renaming, deleting and sharing
+    EDITOR = "editor"  # Read and change items
+    VIEWER = "viewer"  # Read only
+
+
+class ListMember(SQLModel, table=True):
+    """A user's role in a list; the list's owner is a member too."""
+
+    __tablename__ = "list_members"
+
+    # The primary key doubles as the (user_id, list_id) index behind every
+    # access check and the user's list overview
+    user_id: str = Field(primary_key=True)  # References BetterAuth user.id (text)
+    list_id: int = Field(primary_key=True, index=True)
+    role: str = Field(max_length=16)  # owner, editor, viewer
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+@event.listens_for(TodoList, "after_insert")
+def _add_owner_membership(mapper, connection, todo_list: TodoList) -> None:
+    """Make the owner of every new list its first member."""
+    connection.execute(
+        insert(ListMember.__table__).values(
+            user_id=todo_list.owner_id,
+            list_id=todo_list.id,
+            role=ListRole.OWNER.value,
+            created_at=todo_list.created_at,
+        )
+    )
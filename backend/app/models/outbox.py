@@ -0,0 +1,28 @@
+"""OutboxEvent database model."""
+
+from sqlalchemy import BigInteger, Integer
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    A domain event written in the same transaction as the change it
+    describes, kept until the outbox relay has delivered it.
+    """
+
+    __tablename__ = "outbox"
+
+    id: Optional[int] = Field(
+        default=None,
+        primary_key=True,
+        # SQLite only autoincrements INTEGER PRIMARY KEY
+        sa_type=BigInteger().with_variant(Integer, "sqlite"),
+    )
+    list_id: int
+    type: str = Field(max_length=32)  # Event type, e.g. item.created
+    actor_id: Optional[str] = Field(default=None, nullable=True)
+    payload: str  # Serialized TodoItemResponse or TodoListResponse (JSON)
+    attempts: int = Field(default=0)  # Failed deliveries so far
+    created_at: datetime = Field(default_factory=datetime.utcnow)
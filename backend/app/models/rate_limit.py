@@ -0,0 +1,20 @@
+"""RateLimitBucket database model."""
+
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class RateLimitBucket(SQLModel, table=True):
+    """
+    A token bucket shared by all workers, one per user and budget.
+
+    Only used by the Postgres rate limit backend, which creates the table
+    UNLOGGED: losing the buckets in a crash merely refills them.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: str = Field(primary_key=True)  # Budget and user id, e.g. write:<user id>
+    tokens: float  # Tokens left as of updated_at
+    granted: int = Field(default=0)  # Tokens handed to a worker by the last take
+    updated_at: datetime
@@ -1,5 +1,7 @@
 """TodoItem database model."""
 
+from sqlalchemy import BigInteger, Index, text
+from sqlalchemy.orm import declared_attr
 from sqlmodel import SQLModel, Field
 from datetime import datetime, date
 from typing import Optional, List
@@ -24,9 +26,28 @@ class TodoItemStatus(str, Enum):
 
 
 class TodoItem(SQLModel, table=True):
-    """TodoItem model for storing TODO items within lists."""
+    """
+    TodoItem model for storing TODO items within lists.
+
+    Large Postgres deployments may hash-partition the table by ``list_id``
+    (see ``ITEM_PARTITIONS`` and the partitioning migration), making its
+    primary key ``(id, list_id)`` there. The mapper identifies items by both
+    columns everywhere, so ORM updates and deletes name the partition key.
+    """
 
     __tablename__ = "todo_items"
+    __table_args__ = (
+        # Delta sync scans a list's items by modification time
+        Index("ix_todo_items_list_id_updated_at", "list_id", "updated_at"),
+        # List reads: a list's live items, oldest first
+        Index(
+            "ix_todo_items_live_list_id_created_at",
+            "list_id",
+            "created_at",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     list_id: int = Field(foreign_key="todo_lists.id", index=True)
@@ -44,6 +65,18 @@ class TodoItem(SQLModel, table=True):
         default=None, nullable=True
     )  # Soft delete support
     created_by: str = Field(index=True)  # References BetterAuth user.id (text)
+    # Incremented by every ORM update of the row, which is conditional on
+    # the version the row was read at (see item_service.VersionConflict)
+    version: int = Field(
+        default=0, sa_type=BigInteger, sa_column_kwargs={"server_default": "0"}
+    )
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {
+            "version_id_col": cls.__table__.c.version,
+            "primary_key": [cls.__table__.c.id, cls.__table__.c.list_id],
+        }
 
     def get_tags(self) -> List[str]:
         """Get tags as a list."""
@@ -55,3 +88,46 @@ class TodoItem(SQLModel, table=True):
     def set_tags(self, tags: List[str]):
         """Set tags from a list."""
         self.tags = json.dumps(tags)
+
+
+class ItemTombstone(SQLModel, table=True):
+    """Record of a permanently deleted item, kept so delta sync can report it."""
+
+    __tablename__ = "item_tombstones"
+    __table_args__ = (
+        Index("ix_item_tombstones_list_id_deleted_at", "list_id", "deleted_at"),
+    )
+
+    item_id: int = Field(primary_key=True)
+    list_id: int
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ArchivedItem(SQLModel, table=True):
+    """
+    A completed item moved out of ``todo_items`` once it went unchanged long
+    enough (see ``app.services.archive``); moved back when it is edited.
+
+    Has the same columns, and keeps the same id, as the item it was.
+    """
+
+    __tablename__ = "todo_items_archive"
+    __table_args__ = (
+        # Lists read with include_archived, oldest first
+        Index("ix_todo_items_archive_list_id_created_at", "list_id", "created_at"),
+    )
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    list_id: int = Field(foreign_key="todo_lists.id", ondelete="CASCADE")
+    text: str = Field(max_length=500)
+    description: Optional[str] = Field(default=None, max_length=2000)
+    tags: str = Field(default="[]")
+    status: str = Field(default="completed", max_length=50)
+    due_date: Optional[date] = Field(default=None, nullable=True)
+    priority: Optional[Priority] = Field(default=None, nullable=True)
+    created_at: datetime
+    updated_at: datetime
+    deleted_at: Optional[datetime] = Field(default=None, nullable=True)
+    created_by: str
+    version: int = Field(default=0, sa_type=BigInteger)
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
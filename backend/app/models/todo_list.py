@@ -1,4 +1,5 @@
 """TodoList database model."""
+from sqlalchemy import BigInteger
 from sqlmodel import SQLModel, Field
 from datetime import datetime
 from typing import Optional
@@ -14,3 +15,7 @@ class TodoList(SQLModel, table=True):
     owner_id: str = Field(index=True)  # References BetterAuth user.id (text)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Incremented by every list and item mutation (see bump_list_version)
+    version: int = Field(
+        default=0, sa_type=BigInteger, sa_column_kwargs={"server_default": "0"}
+    )
@@ -0,0 +1,35 @@
+"""Activity feed Pydantic schemas."""
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import json
+
+
+class ActivityResponse(BaseModel):
+    """Schema for one activity feed entry."""
+    id: int
+    list_id: int
+    item_id: Optional[int] = None
+    actor_id: str
+    action: str = Field(..., description="Event type, e.g. item.created or list.updated")
+    detail: Dict[str, Any] = Field(default_factory=dict, description="Snapshot of the item text and status, or the list name")
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+    @field_validator('detail', mode='before')
+    @classmethod
+    def parse_detail(cls, v):
+        if isinstance(v, str):
+            try:
+                return json.loads(v) if v else {}
+            except json.JSONDecodeError:
+                return {}
+        return v if isinstance(v, dict) else {}
+
+
+class ActivityPage(BaseModel):
+    """Schema for a page of activity, newest first."""
+    items: List[ActivityResponse] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="Pass as `before` to get the next page; null on the last page")
@@ -0,0 +1,39 @@
+"""ImportJob Pydantic schemas."""
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import List, Optional
+import json
+
+
+class ImportRowError(BaseModel):
+    """Schema for why one imported row was rejected."""
+    line: int = Field(..., description="Line of the file the row starts on")
+    errors: List[str] = Field(default_factory=list)
+
+
+class ImportJobResponse(BaseModel):
+    """Schema for the progress and outcome of an import."""
+    id: str
+    list_id: int
+    format: str
+    status: str = Field(..., description="running, completed or failed")
+    rows_read: int = 0
+    rows_failed: int = 0
+    rows_imported: int = 0
+    errors: List[ImportRowError] = Field(default_factory=list, description="Rejected rows, the first IMPORT_MAX_ERRORS of them")
+    detail: Optional[str] = Field(None, description="Why a failed import failed; none of its rows were imported")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+    @field_validator('errors', mode='before')
+    @classmethod
+    def parse_errors(cls, v):
+        if isinstance(v, str):
+            try:
+                return json.loads(v) if v else []
+            except json.JSONDecodeError:
+                return []
+        return v
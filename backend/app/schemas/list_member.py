@@ -0,0 +1,20 @@
+"""ListMember Pydantic schemas."""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Literal
+
+
+class ListMemberUpdate(BaseModel):
+    """Schema for sharing a list with a user or changing their role."""
+    role: Literal["editor", "viewer"] = Field(..., description="Role of the user in the list")
+
+
+class ListMemberResponse(BaseModel):
+    """Schema for list member response."""
+    list_id: int
+    user_id: str
+    role: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,68 @@
+"""Pydantic schemas for the list WebSocket mutation channel."""
+from datetime import date
+from typing import Annotated, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from app.schemas.todo_item import Priority, TodoItemResponse, TodoItemStatus
+
+
+class MutationOpBase(BaseModel):
+    """Fields shared by every mutation command."""
+    id: str = Field(..., min_length=1, max_length=64, description="Client-assigned op ID, echoed in the ack")
+    item_id: int
+    version: Optional[int] = Field(
+        None, description="Apply only if the item is still at this version; a conflict acks the current item"
+    )
+
+
+class ToggleOp(MutationOpBase):
+    """Toggle an item between completed and not started."""
+    op: Literal["toggle"]
+
+
+class EditOp(MutationOpBase):
+    """Edit an item; fields left out are unchanged, explicit nulls clear them."""
+    op: Literal["edit"]
+    text: str = Field(..., min_length=1, max_length=500)
+    description: Optional[str] = Field(None, max_length=2000)
+    tags: Optional[List[str]] = None
+    status: Optional[TodoItemStatus] = None
+    due_date: Optional[date] = None
+    priority: Optional[Priority] = None
+
+
+class DeleteOp(MutationOpBase):
+    """Soft-delete an item."""
+    op: Literal["delete"]
+
+
+class RestoreOp(MutationOpBase):
+    """Undo a recent delete."""
+    op: Literal["restore"]
+
+
+class ReorderOp(MutationOpBase):
+    """Move an item to a position in the list."""
+    op: Literal["reorder"]
+    position: int = Field(..., ge=0)
+
+
+MutationOp = Annotated[
+    Union[ToggleOp, EditOp, DeleteOp, RestoreOp, ReorderOp], Field(discriminator="op")
+]
+mutation_op_adapter = TypeAdapter(MutationOp)
+
+
+class MutationAck(BaseModel):
+    """Result of one mutation command."""
+    id: Optional[str] = None
+    ok: bool
+    item: Optional[TodoItemResponse] = None
+    error: Optional[str] = Field(
+        None,
+        description="not_found, forbidden, not_deleted, undo_timeout, conflict, invalid, unsupported, rate_limited or internal_error",
+    )
+    retry_after: Optional[float] = Field(
+        None, description="Seconds to wait before retrying a rate_limited command"
+    )
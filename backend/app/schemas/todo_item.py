@@ -44,6 +44,7 @@ class TodoItemResponse(BaseModel):
     updated_at: datetime
     deleted_at: Optional[datetime] = None
     created_by: str
+    version: int = Field(0, description="Incremented by every change to the item (see the ETag header)")
     
     class Config:
         from_attributes = True
@@ -57,3 +58,16 @@ class TodoItemResponse(BaseModel):
             except json.JSONDecodeError:
                 return []
         return v if isinstance(v, list) else []
+
+
+class ItemTombstoneResponse(BaseModel):
+    """Schema for an item deleted since a sync token."""
+    id: int
+    deleted_at: datetime
+
+
+class ItemChangesResponse(BaseModel):
+    """Schema for a delta sync response."""
+    items: List[TodoItemResponse] = Field(default_factory=list, description="Items created or changed since the token")
+    deleted: List[ItemTombstoneResponse] = Field(default_factory=list, description="Items deleted or archived since the token")
+    token: str = Field(..., description="Pass as `since` on the next sync")
@@ -15,6 +15,7 @@ class TodoListResponse(BaseModel):
     owner_id: str
     created_at: datetime
     updated_at: datetime
+    version: int = Field(0, description="Incremented by every change to the list or its items")
     
     class Config:
         from_attributes = True
@@ -0,0 +1,400 @@
+"""
+Activity feed: who did what to which list or item.
+
+Rows are built from the domain events the outbox relay delivers and handed
+to the worker's ``ActivityWriter``, which buffers them in a bounded queue
+and writes them with multi-row INSERTs, so neither mutations nor the relay
+wait on activity writes. If the buffer is full new rows are dropped and
+counted rather than holding up delivery.
+
+On Postgres the table is partitioned by month; ``ensure_partitions`` and
+``drop_partitions_before`` keep a window of partitions so old activity is
+removed with ``DROP TABLE`` instead of a bulk DELETE.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import insert, select, text, tuple_
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.activity import Activity
+from app.models.outbox import OutboxEvent
+from app.services import outbox
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions are named activity_yYYYYmMM
+PARTITION_NAME = re.compile(r"^activity_y(\d{4})m(\d{2})$")
+
+rows_written = registry.counter(
+    "activity_rows_written_total", "Activity rows inserted by the batch writer."
+)
+rows_dropped = registry.counter(
+    "activity_rows_dropped_total",
+    "Activity rows discarded because the writer queue was full or a batch failed.",
+    ["reason"],
+)
+batch_duration = registry.histogram(
+    "activity_batch_duration_seconds", "Time to insert one batch of activity rows."
+)
+queue_depth = registry.gauge(
+    "activity_queue_depth", "Activity rows waiting for the batch writer."
+)
+
+
+class InvalidActivityCursor(ValueError):
+    """Raised when a feed pagination cursor cannot be decoded."""
+
+
+class ActivityCursor(NamedTuple):
+    """Position in a feed: the last row seen, newest first."""
+
+    created_at: datetime
+    id: int
+
+
+def build_row(outbox_event: OutboxEvent) -> dict:
+    """Activity row for an event: list, item, a short snapshot and its time."""
+    data = outbox.payload(outbox_event)
+    if outbox_event.type.startswith("list."):
+        item_id, snapshot = None, {"name": data.get("name")}
+    elif outbox_event.type.startswith("member."):
+        item_id, snapshot = None, {"user_id": data.get("user_id"), "role": data.get("role")}
+    else:
+        item_id, snapshot = data["id"], {"text": data.get("text"), "status": data.get("status")}
+    return {
+        "list_id": outbox_event.list_id,
+        "item_id": item_id,
+        "actor_id": outbox_event.actor_id,
+        "action": outbox_event.type,
+        "detail": json.dumps(snapshot),
+        "created_at": outbox_event.created_at,
+    }
+
+
+async def deliver(db: AsyncSession, batch: list[OutboxEvent]) -> None:
+    """Outbox subscriber queueing an activity row for each event with an actor."""
+    if writer is not None:
+        writer.submit([build_row(e) for e in batch if e.actor_id is not None])
+
+
+class ActivityWriter:
+    """
+    Batches activity rows into multi-row INSERTs.
+
+    A batch is written when ``batch_size`` rows are waiting or
+    ``flush_ms`` after its first row arrived, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        batch_size: Optional[int] = None,
+        flush_ms: Optional[float] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size or settings.activity_batch_size
+        self.flush_seconds = (
+            settings.activity_flush_ms if flush_ms is None else flush_ms
+        ) / 1000
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(
+            queue_size or settings.activity_queue_size
+        )
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        # First row of the batch being gathered, already off the queue
+        self._head: Optional[dict] = None
+
+    def submit(self, rows: list[dict]) -> None:
+        """Queue rows without waiting; rows that do not fit are dropped."""
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                rows_dropped.inc("queue_full")
+        queue_depth.set(value=self._queue.qsize())
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer after writing everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._inflight is not None:
+            await self._inflight
+        if self._head is not None:
+            await self.flush([self._head] + self._take(self.batch_size - 1))
+            self._head = None
+        while not self._queue.empty():
+            await self.flush(self._take(self.batch_size))
+
+    async def _run(self) -> None:
+        while True:
+            self._head = await self._queue.get()
+            if self._queue.qsize() + 1 < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [self._head] + self._take(self.batch_size - 1)
+            self._head = None
+            # Shielded so stopping the writer never abandons a taken batch
+            self._inflight = asyncio.ensure_future(self.flush(batch))
+            await asyncio.shield(self._inflight)
+
+    def _take(self, limit: int) -> list[dict]:
+        rows = []
+        while len(rows) < limit and not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        if self._queue.qsize() < self.batch_size:
+            self._batch_ready.clear()
+        queue_depth.set(value=self._queue.qsize())
+        return rows
+
+    async def flush(self, rows: list[dict]) -> None:
+        """Insert ``rows`` in one statement; a failed batch is logged and dropped."""
+        if not rows:
+            return
+        start = time.perf_counter()
+        try:
+            async with self.session_maker() as session:
+                await session.execute(insert(Activity).values(rows))
+                await session.commit()
+        except Exception:
+            logger.exception(f"Failed to write {len(rows)} activity rows")
+            rows_dropped.inc("write_failed", amount=len(rows))
+            return
+        batch_duration.observe(time.perf_counter() - start)
+        rows_written.inc(amount=len(rows))
+
+
+writer: Optional[ActivityWriter] = None
+
+
+def start_writer() -> None:
+    """Start this worker's activity writer."""
+    global writer
+    from app.db.database import async_session_maker
+
+    writer = ActivityWriter(async_session_maker)
+    writer.start()
+
+
+async def stop_writer() -> None:
+    global writer
+    if writer is not None:
+        await writer.stop()
+        writer = None
+
+
+def encode_cursor(cursor: ActivityCursor) -> str:
+    """Opaque, URL-safe form of a feed cursor."""
+    payload = json.dumps([cursor.created_at.isoformat(), cursor.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> ActivityCursor:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        InvalidActivityCursor: If the cursor is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        cursor = ActivityCursor(datetime.fromisoformat(created_at), row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidActivityCursor(str(e)) from e
+    if not isinstance(cursor.id, int):
+        raise InvalidActivityCursor("cursor id is not an integer")
+    return cursor
+
+
+async def _get_page(
+    db: AsyncSession, condition, limit: int, before: Optional[ActivityCursor]
+) -> tuple[list[Activity], Optional[ActivityCursor]]:
+    query = select(Activity).where(condition)
+    if before is not None:
+        query = query.where(tuple_(Activity.created_at, Activity.id) < tuple(before))
+    result = await db.execute(
+        query.order_by(Activity.created_at.desc(), Activity.id.desc()).limit(limit + 1)
+    )
+    rows = list(result.scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], ActivityCursor(last.created_at, last.id)
+
+
+async def get_list_activity(
+    db: AsyncSession,
+    list_id: int,
+    limit: int = 50,
+    before: Optional[ActivityCursor] = None,
+) -> tuple[list[Activity], Optional[ActivityCursor]]:
+    """
+    Get a page of a list's activity, newest first.
+
+    Args:
+        db: Database session
+        list_id: ID of the list
+        limit: Maximum number of entries
+        before: Cursor returned with the previous page, or None for the first
+
+    Returns:
+        Tuple of (entries, cursor for the next page or None if this is the last)
+    """
+    return await _get_page(db, Activity.list_id == list_id, limit, before)
+
+
+async def get_user_activity(
+    db: AsyncSession,
+    actor_id: str,
+    limit: int = 50,
+    before: Optional[ActivityCursor] = None,
+) -> tuple[list[Activity], Optional[ActivityCursor]]:
+    """
+    Get a page of a user's own activity across lists, newest first.
+
+    Args:
+        db: Database session
+        actor_id: ID of the user
+        limit: Maximum number of entries
+        before: Cursor returned with the previous page, or None for the first
+
+    Returns:
+        Tuple of (entries, cursor for the next page or None if this is the last)
+    """
+    return await _get_page(db, Activity.actor_id == actor_id, limit, before)
+
+
+def _month_start(year: int, month: int) -> datetime:
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+
+async def _is_partitioned(db: AsyncSession) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    result = await db.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('activity')")
+    )
+    return bool(result.scalar())
+
+
+async def ensure_partitions(
+    db: AsyncSession, months_ahead: int = 2, now: Optional[datetime] = None
+) -> list[str]:
+    """
+    Create monthly partitions from the current month to ``months_ahead``.
+
+    Rows outside every monthly partition land in ``activity_default``, so
+    partitions must exist before their month starts. Does nothing unless
+    the table is partitioned (Postgres, created by the migration).
+
+    Args:
+        db: Database session
+        months_ahead: How many months after the current one to prepare
+        now: Reference time, defaults to the current UTC time
+
+    Returns:
+        Names of the partitions that were created
+    """
+    if not await _is_partitioned(db):
+        return []
+    now = now or datetime.now(timezone.utc)
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _month_start(now.year, now.month + offset)
+        end = _month_start(start.year, start.month + 1)
+        name = f"activity_y{start:%Y}m{start:%m}"
+        exists = await db.execute(text("SELECT to_regclass(:name)"), {"name": name})
+        if exists.scalar() is not None:
+            continue
+        await db.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF activity "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            )
+        )
+        created.append(name)
+    await db.commit()
+    return created
+
+
+async def drop_partitions_before(db: AsyncSession, cutoff: datetime) -> list[str]:
+    """
+    Drop monthly partitions whose whole month is older than ``cutoff``.
+
+    Args:
+        db: Database session
+        cutoff: Activity before this time may be discarded
+
+    Returns:
+        Names of the partitions that were dropped
+    """
+    if not await _is_partitioned(db):
+        return []
+    result = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'activity'::regclass"
+        )
+    )
+    cutoff = cutoff.replace(tzinfo=None)
+    dropped = []
+    for name in sorted(result.scalars()):
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        year, month = int(match.group(1)), int(match.group(2))
+        if _month_start(year, month + 1) <= cutoff:
+            await db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    await db.commit()
+    return dropped
+
+
+async def _maintain(retain_months: int, months_ahead: int) -> None:
+    from app.db.database import async_session_maker, engine
+
+    now = datetime.now(timezone.utc)
+    async with async_session_maker() as db:
+        for name in await ensure_partitions(db, months_ahead, now):
+            print(f"created {name}")
+        cutoff = _month_start(now.year, now.month - retain_months)
+        for name in await drop_partitions_before(db, cutoff):
+            print(f"dropped {name}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Partition maintenance, e.g. daily from cron:
+    # python -m app.services.activity --retain-months 12
+    parser = argparse.ArgumentParser(description="Maintain activity partitions")
+    parser.add_argument("--retain-months", type=int, default=12)
+    parser.add_argument("--months-ahead", type=int, default=2)
+    args = parser.parse_args()
+    if make_url(settings.database_url).get_backend_name() != "postgresql":
+        raise SystemExit("Activity partitions require Postgres")
+    asyncio.run(_maintain(args.retain_months, args.months_ahead))
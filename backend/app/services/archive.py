@@ -0,0 +1,203 @@
+"""
+Archival of old completed items.
+
+Completed items left unchanged for ``archive_after_days`` are rarely read
+but make ``todo_items`` and its indexes bigger for every list read.
+``archive_completed`` moves them, ``archive_batch_size`` rows per
+transaction, into ``todo_items_archive`` with the same ids and versions.
+Their lists' versions are bumped so cached item lists are refetched.
+
+Default list reads leave archived items out. With ``include_archived``
+they are read from both tables, and exports always include them. Editing
+an archived item first moves it back (``unarchive_item``), in the edit's
+transaction, so it is then edited like any other item.
+
+Run from cron, e.g. nightly, with a size report before and after:
+``python -m app.services.archive``.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.loader import get_loader
+from app.models.todo_item import ArchivedItem, TodoItem
+from app.models.todo_list import TodoList
+
+# Columns moved between the tables; the archive adds archived_at
+ITEM_COLUMNS = tuple(column.name for column in TodoItem.__table__.columns)
+
+archived_total = registry.counter(
+    "items_archived_total", "Completed items moved into todo_items_archive."
+)
+unarchived_total = registry.counter(
+    "items_unarchived_total", "Archived items moved back into todo_items to be edited."
+)
+
+
+class TableSize(NamedTuple):
+    """Row count and, on Postgres, on-disk size of a table."""
+
+    rows: int
+    table_bytes: Optional[int]  # Heap and TOAST
+    index_bytes: Optional[int]
+
+
+async def archive_completed(
+    db: AsyncSession, older_than: timedelta, batch_size: int, now: Optional[datetime] = None
+) -> int:
+    """
+    Move completed items not changed for ``older_than`` into the archive.
+
+    Each batch is one transaction, locking its rows (skipping ones locked
+    by a concurrent edit on Postgres) so no edit is lost.
+
+    Args:
+        db: Database session
+        older_than: How long an item must have been left unchanged
+        batch_size: Items moved per transaction
+        now: Current time, for tests
+
+    Returns:
+        Number of items archived
+    """
+    now = datetime.now(timezone.utc) if now is None else now
+    cutoff = now - older_than
+    columns = [TodoItem.__table__.c[name] for name in ITEM_COLUMNS]
+    archived = 0
+    while True:
+        result = await db.execute(
+            select(TodoItem.id, TodoItem.list_id)
+            .where(
+                TodoItem.status == "completed",
+                TodoItem.deleted_at.is_(None),
+                TodoItem.updated_at < cutoff,
+            )
+            .order_by(TodoItem.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.all()
+        if not rows:
+            return archived
+        ids = [row.id for row in rows]
+        list_ids = {row.list_id for row in rows}
+        # With the partition key, only the batch's partitions are scanned
+        batch = (TodoItem.list_id.in_(list_ids), TodoItem.id.in_(ids))
+        await db.execute(
+            insert(ArchivedItem).from_select(
+                [*ITEM_COLUMNS, "archived_at"],
+                select(*columns, literal(now, ArchivedItem.__table__.c.archived_at.type))
+                .where(*batch),
+            )
+        )
+        await db.execute(delete(TodoItem).where(*batch))
+        # The lists' item representations changed; their content did not
+        await db.execute(
+            update(TodoList).where(TodoList.id.in_(list_ids)).values(version=TodoList.version + 1)
+        )
+        await db.commit()
+        archived += len(ids)
+        archived_total.inc(amount=len(ids))
+        if len(ids) < batch_size:
+            return archived
+
+
+async def unarchive_item(db: AsyncSession, item_id: int, list_id: int) -> Optional[TodoItem]:
+    """
+    Move an archived item back into ``todo_items``, uncommitted.
+
+    Args:
+        db: Session of the transaction editing the item
+        item_id: ID of the item
+        list_id: ID of the list it was archived in
+
+    Returns:
+        The item, None if it is in neither table
+    """
+    archived = ArchivedItem.__table__.c
+    result = await db.execute(
+        delete(ArchivedItem)
+        .where(ArchivedItem.id == item_id)
+        .returning(*(archived[name] for name in ITEM_COLUMNS))
+    )
+    row = result.first()
+    loader = get_loader(db, TodoItem)
+    loader.forget(item_id)
+    if row is None:
+        # Another edit may have moved it back since it was found missing
+        return await loader.load(item_id, list_id)
+    await db.execute(insert(TodoItem.__table__).values(**row._mapping))
+    unarchived_total.inc()
+    result = await db.execute(
+        select(TodoItem).where(TodoItem.list_id == row.list_id, TodoItem.id == item_id)
+    )
+    item = result.scalar_one()
+    loader.prime(item)
+    return item
+
+
+async def table_sizes(db: AsyncSession) -> dict[str, TableSize]:
+    """Sizes of the live and archive item tables, for reporting."""
+    sizes = {}
+    postgres = db.get_bind().dialect.name == "postgresql"
+    for table in (TodoItem.__table__, ArchivedItem.__table__):
+        rows = (await db.execute(select(func.count()).select_from(table))).scalar_one()
+        table_bytes = index_bytes = None
+        if postgres:
+            table_bytes, index_bytes = (
+                await db.execute(
+                    text("SELECT pg_table_size(:name), pg_indexes_size(:name)"),
+                    {"name": table.name},
+                )
+            ).one()
+        sizes[table.name] = TableSize(rows, table_bytes, index_bytes)
+    return sizes
+
+
+def _mb(size: Optional[int]) -> str:
+    return "-" if size is None else f"{size / 2**20:,.1f}"
+
+
+def _report(title: str, sizes: dict[str, TableSize]) -> None:
+    print(title)
+    print(f"  {'table':<20} {'rows':>12} {'table MB':>10} {'index MB':>10}")
+    for name, size in sizes.items():
+        print(f"  {name:<20} {size.rows:>12,} {_mb(size.table_bytes):>10} {_mb(size.index_bytes):>10}")
+
+
+async def _archive(days: float, batch_size: int, report_only: bool, vacuum: bool) -> None:
+    from app.db.database import async_session_maker, engine
+
+    async with async_session_maker() as db:
+        _report("before", await table_sizes(db))
+        if report_only:
+            await engine.dispose()
+            return
+        archived = await archive_completed(db, timedelta(days=days), batch_size)
+        print(f"archived {archived} items")
+    if vacuum and engine.dialect.name == "postgresql":
+        # Lets new rows reuse the space and refreshes planner statistics
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"VACUUM (ANALYZE) {TodoItem.__tablename__}"))
+    async with async_session_maker() as db:
+        _report("after", await table_sizes(db))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Nightly from cron: python -m app.services.archive --vacuum
+    parser = argparse.ArgumentParser(description="Archive old completed items")
+    parser.add_argument("--days", type=float, default=settings.archive_after_days)
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    parser.add_argument("--report-only", action="store_true", help="Only report table sizes")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM todo_items afterwards (Postgres)")
+    args = parser.parse_args()
+    asyncio.run(_archive(args.days, args.batch_size, args.report_only, args.vacuum))
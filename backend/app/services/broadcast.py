@@ -0,0 +1,262 @@
+"""
+Cross-worker delivery of list events through Postgres LISTEN/NOTIFY.
+
+Events reach this module from the outbox relay (``deliver``), which sends
+them with ``pg_notify``; every worker (including the sender) receives them
+on one dedicated LISTEN connection and hands them to its local
+``EventHub``, dropping its cached roles for lists whose membership
+changed. Without Postgres (SQLite in tests and benchmarks) events go
+straight to the local hub.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.outbox import OutboxEvent
+from app.models.todo_item import TodoItem
+from app.schemas.todo_item import TodoItemResponse
+from app.services import events, membership, outbox
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "list_events"
+# NOTIFY payloads must be shorter than 8000 bytes; larger events are sent as
+# a reference to the item and re-read by the receiving worker
+MAX_PAYLOAD_BYTES = 7900
+# Event types where only the latest per item matters within a burst
+COALESCED_TYPES = frozenset({events.ITEM_UPDATED, events.ITEM_TOGGLED})
+
+notifications_sent = registry.counter(
+    "broadcast_notifications_sent_total",
+    "List event notifications sent with pg_notify.",
+    ["mode"],
+)
+notifications_received = registry.counter(
+    "broadcast_notifications_received_total",
+    "List event notifications received on the LISTEN connection.",
+)
+coalesced_total = registry.counter(
+    "broadcast_coalesced_total",
+    "Received notifications dropped as superseded within a burst.",
+)
+reconnects_total = registry.counter(
+    "broadcast_reconnects_total", "LISTEN connection re-establishments."
+)
+listener_connected = registry.gauge(
+    "broadcast_listener_connected", "1 while the LISTEN connection is up."
+)
+
+
+def encode_message(message: dict) -> str:
+    """JSON payload for pg_notify, replacing oversized item data by its id."""
+    payload = json.dumps(message, separators=(",", ":"))
+    if len(payload.encode()) <= MAX_PAYLOAD_BYTES:
+        notifications_sent.inc("inline")
+        return payload
+    notifications_sent.inc("reference")
+    return json.dumps(
+        {"list_id": message["list_id"], "type": message["type"], "ref": message["data"]["id"]},
+        separators=(",", ":"),
+    )
+
+
+def coalesce(messages: list[dict]) -> list[dict]:
+    """Drop updates to an item superseded by a later one of the same type."""
+    latest = {}
+    for index, message in enumerate(messages):
+        if message["type"] in COALESCED_TYPES:
+            latest[_coalesce_key(message)] = index
+    kept = [
+        message for index, message in enumerate(messages)
+        if message["type"] not in COALESCED_TYPES or latest[_coalesce_key(message)] == index
+    ]
+    coalesced_total.inc(amount=len(messages) - len(kept))
+    return kept
+
+
+def _coalesce_key(message: dict) -> tuple:
+    item_id = message["ref"] if "ref" in message else message["data"]["id"]
+    return message["list_id"], message["type"], item_id
+
+
+async def deliver(db: AsyncSession, batch: list[OutboxEvent]) -> None:
+    """
+    Outbox subscriber announcing events to every worker's hub.
+
+    On Postgres the notifications are sent with ``pg_notify`` in the relay's
+    transaction, so they go out exactly when the batch is marked delivered.
+    Elsewhere the events are published straight to the local hub.
+    """
+    messages = [
+        {"list_id": e.list_id, "type": e.type, "data": outbox.payload(e)} for e in batch
+    ]
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(
+            text(
+                "SELECT pg_notify(:channel, payload) "
+                "FROM unnest(CAST(:payloads AS text[])) AS payload"
+            ),
+            {"channel": CHANNEL, "payloads": [encode_message(m) for m in messages]},
+        )
+    else:
+        for message in messages:
+            events.publish(message["list_id"], message["type"], message["data"])
+
+
+class Broadcaster:
+    """
+    The worker's LISTEN connection.
+
+    Notifications are gathered for ``coalesce_ms`` after the first of a
+    burst, superseded updates are dropped, by-reference items are re-read in
+    one query, and the rest are published to the local hub. The connection
+    is pinged when idle and re-established with exponential backoff; after a
+    reconnect, subscribers get a reset event because notifications sent
+    while disconnected are lost.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        session_maker: async_sessionmaker,
+        hub: Optional[events.EventHub] = None,
+        coalesce_ms: Optional[float] = None,
+        ping_seconds: float = 30.0,
+    ):
+        self.conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self.session_maker = session_maker
+        self.hub = hub or events.hub
+        self.coalesce_seconds = (
+            settings.broadcast_coalesce_ms if coalesce_ms is None else coalesce_ms
+        ) / 1000
+        self.ping_seconds = ping_seconds
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.connected = asyncio.Event()
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._listen_forever()),
+            asyncio.create_task(self._dispatch_forever()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _listen_forever(self) -> None:
+        import psycopg
+
+        delay = 0.5
+        connected_before = False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.conninfo, autocommit=True, keepalives=1, keepalives_idle=30
+                ) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    self.connected.set()
+                    listener_connected.set(value=1)
+                    if connected_before:
+                        reconnects_total.inc()
+                        # Membership changes may have been missed as well
+                        membership.cache.clear()
+                        self.hub.reset_all()
+                    connected_before = True
+                    delay = 0.5
+                    while True:
+                        async for notify in conn.notifies(timeout=self.ping_seconds):
+                            self._queue.put_nowait(notify.payload)
+                        await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"LISTEN connection lost ({e}); retrying in {delay:.1f}s")
+            self.connected.clear()
+            listener_connected.set(value=0)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, 30.0)
+
+    async def _dispatch_forever(self) -> None:
+        while True:
+            payloads = [await self._queue.get()]
+            if self.coalesce_seconds:
+                await asyncio.sleep(self.coalesce_seconds)
+            while not self._queue.empty():
+                payloads.append(self._queue.get_nowait())
+            try:
+                await self.dispatch(payloads)
+            except Exception:
+                logger.exception(f"Failed to dispatch {len(payloads)} list events")
+
+    async def dispatch(self, payloads: list[str]) -> None:
+        """Publish a burst of received notifications to the local hub."""
+        notifications_received.inc(amount=len(payloads))
+        messages = []
+        for payload in payloads:
+            try:
+                messages.append(json.loads(payload))
+            except ValueError:
+                logger.warning(f"Ignoring malformed notification on {CHANNEL}")
+        messages = coalesce(messages)
+
+        for message in messages:
+            if message["type"] in membership.INVALIDATING_TYPES:
+                membership.cache.invalidate_list(message["list_id"])
+
+        refs = {message["ref"]: message["list_id"] for message in messages if "ref" in message}
+        items = await self._load_items(refs) if refs else {}
+        for message in messages:
+            if "ref" in message:
+                # Gone since (hard-deleted): send what is known
+                data = items.get(message["ref"]) or {"id": message["ref"]}
+            else:
+                data = message["data"]
+            self.hub.publish(message["list_id"], message["type"], data)
+
+    async def _load_items(self, refs: dict[int, int]) -> dict[int, dict]:
+        """Current representations of items, given the lists they are in by id."""
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(TodoItem).where(
+                    TodoItem.list_id.in_(set(refs.values())), TodoItem.id.in_(refs)
+                )
+            )
+            return {
+                item.id: TodoItemResponse.model_validate(item).model_dump(mode="json")
+                for item in result.scalars()
+            }
+
+
+broadcaster: Optional[Broadcaster] = None
+
+
+def start_broadcaster() -> None:
+    """Start this worker's LISTEN connection when running on Postgres."""
+    global broadcaster
+    if make_url(settings.database_url).get_backend_name() != "postgresql":
+        return
+    from app.db.database import async_session_maker
+
+    broadcaster = Broadcaster(settings.database_url, async_session_maker)
+    broadcaster.start()
+
+
+async def stop_broadcaster() -> None:
+    global broadcaster
+    if broadcaster is not None:
+        await broadcaster.stop()
+        broadcaster = None
@@ -0,0 +1,228 @@
+"""In-process fan-out of list change events to Server-Sent Events subscribers."""
+
+import asyncio
+import json
+import logging
+import secrets
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ITEM_CREATED = "item.created"
+ITEM_UPDATED = "item.updated"
+ITEM_TOGGLED = "item.toggled"
+ITEM_DELETED = "item.deleted"
+ITEM_RESTORED = "item.restored"
+LIST_CREATED = "list.created"
+LIST_UPDATED = "list.updated"
+LIST_DELETED = "list.deleted"
+MEMBER_ADDED = "member.added"
+MEMBER_UPDATED = "member.updated"
+MEMBER_REMOVED = "member.removed"
+# Sent when a client may have missed events and must refetch the list
+RESET = "reset"
+
+# Queue markers; compared by identity
+HEARTBEAT = object()
+EVICTED = object()
+
+subscribers_gauge = registry.gauge(
+    "sse_subscribers", "Open list event streams in this worker."
+)
+evictions_total = registry.counter(
+    "sse_evictions_total", "Event streams dropped because the client fell behind."
+)
+
+
+@dataclass(frozen=True)
+class ListEvent:
+    """One change to a list; ``seq`` increases monotonically per hub."""
+
+    seq: int
+    list_id: int
+    type: str
+    data: dict
+
+    def encode(self, epoch: str) -> str:
+        """Format as an SSE frame."""
+        return (
+            f"id: {epoch}-{self.seq}\nevent: {self.type}\n"
+            f"data: {json.dumps(self.data)}\n\n"
+        )
+
+
+class Subscription:
+    """A subscriber's bounded queue of pending events."""
+
+    __slots__ = ("list_id", "queue", "evicted")
+
+    def __init__(self, list_id: int, maxsize: int):
+        self.list_id = list_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.evicted = False
+
+
+class EventHub:
+    """
+    Fan-out of list events to subscribers in this worker.
+
+    Each subscriber has a bounded queue. Publishing never waits: a subscriber
+    whose queue is full is evicted and its stream ends, so the client
+    reconnects and resumes from ``Last-Event-ID``. Recent events are kept in
+    a ring buffer shared by all lists for that resume. Event ids are
+    ``<epoch>-<seq>`` with a random epoch per hub, so an id issued by another
+    worker or before a restart is recognised and answered with a reset. A
+    single task sends heartbeats to every subscriber, rather than one timer
+    per stream.
+    """
+
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        history_size: Optional[int] = None,
+        heartbeat_seconds: Optional[float] = None,
+    ):
+        self.queue_size = queue_size or settings.event_queue_size
+        self.heartbeat_seconds = heartbeat_seconds or settings.event_heartbeat_seconds
+        self.history: deque[ListEvent] = deque(
+            maxlen=history_size or settings.event_history_size
+        )
+        self.subscriptions: dict[int, set[Subscription]] = {}
+        self.epoch = secrets.token_hex(4)
+        self.last_seq = 0
+        self._count = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def publish(self, list_id: int, event_type: str, data: dict) -> ListEvent:
+        """Record an event and queue it for the list's subscribers."""
+        self.last_seq += 1
+        event = ListEvent(self.last_seq, list_id, event_type, data)
+        self.history.append(event)
+        for subscription in list(self.subscriptions.get(list_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._evict(subscription)
+        return event
+
+    def subscribe(self, list_id: int) -> Subscription:
+        subscription = Subscription(list_id, self.queue_size)
+        self.subscriptions.setdefault(list_id, set()).add(subscription)
+        self._count += 1
+        subscribers_gauge.set(value=self._count)
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.get_running_loop().create_task(
+                self._heartbeat()
+            )
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self.subscriptions.get(subscription.list_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self.subscriptions[subscription.list_id]
+        self._count -= 1
+        subscribers_gauge.set(value=self._count)
+
+    def reset_all(self) -> None:
+        """Tell every subscriber to refetch, e.g. after notifications were lost."""
+        for list_id in list(self.subscriptions):
+            self.publish(list_id, RESET, {})
+
+    def replay(self, list_id: int, last_event_id: str) -> Optional[list[ListEvent]]:
+        """
+        Events for ``list_id`` after ``last_event_id``.
+
+        Returns None when events may have been missed: the id was issued by
+        another hub, or the ring buffer no longer reaches back that far.
+        """
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.last_seq:
+            return None
+        last_seq = int(seq)
+        if self.history and self.history[0].seq > last_seq + 1:
+            return None
+        return [
+            event for event in self.history
+            if event.seq > last_seq and event.list_id == list_id
+        ]
+
+    def _evict(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        subscription.evicted = True
+        # Make room for the marker so the stream wakes up and ends
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(EVICTED)
+        evictions_total.inc()
+        logger.info(f"Evicted slow event subscriber on list {subscription.list_id}")
+
+    async def _heartbeat(self) -> None:
+        while self.subscriptions:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for subscriptions in list(self.subscriptions.values()):
+                for subscription in subscriptions:
+                    # A full queue has data to send anyway
+                    if not subscription.queue.full():
+                        subscription.queue.put_nowait(HEARTBEAT)
+
+    async def stream(
+        self, list_id: int, last_event_id: Optional[str] = None, user_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        SSE frames for ``list_id`` until the client disconnects or is evicted.
+
+        Subscribes before replaying, so nothing published in between is lost;
+        events already replayed are skipped when they arrive on the queue.
+        The stream also ends once the list is deleted or ``user_id``, whose
+        access was checked when it started, is removed from the list.
+        """
+        subscription = self.subscribe(list_id)
+        try:
+            yield f"retry: {settings.event_retry_ms}\n\n"
+            replayed = self.last_seq
+            if last_event_id is not None:
+                missed = self.replay(list_id, last_event_id)
+                if missed is None:
+                    # Client must refetch the list; carry on from now
+                    yield f"id: {self.epoch}-{replayed}\nevent: {RESET}\ndata: {{}}\n\n"
+                else:
+                    for event in missed:
+                        yield event.encode(self.epoch)
+            while True:
+                event = await subscription.queue.get()
+                if event is EVICTED:
+                    return
+                if event is HEARTBEAT:
+                    yield ": keep-alive\n\n"
+                elif event.seq > replayed or last_event_id is None:
+                    yield event.encode(self.epoch)
+                    if event.type == LIST_DELETED or _removes(event, user_id):
+                        return
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _removes(event: ListEvent, user_id: Optional[str]) -> bool:
+    """Whether ``event`` takes ``user_id``'s access to the list away."""
+    return (
+        user_id is not None
+        and event.type == MEMBER_REMOVED
+        and event.data.get("user_id") == user_id
+    )
+
+
+hub = EventHub()
+
+
+def publish(list_id: int, event_type: str, data: dict) -> None:
+    """Publish a list event to this worker's subscribers."""
+    hub.publish(list_id, event_type, data)
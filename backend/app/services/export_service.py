@@ -0,0 +1,151 @@
+"""
+Export of all the lists and items a user can read, as NDJSON or CSV.
+
+Rows are read through a server-side cursor ``batch_size`` at a time and
+encoded batch by batch, so memory stays flat however many items there
+are. The caller streams the chunks out; when the client reads slowly,
+sending blocks, the generator is not resumed and the cursor is not read
+any further.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import Select, select, union_all
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.list_member import ListMember
+from app.models.todo_item import ArchivedItem, TodoItem
+from app.models.todo_list import TodoList
+
+NDJSON = "ndjson"
+CSV = "csv"
+MEDIA_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+
+LIST_FIELDS = ("id", "name", "owner_id", "created_at", "updated_at", "version")
+ITEM_FIELDS = (
+    "id", "text", "description", "tags", "status", "due_date", "priority",
+    "created_at", "updated_at", "created_by", "version",
+)
+# One CSV row per item, carrying its list; lists without items get one row
+CSV_COLUMNS = ("list_id", "list_name") + tuple(f"item_{name}" for name in ITEM_FIELDS)
+
+
+def export_query(user_id: str) -> Select:
+    """Every list the user is a member of, each followed by its items, archived ones included."""
+    items = union_all(
+        *(
+            select(model.list_id, *(getattr(model, name) for name in ITEM_FIELDS))
+            .where(model.deleted_at.is_(None))
+            for model in (TodoItem, ArchivedItem)
+        )
+    ).subquery()
+    return (
+        select(
+            *(getattr(TodoList, name) for name in LIST_FIELDS),
+            *(items.c[name] for name in ITEM_FIELDS),
+        )
+        .join(ListMember, ListMember.list_id == TodoList.id)
+        .outerjoin(items, items.c.list_id == TodoList.id)
+        .where(ListMember.user_id == user_id)
+        .order_by(TodoList.id, items.c.id)
+    )
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return getattr(value, "value", value)  # Enums
+
+
+def _split(row: Row) -> tuple[dict, Optional[dict]]:
+    values = [_plain(value) for value in row]
+    todo_list = dict(zip(LIST_FIELDS, values[:len(LIST_FIELDS)]))
+    item = dict(zip(ITEM_FIELDS, values[len(LIST_FIELDS):]))
+    if item["id"] is None:
+        return todo_list, None
+    item["tags"] = json.loads(item["tags"]) if item["tags"] else []
+    return todo_list, item
+
+
+class _NdjsonEncoder:
+    """A ``{"type": "list", ...}`` line per list, then an ``{"type": "item", ...}`` line per item."""
+
+    def __init__(self) -> None:
+        self._list_id: Optional[int] = None
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence[Row]) -> bytes:
+        lines = []
+        for row in rows:
+            todo_list, item = _split(row)
+            if todo_list["id"] != self._list_id:
+                self._list_id = todo_list["id"]
+                lines.append(json.dumps({"type": "list", **todo_list}))
+            if item is not None:
+                lines.append(json.dumps({"type": "item", "list_id": self._list_id, **item}))
+        return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+class _CsvEncoder:
+    """One row per item (or per empty list) with the list's id and name."""
+
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _flush(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(CSV_COLUMNS)
+        return self._flush()
+
+    def encode(self, rows: Sequence[Row]) -> bytes:
+        for row in rows:
+            todo_list, item = _split(row)
+            if item is not None:
+                item["tags"] = json.dumps(item["tags"])
+                values = [item[name] for name in ITEM_FIELDS]
+            else:
+                values = [None] * len(ITEM_FIELDS)
+            self._writer.writerow([todo_list["id"], todo_list["name"], *values])
+        return self._flush()
+
+
+async def export_chunks(
+    db: AsyncSession, user_id: str, format: str, batch_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Encoded export of everything the user can read.
+
+    Args:
+        db: Database session, held until the export is done
+        user_id: ID of the user
+        format: NDJSON or CSV
+        batch_size: Rows fetched from the cursor, and encoded, at a time
+
+    Yields:
+        Chunks of the encoded export, one per batch of rows
+    """
+    encoder = _NdjsonEncoder() if format == NDJSON else _CsvEncoder()
+    header = encoder.header()
+    if header:
+        yield header
+    result = await db.stream(export_query(user_id).execution_options(yield_per=batch_size))
+    try:
+        async for rows in result.partitions():
+            chunk = encoder.encode(rows)
+            if chunk:
+                yield chunk
+    finally:
+        await result.close()
@@ -0,0 +1,263 @@
+"""
+Storage for Idempotency-Key requests.
+
+The first request with a key claims it by inserting an in-flight row, then
+stores its response on success or deletes the claim on failure. Duplicates
+find the row: a stored response is replayed, an in-flight claim is waited
+on. Claims hold for ``idempotency_lease_seconds`` so a request that dies
+mid-way does not block its key; responses are kept for
+``idempotency_ttl_seconds``. Expired rows are ignored by ``claim`` and
+deleted in batches by ``purge_expired``, run from cron.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Claims held by requests in this worker, set when they finish so local
+# duplicates wake at once instead of on their next poll
+_finished: dict[bytes, asyncio.Event] = {}
+
+
+class StoredRequest(NamedTuple):
+    """A key's row: an in-flight claim while status_code is None."""
+
+    fingerprint: bytes
+    status_code: Optional[int]
+    response: Optional[str]
+    expires_at: datetime
+
+
+def _digest(*parts: str) -> bytes:
+    return hashlib.sha256("\x00".join(parts).encode()).digest()[:16]
+
+
+def key_digest(user_id: str, key: str) -> bytes:
+    """Row id of a user's Idempotency-Key; keys are scoped to the user."""
+    return _digest(user_id, key)
+
+
+def fingerprint(method: str, path: str, body: str) -> bytes:
+    """Digest identifying a request, to tell a retry from a reused key."""
+    return _digest(method, path, body)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _get(db: AsyncSession, key_id: bytes) -> Optional[StoredRequest]:
+    result = await db.execute(
+        select(
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response,
+            IdempotencyKey.expires_at,
+        ).where(IdempotencyKey.id == key_id)
+    )
+    row = result.first()
+    return StoredRequest(*row) if row is not None else None
+
+
+async def claim(db: AsyncSession, key_id: bytes, request_fingerprint: bytes) -> Optional[StoredRequest]:
+    """
+    Claim a key for the current request.
+
+    Args:
+        db: Database session
+        key_id: Result of ``key_digest``
+        request_fingerprint: Result of ``fingerprint``
+
+    Returns:
+        None if the current request now holds the key, otherwise the row of
+        the request that does or did
+    """
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    while True:
+        now = _now()
+        claimed = {
+            "fingerprint": request_fingerprint,
+            "status_code": None,
+            "response": None,
+            "expires_at": now + timedelta(seconds=settings.idempotency_lease_seconds),
+        }
+        result = await db.execute(
+            insert(IdempotencyKey)
+            .values(id=key_id, **claimed)
+            .on_conflict_do_nothing()
+            .returning(IdempotencyKey.id)
+        )
+        if result.first() is None:
+            existing = await _get(db, key_id)
+            if existing is None:
+                # Released or purged since the insert; try again
+                await db.commit()
+                continue
+            if existing.expires_at > now:
+                await db.commit()
+                return existing
+            # Expired but not yet purged: take it over unless another request just did
+            result = await db.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.id == key_id,
+                    IdempotencyKey.expires_at == existing.expires_at,
+                )
+                .values(**claimed)
+                .returning(IdempotencyKey.id)
+            )
+            if result.first() is None:
+                await db.commit()
+                continue
+        await db.commit()
+        _finished[key_id] = asyncio.Event()
+        return None
+
+
+async def wait(db: AsyncSession, key_id: bytes, timeout: float) -> Optional[StoredRequest]:
+    """
+    Wait for the request holding a key to finish.
+
+    Duplicates in the same worker are woken when it does; others poll, with
+    the session's transaction ended between polls so no connection is held.
+
+    Args:
+        db: Database session
+        key_id: Result of ``key_digest``
+        timeout: Longest time to wait (seconds)
+
+    Returns:
+        The row, still in flight if the timeout ran out, or None if the
+        request failed and released the key
+    """
+    give_up = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        existing = await _get(db, key_id)
+        await db.commit()
+        if existing is None or existing.status_code is not None:
+            return existing
+        left = give_up - time.monotonic()
+        if left <= 0:
+            return existing
+        finished = _finished.get(key_id)
+        if finished is not None:
+            try:
+                await asyncio.wait_for(finished.wait(), min(delay, left))
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(min(delay, left))
+        delay = min(delay * 2, 0.5)
+
+
+async def complete(
+    db: AsyncSession,
+    key_id: bytes,
+    request_fingerprint: bytes,
+    status_code: int,
+    response: str,
+) -> None:
+    """
+    Store the response of the request holding a key, for replay until the TTL.
+
+    A failure is logged rather than raised: the request itself succeeded,
+    and its claim expires after the lease.
+    """
+    try:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.id == key_id,
+                IdempotencyKey.fingerprint == request_fingerprint,
+                IdempotencyKey.status_code.is_(None),
+            )
+            .values(
+                status_code=status_code,
+                response=response,
+                expires_at=_now() + timedelta(seconds=settings.idempotency_ttl_seconds),
+            )
+        )
+        await db.commit()
+    except Exception:
+        logger.exception("Could not store idempotent response")
+        await db.rollback()
+    finally:
+        _wake(key_id)
+
+
+async def release(db: AsyncSession, key_id: bytes) -> None:
+    """Give up a failed request's claim so a retry runs the request again."""
+    try:
+        await db.rollback()
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.id == key_id, IdempotencyKey.status_code.is_(None)
+            )
+        )
+        await db.commit()
+    except Exception:
+        logger.exception("Could not release idempotency key")
+        await db.rollback()
+    finally:
+        _wake(key_id)
+
+
+def _wake(key_id: bytes) -> None:
+    finished = _finished.pop(key_id, None)
+    if finished is not None:
+        finished.set()
+
+
+async def purge_expired(
+    db: AsyncSession, batch_size: int, now: Optional[datetime] = None
+) -> int:
+    """
+    Delete expired keys, ``batch_size`` rows per statement and transaction.
+
+    Returns:
+        Number of keys deleted
+    """
+    now = _now() if now is None else now
+    purged = 0
+    while True:
+        expired = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= now)
+            .limit(batch_size)
+        )
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+        await db.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+async def _purge(batch_size: int) -> None:
+    from app.db.database import async_session_maker, engine
+
+    async with async_session_maker() as db:
+        print(f"purged {await purge_expired(db, batch_size)} idempotency keys")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Expired key cleanup, e.g. hourly from cron:
+    # python -m app.services.idempotency
+    parser = argparse.ArgumentParser(description="Purge expired idempotency keys")
+    parser.add_argument("--batch-size", type=int, default=settings.idempotency_purge_batch_size)
+    args = parser.parse_args()
+    asyncio.run(_purge(args.batch_size))
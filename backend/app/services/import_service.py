@@ -0,0 +1,387 @@
+"""
+Bulk import of items into a list from NDJSON or CSV.
+
+The upload is parsed as it arrives and each row is checked against the
+``TodoItemCreate`` rules on its own. Valid rows are collected
+``import_batch_size`` at a time into a temporary staging table, through
+COPY on Postgres. Once the upload ends they are merged into
+``todo_items`` in the same transaction, so an import adds all of its valid
+rows or none. At most one batch of rows is held in memory. Progress and
+rejected rows are recorded on an ``ImportJob`` in separate short
+transactions, so the job can be polled while the import runs.
+"""
+
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Union
+
+from pydantic import ValidationError
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    cast,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import registry
+from app.models.import_job import ImportJob
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+from app.schemas.todo_item import TodoItemCreate
+from app.services import events, outbox
+from app.services.list_service import bump_list_version
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# A row of the upload: the line it starts on and its fields, or why it
+# could not be read
+ParsedRow = tuple[int, Union[dict, str]]
+
+STAGED_COLUMNS = ("line", "text", "description", "tags", "status", "due_date", "priority")
+
+# Private to the importing connection; priority holds the enum member name
+staging = Table(
+    "import_staging",
+    MetaData(),
+    Column("line", Integer),
+    Column("text", String),
+    Column("description", String),
+    Column("tags", String),
+    Column("status", String),
+    Column("due_date", Date),
+    Column("priority", String),
+    prefixes=["TEMPORARY"],
+)
+
+import_rows_total = registry.counter(
+    "import_rows_total",
+    "Rows read by bulk imports, by result (imported or failed).",
+    ["result"],
+)
+
+
+class RecordTooLong(ValueError):
+    """A CSV record ran past the length limit, so the rest of the upload cannot be read."""
+
+    def __init__(self, line: int, max_length: int):
+        super().__init__(f"Line {line}: record longer than {max_length} characters")
+
+
+async def _lines(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[Optional[str]]:
+    """
+    Decode UTF-8 (with or without a BOM) and split it into lines as it arrives.
+
+    A line longer than ``max_length`` characters comes out as None, and only
+    as much of it as one chunk is held while it is skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    # The start of the line the next chunk continues, in pieces
+    pending: list[str] = []
+    size = 0
+    async for chunk in chunks:
+        *lines, tail = decoder.decode(chunk).split("\n")
+        if lines:
+            lines[0] = "".join(pending) + lines[0] if size <= max_length else None
+            pending, size = [], 0
+            for line in lines:
+                yield None if line is None or len(line) > max_length else line.rstrip("\r")
+        if size <= max_length:
+            pending.append(tail)
+        size += len(tail)
+    tail = decoder.decode(b"", final=True)
+    size += len(tail)
+    if size > max_length:
+        yield None
+    elif size:
+        yield ("".join(pending) + tail).rstrip("\r")
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[ParsedRow]:
+    number = 0
+    async for line in _lines(chunks, max_length):
+        number += 1
+        if line is None:
+            yield number, f"Line longer than {max_length} characters"
+            continue
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            yield number, "Invalid JSON"
+            continue
+        if not isinstance(fields, dict):
+            yield number, "Expected a JSON object"
+            continue
+        # Lines of an export: list lines are skipped, item lines imported
+        if fields.pop("type", "item") == "list":
+            continue
+        yield number, fields
+
+
+def _csv_column(name: str) -> str:
+    name = name.strip().lower()
+    # Accept the columns of an export as well
+    return name[len("item_"):] if name.startswith("item_") else name
+
+
+def _csv_tags(value: str) -> list:
+    if value.startswith("["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[ParsedRow]:
+    header: Optional[list[str]] = None
+    record: list[str] = []
+    quotes = size = 0
+    start = number = 0
+    async for line in _lines(chunks, max_length):
+        number += 1
+        if not record:
+            start, size = number, 0
+        # Where the next record starts is unknown past an over-long one
+        if line is None or size + len(line) > max_length:
+            raise RecordTooLong(start, max_length)
+        record.append(line)
+        size += len(line) + 1
+        # A record ends on a line that leaves no quoted field open
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text, record, quotes = "\n".join(record), [], 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [_csv_column(value) for value in values]
+            continue
+        fields = {name: value for name, value in zip(header, values) if value != ""}
+        if "tags" in fields:
+            fields["tags"] = _csv_tags(fields["tags"])
+        yield start, fields
+    if record:
+        yield start, "Unterminated quoted field"
+
+
+def parse_rows(
+    chunks: AsyncIterator[bytes], format: str, max_length: int
+) -> AsyncIterator[ParsedRow]:
+    """
+    Rows of an NDJSON or CSV upload, read as it arrives.
+
+    CSV needs a header row naming the ``TodoItemCreate`` fields (an
+    export's ``item_`` prefixed columns work too); tags are a JSON array or
+    comma separated. NDJSON lines are objects of those fields; ``"type":
+    "list"`` lines, as in an export, are skipped.
+
+    NDJSON lines longer than ``max_length`` are rejected rows. A CSV record
+    that long fails the import instead, as a quote left open by mistake
+    would otherwise hold the rest of the upload in memory.
+
+    Args:
+        chunks: The request body
+        format: NDJSON or CSV
+        max_length: Characters allowed in an NDJSON line or a CSV record
+
+    Returns:
+        Line numbers with the fields of the row starting there, or a
+        message if it could not be read
+
+    Raises:
+        UnicodeDecodeError: If the upload is not UTF-8, once iterated
+        RecordTooLong: If a CSV record is longer than ``max_length``, once
+            iterated
+    """
+    if format == NDJSON:
+        return _ndjson_rows(chunks, max_length)
+    return _csv_rows(chunks, max_length)
+
+
+def validate_row(fields: dict) -> Union[TodoItemCreate, list[str]]:
+    """The row as a TodoItemCreate, or what is wrong with it."""
+    try:
+        return TodoItemCreate.model_validate(fields)
+    except ValidationError as e:
+        return [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            if error["loc"] else error["msg"]
+            for error in e.errors()
+        ]
+
+
+def _staged(line: int, item: TodoItemCreate) -> tuple:
+    return (
+        line,
+        item.text,
+        item.description,
+        json.dumps(item.tags) if item.tags else "[]",
+        item.status,
+        item.due_date,
+        item.priority.name if item.priority else None,
+    )
+
+
+async def _stage(db: AsyncSession, batch: list[tuple]) -> None:
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        raw = (await conn.get_raw_connection()).driver_connection
+        async with raw.cursor() as cursor:
+            async with cursor.copy(
+                f"COPY {staging.name} ({', '.join(STAGED_COLUMNS)}) FROM STDIN"
+            ) as copy:
+                for row in batch:
+                    await copy.write_row(row)
+    else:
+        await conn.execute(insert(staging), [dict(zip(STAGED_COLUMNS, row)) for row in batch])
+
+
+async def _merge(db: AsyncSession, list_id: int, user_id: str) -> int:
+    """Insert the staged rows into the list in upload order; returns how many."""
+    now = datetime.now(timezone.utc)
+    columns = TodoItem.__table__.c
+    rows = select(
+        literal(list_id, Integer),
+        staging.c.text,
+        staging.c.description,
+        staging.c.tags,
+        staging.c.status,
+        staging.c.due_date,
+        cast(staging.c.priority, columns.priority.type),
+        literal(now, DateTime),
+        literal(now, DateTime),
+        literal(user_id, String),
+        # As for items created one by one
+        literal(1, Integer),
+    ).order_by(staging.c.line)
+    # psycopg reports no rowcount for INSERT ... SELECT
+    staged = (await db.execute(select(func.count()).select_from(staging))).scalar_one()
+    await db.execute(
+        insert(TodoItem).from_select(
+            [
+                "list_id", "text", "description", "tags", "status", "due_date", "priority",
+                "created_at", "updated_at", "created_by", "version",
+            ],
+            rows,
+        )
+    )
+    return staged
+
+
+async def create_job(
+    session_maker: async_sessionmaker, user_id: str, list_id: int, format: str
+) -> ImportJob:
+    """Record a new running import."""
+    async with session_maker() as session:
+        job = ImportJob(id=uuid.uuid4().hex, user_id=user_id, list_id=list_id, format=format)
+        session.add(job)
+        await session.commit()
+        return job
+
+
+async def get_job(db: AsyncSession, job_id: str, user_id: str) -> Optional[ImportJob]:
+    """The user's import job, None if there is no such job of theirs."""
+    job = await db.get(ImportJob, job_id, populate_existing=True)
+    return job if job is not None and job.user_id == user_id else None
+
+
+async def _save_job(session_maker: async_sessionmaker, job_id: str, **values) -> None:
+    async with session_maker() as session:
+        await session.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+        await session.commit()
+
+
+async def run_import(
+    db: AsyncSession,
+    session_maker: async_sessionmaker,
+    job: ImportJob,
+    rows: AsyncIterator[ParsedRow],
+    batch_size: int,
+    max_errors: int,
+) -> None:
+    """
+    Import the valid rows into the job's list in one transaction.
+
+    Args:
+        db: Session the import's transaction runs in
+        session_maker: Opens the short sessions progress is saved in
+        job: The running job (see ``create_job``)
+        rows: Parsed rows of the upload (see ``parse_rows``)
+        batch_size: Rows staged, and progress saved, at a time
+        max_errors: Rejected rows listed on the job; later ones are only counted
+
+    Raises:
+        Whatever reading the upload or the database raised; the job is then
+        failed and nothing is imported
+    """
+    errors: list[dict] = []
+    read = failed = 0
+    batch: list[tuple] = []
+    try:
+        conn = await db.connection()
+        await conn.run_sync(staging.drop, checkfirst=True)
+        await conn.run_sync(staging.create)
+        async for line, fields in rows:
+            read += 1
+            result = validate_row(fields) if isinstance(fields, dict) else [fields]
+            if isinstance(result, list):
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"line": line, "errors": result})
+                continue
+            batch.append(_staged(line, result))
+            if len(batch) >= batch_size:
+                await _stage(db, batch)
+                batch = []
+                await _save_job(
+                    session_maker, job.id,
+                    rows_read=read, rows_failed=failed, errors=json.dumps(errors),
+                )
+        if batch:
+            await _stage(db, batch)
+
+        imported = await _merge(db, job.list_id, job.user_id)
+        await conn.run_sync(staging.drop)
+        if imported:
+            # One change for the whole import rather than an event per item
+            await bump_list_version(db, job.list_id)
+            todo_list = await db.get(TodoList, job.list_id, populate_existing=True)
+            outbox.add(db, events.LIST_UPDATED, todo_list, job.user_id)
+        await db.commit()
+    except BaseException as e:
+        await db.rollback()
+        await _save_job(
+            session_maker, job.id,
+            status=FAILED, rows_read=read, rows_failed=failed, errors=json.dumps(errors),
+            detail=str(e) or type(e).__name__, finished_at=datetime.now(timezone.utc),
+        )
+        raise
+
+    import_rows_total.inc("imported", amount=imported)
+    import_rows_total.inc("failed", amount=failed)
+    await _save_job(
+        session_maker, job.id,
+        status=COMPLETED, rows_read=read, rows_failed=failed, rows_imported=imported,
+        errors=json.dumps(errors), finished_at=datetime.now(timezone.utc),
+    )
@@ -1,22 +1,78 @@
 """TodoItem service logic."""
 
+import heapq
 import logging
-from typing import cast
+from typing import Callable, Container, cast
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 from sqlmodel import SQLModel
 from datetime import timezone, datetime, date
 import json
 
-from app.models.todo_item import TodoItem
-from app.models.todo_list import TodoList
+from app.db.loader import get_loader
+from app.models.todo_item import ArchivedItem, ItemTombstone, TodoItem
+from app.services import archive, events, membership, outbox, policy
+from app.services.list_service import bump_list_version
 
 logger = logging.getLogger(__name__)
 
 # Sentinel value to distinguish between "not provided" and "explicitly set to None"
 UNSET = object()
 
+# Tries of a change sent without If-Match that keeps losing to concurrent ones
+SAVE_ATTEMPTS = 3
+
+
+class VersionConflict(Exception):
+    """
+    An item changed since the version a mutation was based on.
+
+    Carries the item as it is now (None if it has since been permanently
+    deleted) so the client can merge without fetching it again.
+    """
+
+    def __init__(self, item: TodoItem | None):
+        super().__init__("Item was changed concurrently")
+        self.item = item
+
+
+def _check_version(item: TodoItem, if_match: Container[int] | None) -> None:
+    """Raise VersionConflict unless the item is at one of the expected versions."""
+    if if_match is not None and item.version not in if_match:
+        raise VersionConflict(item)
+
+
+def _seconds_since(moment: datetime) -> float:
+    """Seconds since ``moment``; naive values, as read back from the database, are UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - moment).total_seconds()
+
+
+async def _save(db: AsyncSession, item: TodoItem, event_type: str, user_id: str) -> None:
+    """
+    Commit a change to an item along with its list version bump and event.
+
+    The item's UPDATE is conditional on the version it was read at, so no
+    other writer can have committed in between: if one did, the UPDATE
+    matches no row and nothing is written.
+
+    Raises:
+        VersionConflict: With the item as the other writer left it
+    """
+    item_id, list_id = item.id, item.list_id
+    try:
+        db.add(item)
+        await bump_list_version(db, item.list_id)
+        outbox.add(db, event_type, item, user_id)
+        await db.commit()
+    except StaleDataError:
+        # Expires the item, which the next lookup reads afresh
+        await db.rollback()
+        raise VersionConflict(await get_item(db, item_id, list_id=list_id))
+
 
 async def create_item(
     db: AsyncSession,
@@ -56,6 +112,8 @@ async def create_item(
         )
 
         db.add(new_item)
+        await bump_list_version(db, new_item.list_id)
+        outbox.add(db, events.ITEM_CREATED, new_item, created_by)
         await db.commit()
         await db.refresh(new_item)
 
@@ -69,7 +127,9 @@ async def create_item(
         raise
 
 
-async def get_items_by_list(db: AsyncSession, list_id: int) -> list[TodoItem]:
+async def get_items_by_list(
+    db: AsyncSession, list_id: int, include_archived: bool = False
+) -> list[TodoItem | ArchivedItem]:
     """
     Get all items for a specific list, ordered by creation date (oldest first).
     Excludes soft-deleted items.
@@ -77,9 +137,10 @@ async def get_items_by_list(db: AsyncSession, list_id: int) -> list[TodoItem]:
     Args:
         db: Database session
         list_id: ID of the list
+        include_archived: Also return items moved to the archive
 
     Returns:
-        List of TodoItem objects
+        List of TodoItem objects, and ArchivedItem objects if asked for
     """
     from sqlalchemy import and_
 
@@ -88,22 +149,146 @@ async def get_items_by_list(db: AsyncSession, list_id: int) -> list[TodoItem]:
         .where(and_(TodoItem.list_id == list_id, TodoItem.deleted_at.is_(None)))
         .order_by(TodoItem.created_at.asc())
     )
-    return list(result.scalars().all())
+    items = list(result.scalars().all())
+    if not include_archived:
+        return items
+    result = await db.execute(
+        select(ArchivedItem)
+        .where(and_(ArchivedItem.list_id == list_id, ArchivedItem.deleted_at.is_(None)))
+        .order_by(ArchivedItem.created_at.asc())
+    )
+    return list(heapq.merge(items, result.scalars().all(), key=lambda item: item.created_at))
 
 
-async def get_item(db: AsyncSession, item_id: int) -> TodoItem | None:
+async def get_item(
+    db: AsyncSession,
+    item_id: int,
+    include_archived: bool = False,
+    list_id: int | None = None,
+) -> TodoItem | ArchivedItem | None:
     """
     Get a single item by ID.
 
+    Lookups are shared by everything using the session, so the item is read
+    at most once per request and concurrent lookups go out as one query.
+    Callers that know the item's list pass it: the lookup then filters on
+    the partition key of a partitioned ``todo_items``, and only finds the
+    item in that list.
+
     Args:
         db: Database session
         item_id: ID of the item to retrieve
+        include_archived: Also look in the archive
+        list_id: ID of the list the item must be in
 
     Returns:
-        TodoItem object if found, None otherwise
+        TodoItem object if found (or ArchivedItem, if asked for), None otherwise
+    """
+    item = await get_loader(db, TodoItem).load(item_id, list_id)
+    if item is None and include_archived:
+        item = await db.get(ArchivedItem, item_id)
+        if item is not None and list_id is not None and item.list_id != list_id:
+            return None
+    return item
+
+
+async def _get_for_edit(
+    db: AsyncSession,
+    item_id: int,
+    user_id: str,
+    action: str,
+    if_match: Container[int] | None,
+    list_id: int | None,
+) -> tuple[TodoItem | None, str | None]:
     """
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    return result.scalars().first()
+    Get an item the user may change, at a version the client allows.
+
+    An archived item is checked as it is in the archive and only then
+    moved back into ``todo_items``, in the edit's own transaction, so a
+    refused or stale edit leaves it archived.
+
+    Returns:
+        Tuple of (item, None) or (None, "not_found" or "forbidden")
+
+    Raises:
+        VersionConflict: If the item is at another version than if_match
+    """
+    item = await get_item(db, item_id, include_archived=True, list_id=list_id)
+    if not item:
+        return None, "not_found"
+
+    # Check the user's role in the list permits it for this item
+    if await membership.check_access(
+        db, item.list_id, user_id, action, policy.item_resource(item)
+    ):
+        return None, "forbidden"
+    _check_version(item, if_match)
+
+    if isinstance(item, ArchivedItem):
+        archived = item
+        item = await archive.unarchive_item(db, item_id, archived.list_id)
+        # Its row is gone from the archive now
+        db.expunge(archived)
+        if item is None:
+            return None, "not_found"
+        if item.version != archived.version:
+            # Another edit moved it back and changed it first: check that
+            return await _get_for_edit(db, item_id, user_id, action, if_match, list_id)
+    return item, None
+
+
+async def _edit(
+    db: AsyncSession,
+    item_id: int,
+    user_id: str,
+    action: str,
+    event_type: str,
+    change: Callable[[TodoItem], str | None],
+    if_match: Container[int] | None,
+    list_id: int | None,
+) -> tuple[TodoItem | None, str | None]:
+    """
+    Apply a change to an item the user may make, and save it.
+
+    Without If-Match, changes are last-writer-wins: if another writer
+    commits first, the item is read again and the change re-applied to it,
+    from the access check on, up to ``SAVE_ATTEMPTS`` times.
+
+    Args:
+        db: Database session
+        item_id: ID of the item to change
+        user_id: ID of the user making the change
+        action: Policy action the change needs
+        event_type: Event recorded with the change
+        change: Changes the item in place, or returns why it cannot
+        if_match: Versions the client's copy may be at; None for any version
+        list_id: ID of the list the item is in, if known; its lookups then
+            filter on it
+
+    Returns:
+        Tuple of (changed item, None) or (None, "not_found", "forbidden" or
+        the error ``change`` returned)
+
+    Raises:
+        VersionConflict: If the item is at another version than if_match or,
+            with if_match, another writer changes it first; without, if
+            other writers won every attempt
+    """
+    for attempt in range(1, SAVE_ATTEMPTS + 1):
+        item, error = await _get_for_edit(db, item_id, user_id, action, if_match, list_id)
+        if item is None:
+            return None, error
+
+        error = change(item)
+        if error is not None:
+            return None, error
+        try:
+            await _save(db, item, event_type, user_id)
+        except VersionConflict:
+            if if_match is not None or attempt == SAVE_ATTEMPTS:
+                raise
+            continue
+        return item, None
 
 
 async def update_item(
@@ -116,6 +301,8 @@ async def update_item(
     status=UNSET,
     due_date=UNSET,
     priority=UNSET,
+    if_match: Container[int] | None = None,
+    list_id: int | None = None,
 ) -> TodoItem | None:
     """
     Update a TODO item's text.
@@ -130,58 +317,54 @@ async def update_item(
         status: Optional status (use None to clear)
         due_date: Optional due date (use None to clear)
         priority: Optional priority (use None to clear)
+        if_match: Versions the client's copy may be at; None to update any version
+        list_id: ID of the list the item is in, if known
 
     Returns:
         Updated TodoItem object if successful, None otherwise
-    """
-    # Get the item
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
-
-    if not item:
-        return None
-
-    # Check if user has permission (owner only for now - Epic 4 will add sharing)
-    list_result = await db.execute(select(TodoList).where(TodoList.id == item.list_id))
-    todo_list = list_result.scalars().first()
 
-    if not todo_list:
-        return None
-
-    if todo_list.owner_id != user_id:
-        return None
-
-    # Update the text and timestamp
-    item.text = new_text
-    logger.info(
-        f"update_item_text called with: description={description}, tags={tags}, status={status}, due_date={due_date}, priority={priority}, UNSET={UNSET}"
+    Raises:
+        VersionConflict: If the item is at another version than if_match,
+            or another writer changes it first while if_match is given
+    """
+    def change(item: TodoItem) -> None:
+        # Update the text and timestamp
+        item.text = new_text
+        logger.info(
+            f"update_item_text called with: description={description}, tags={tags}, status={status}, due_date={due_date}, priority={priority}, UNSET={UNSET}"
+        )
+        logger.info(f"description is UNSET: {description is UNSET}")
+        logger.info(f"due_date is UNSET: {due_date is UNSET}")
+        logger.info(f"priority is UNSET: {priority is UNSET}")
+        if description is not UNSET:
+            item.description = description if description else None
+        if tags is not UNSET:
+            item.tags = json.dumps(tags) if tags else "[]"
+        if status is not UNSET:
+            item.status = status
+        if due_date is not UNSET:
+            logger.info(f"Setting due_date to: {due_date} (type: {type(due_date)})")
+            item.due_date = due_date
+        if priority is not UNSET:
+            logger.info(f"Setting priority to: {priority} (type: {type(priority)})")
+            item.priority = priority
+        item.updated_at = datetime.now(timezone.utc)
+
+    item, _ = await _edit(
+        db, item_id, user_id, policy.ITEM_UPDATE, events.ITEM_UPDATED, change, if_match, list_id
     )
-    logger.info(f"description is UNSET: {description is UNSET}")
-    logger.info(f"due_date is UNSET: {due_date is UNSET}")
-    logger.info(f"priority is UNSET: {priority is UNSET}")
-    if description is not UNSET:
-        item.description = description if description else None
-    if tags is not UNSET:
-        item.tags = json.dumps(tags) if tags else "[]"
-    if status is not UNSET:
-        item.status = status
-    if due_date is not UNSET:
-        logger.info(f"Setting due_date to: {due_date} (type: {type(due_date)})")
-        item.due_date = due_date
-    if priority is not UNSET:
-        logger.info(f"Setting priority to: {priority} (type: {type(priority)})")
-        item.priority = priority
-    item.updated_at = datetime.now(timezone.utc)
-
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
+    if item is not None:
+        await db.refresh(item)
 
     return item
 
 
 async def toggle_item_completion(
-    db: AsyncSession, item_id: int, user_id: str
+    db: AsyncSession,
+    item_id: int,
+    user_id: str,
+    if_match: Container[int] | None = None,
+    list_id: int | None = None,
 ) -> tuple[TodoItem | None, str | None]:
     """
     Toggle a TODO item's completion status.
@@ -190,40 +373,39 @@ async def toggle_item_completion(
         db: Database session
         item_id: ID of the item to toggle
         user_id: ID of the user making the update
+        if_match: Versions the client's copy may be at; None for any version
+        list_id: ID of the list the item is in, if known
 
     Returns:
         Tuple of (Updated TodoItem object if successful, None if error, error message or None)
-    """
-    # Get the item
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
-
-    if not item:
-        return None, "not_found"
-
-    # Check if user has permission (owner only for now - Epic 4 will add sharing)
-    list_result = await db.execute(select(TodoList).where(TodoList.id == item.list_id))
-    todo_list = list_result.scalars().first()
 
-    if not todo_list or todo_list.owner_id != user_id:
-        return None, "forbidden"
-
-    # Toggle completion status
-    if item.status == "completed":
-        item.status = "not_started"
-    else:
-        item.status = "completed"
-    item.updated_at = datetime.now(timezone.utc)
+    Raises:
+        VersionConflict: If the item is at another version than if_match,
+            or another writer changes it first while if_match is given
+    """
+    def change(item: TodoItem) -> None:
+        # Toggle completion status
+        if item.status == "completed":
+            item.status = "not_started"
+        else:
+            item.status = "completed"
+        item.updated_at = datetime.now(timezone.utc)
+
+    item, error = await _edit(
+        db, item_id, user_id, policy.ITEM_TOGGLE, events.ITEM_TOGGLED, change, if_match, list_id
+    )
+    if item is not None:
+        await db.refresh(item)
 
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
-
-    return item, None
+    return item, error
 
 
 async def delete_item(
-    db: AsyncSession, item_id: int, user_id: str
+    db: AsyncSession,
+    item_id: int,
+    user_id: str,
+    if_match: Container[int] | None = None,
+    list_id: int | None = None,
 ) -> tuple[bool, str | None]:
     """
     Delete a TODO item (soft delete for undo support).
@@ -232,35 +414,35 @@ async def delete_item(
         db: Database session
         item_id: ID of the item to delete
         user_id: ID of the user making the request
+        if_match: Versions the client's copy may be at; None for any version
+        list_id: ID of the list the item is in, if known
 
     Returns:
         Tuple of (success: bool, error: str or None)
-    """
-    # Get the item
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
-
-    if not item:
-        return False, "not_found"
-
-    # Check if user has permission (owner only for now - Epic 4 will add sharing)
-    list_result = await db.execute(select(TodoList).where(TodoList.id == item.list_id))
-    todo_list = list_result.scalars().first()
-
-    if not todo_list or todo_list.owner_id != user_id:
-        return False, "forbidden"
 
-    # Soft delete: mark as deleted and store deleted_at timestamp
-    item.deleted_at = datetime.now(timezone.utc)
-
-    db.add(item)
-    await db.commit()
+    Raises:
+        VersionConflict: If the item is at another version than if_match,
+            or another writer changes it first while if_match is given
+    """
+    def change(item: TodoItem) -> None:
+        # Soft delete: mark as deleted and store deleted_at timestamp; bumping
+        # updated_at lets delta sync pick the deletion up
+        item.deleted_at = datetime.now(timezone.utc)
+        item.updated_at = item.deleted_at
+
+    item, error = await _edit(
+        db, item_id, user_id, policy.ITEM_DELETE, events.ITEM_DELETED, change, if_match, list_id
+    )
 
-    return True, None
+    return item is not None, error
 
 
 async def restore_item(
-    db: AsyncSession, item_id: int, user_id: str
+    db: AsyncSession,
+    item_id: int,
+    user_id: str,
+    if_match: Container[int] | None = None,
+    list_id: int | None = None,
 ) -> tuple[TodoItem | None, str | None]:
     """
     Restore a recently deleted TODO item.
@@ -269,77 +451,85 @@ async def restore_item(
         db: Database session
         item_id: ID of the item to restore
         user_id: ID of the user making the request
+        if_match: Versions the client's copy may be at; None for any version
+        list_id: ID of the list the item is in, if known
 
     Returns:
         Tuple of (Restored TodoItem object if successful, None if error, error message or None)
-    """
-    # Get the item
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
-
-    if not item:
-        return None, "not_found"
-
-    # Check if user has permission (owner only for now - Epic 4 will add sharing)
-    list_result = await db.execute(select(TodoList).where(TodoList.id == item.list_id))
-    todo_list = list_result.scalars().first()
-
-    if not todo_list or todo_list.owner_id != user_id:
-        return None, "forbidden"
-
-    # Check if item was actually deleted (has deleted_at timestamp within 5 seconds)
-    if not item.deleted_at:
-        return None, "not_deleted"
-
-    # Check if deletion is still within the undo window (5 seconds)
-    time_since_deletion = (datetime.now(timezone.utc) - item.deleted_at).total_seconds()
-    if time_since_deletion > 5:
-        return None, "undo_timeout"
 
-    # Restore: clear the deleted_at timestamp
-    item.deleted_at = None
-    item.updated_at = datetime.now(timezone.utc)
+    Raises:
+        VersionConflict: If the item is at another version than if_match,
+            or another writer changes it first while if_match is given
+    """
+    def change(item: TodoItem) -> str | None:
+        # Check if item was actually deleted (has deleted_at timestamp within 5 seconds)
+        if not item.deleted_at:
+            return "not_deleted"
+
+        # Check if deletion is still within the undo window (5 seconds)
+        if _seconds_since(item.deleted_at) > 5:
+            return "undo_timeout"
+
+        # Restore: clear the deleted_at timestamp
+        item.deleted_at = None
+        item.updated_at = datetime.now(timezone.utc)
+        return None
 
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
+    item, error = await _edit(
+        db, item_id, user_id, policy.ITEM_RESTORE, events.ITEM_RESTORED, change, if_match, list_id
+    )
+    if item is not None:
+        await db.refresh(item)
 
-    return item, None
+    return item, error
 
 
-async def permanently_delete_item(db: AsyncSession, item_id: int) -> bool:
+async def permanently_delete_item(
+    db: AsyncSession, item_id: int, list_id: int | None = None
+) -> bool:
     """
     Permanently delete items that have been soft-deleted for more than 5 seconds.
 
     Args:
         db: Database session
         item_id: ID of the item to permanently delete
+        list_id: ID of the list the item is in, if known
 
     Returns:
         True if deleted, False if not found
     """
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
+    item = await get_item(db, item_id, list_id=list_id)
 
     if not item:
         return False
 
     # Check if deletion window has passed (more than 5 seconds)
     if item.deleted_at:
-        time_since_deletion = (
-            datetime.now(timezone.utc) - item.deleted_at
-        ).total_seconds()
-        if time_since_deletion > 5:
-            # Hard delete
+        if _seconds_since(item.deleted_at) > 5:
+            # Hard delete, leaving a tombstone for clients syncing the list
+            db.add(
+                ItemTombstone(
+                    item_id=item.id,
+                    list_id=item.list_id,
+                    deleted_at=datetime.now(timezone.utc),
+                )
+            )
             await db.delete(item)
+            await bump_list_version(db, item.list_id)
             await db.commit()
+            get_loader(db, TodoItem).forget(item.id)
             return True
 
     return False
 
 
 async def set_item_due_date(
-    db: AsyncSession, item_id: int, due_date, user_id: str
+    db: AsyncSession,
+    item_id: int,
+    due_date,
+    user_id: str,
+    if_match: Container[int] | None = None,
+    list_id: int | None = None,
 ) -> tuple[TodoItem | None, str | None]:
     """
     Set or clear a TODO item's due date.
@@ -349,37 +539,37 @@ async def set_item_due_date(
         item_id: ID of the item to update
         due_date: New due date (date object or None to clear)
         user_id: ID of the user making the request
+        if_match: Versions the client's copy may be at; None for any version
+        list_id: ID of the list the item is in, if known
 
     Returns:
         Tuple of (Updated TodoItem object if successful, None if error, error message or None)
-    """
-    # Get the item
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
-
-    if not item:
-        return None, "not_found"
 
-    # Check if user has permission (owner only for now - Epic 4 will add sharing)
-    list_result = await db.execute(select(TodoList).where(TodoList.id == item.list_id))
-    todo_list = list_result.scalars().first()
-
-    if not todo_list or todo_list.owner_id != user_id:
-        return None, "forbidden"
-
-    # Set or clear the due date
-    item.due_date = due_date
-    item.updated_at = datetime.now(timezone.utc)
+    Raises:
+        VersionConflict: If the item is at another version than if_match,
+            or another writer changes it first while if_match is given
+    """
+    def change(item: TodoItem) -> None:
+        # Set or clear the due date
+        item.due_date = due_date
+        item.updated_at = datetime.now(timezone.utc)
 
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
+    item, error = await _edit(
+        db, item_id, user_id, policy.ITEM_UPDATE, events.ITEM_UPDATED, change, if_match, list_id
+    )
+    if item is not None:
+        await db.refresh(item)
 
-    return item, None
+    return item, error
 
 
 async def set_item_priority(
-    db: AsyncSession, item_id: int, priority, user_id: str
+    db: AsyncSession,
+    item_id: int,
+    priority,
+    user_id: str,
+    if_match: Container[int] | None = None,
+    list_id: int | None = None,
 ) -> tuple[TodoItem | None, str | None]:
     """
     Set or clear a TODO item's priority.
@@ -389,30 +579,25 @@ async def set_item_priority(
         item_id: ID of the item to update
         priority: New priority (Priority enum or None to clear)
         user_id: ID of the user making the request
+        if_match: Versions the client's copy may be at; None for any version
+        list_id: ID of the list the item is in, if known
 
     Returns:
         Tuple of (Updated TodoItem object if successful, None if error, error message or None)
-    """
-    # Get the item
-    result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
-    item = result.scalars().first()
 
-    if not item:
-        return None, "not_found"
-
-    # Check if user has permission (owner only for now - Epic 4 will add sharing)
-    list_result = await db.execute(select(TodoList).where(TodoList.id == item.list_id))
-    todo_list = list_result.scalars().first()
-
-    if not todo_list or todo_list.owner_id != user_id:
-        return None, "forbidden"
-
-    # Set or clear the priority
-    item.priority = priority
-    item.updated_at = datetime.now(timezone.utc)
+    Raises:
+        VersionConflict: If the item is at another version than if_match,
+            or another writer changes it first while if_match is given
+    """
+    def change(item: TodoItem) -> None:
+        # Set or clear the priority
+        item.priority = priority
+        item.updated_at = datetime.now(timezone.utc)
 
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
+    item, error = await _edit(
+        db, item_id, user_id, policy.ITEM_UPDATE, events.ITEM_UPDATED, change, if_match, list_id
+    )
+    if item is not None:
+        await db.refresh(item)
 
-    return item, None
+    return item, error
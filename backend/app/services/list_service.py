@@ -1,11 +1,14 @@
 """TodoList service logic."""
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel
 from datetime import timezone, datetime
 
+from app.db.loader import get_loader
+from app.models.list_member import ListMember
 from app.models.todo_list import TodoList
+from app.services import events, membership, outbox, policy
 
 
 async def create_list(db: AsyncSession, name: str, owner_id: str) -> TodoList:
@@ -28,114 +31,134 @@ async def create_list(db: AsyncSession, name: str, owner_id: str) -> TodoList:
     )
 
     db.add(new_list)
+    outbox.add(db, events.LIST_CREATED, new_list, owner_id)
     await db.commit()
     await db.refresh(new_list)
 
     return new_list
 
 
-async def get_user_lists(db: AsyncSession, owner_id: str) -> list[TodoList]:
+async def bump_list_version(db: AsyncSession, list_id: int) -> int | None:
     """
-    Get all lists for a specific user, ordered by most recently updated first.
+    Increment a list's version and touch its updated_at.
+
+    The increment happens in a single UPDATE, so concurrent mutations
+    serialize on the list row and each transaction gets its own version.
+    Call it in the same transaction as the change it records.
 
     Args:
         db: Database session
-        owner_id: ID of the user
+        list_id: ID of the list
+
+    Returns:
+        The new version, or None if the list does not exist
+    """
+    result = await db.execute(
+        update(TodoList)
+        .where(TodoList.id == list_id)
+        .values(version=TodoList.version + 1, updated_at=datetime.now(timezone.utc))
+        .returning(TodoList.version)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_user_lists(db: AsyncSession, user_id: str) -> list[TodoList]:
+    """
+    Get all lists a user owns or is a member of, ordered by most recently
+    updated first.
+
+    Args:
+        db: Database session
+        user_id: ID of the user
 
     Returns:
         List of TodoList objects
     """
     result = await db.execute(
         select(TodoList)
-        .where(TodoList.owner_id == owner_id)
+        .join(ListMember, ListMember.list_id == TodoList.id)
+        .where(ListMember.user_id == user_id)
         .order_by(TodoList.updated_at.desc())
     )
     return list(result.scalars().all())
 
 
-async def get_list(db: AsyncSession, list_id: int, owner_id: str) -> TodoList | None:
+async def get_list(db: AsyncSession, list_id: int, user_id: str) -> TodoList | None:
     """
-    Get a single list by ID, verifying ownership.
+    Get a single list by ID, verifying the user may read it.
 
     Args:
         db: Database session
         list_id: ID of the list to retrieve
-        owner_id: ID of the user (for ownership check)
+        user_id: ID of the user (for the access check)
 
     Returns:
-        TodoList object if found and owned by user, None otherwise
+        TodoList object if found and readable by the user, None otherwise
     """
-    result = await db.execute(
-        select(TodoList).where(
-            TodoList.id == list_id,
-            TodoList.owner_id == owner_id
-        )
-    )
-    return result.scalars().first()
+    if await membership.check_access(db, list_id, user_id, policy.LIST_READ):
+        return None
+    return await get_loader(db, TodoList).load(list_id)
 
 
 async def update_list_name(
     db: AsyncSession, 
     list_id: int, 
-    owner_id: str, 
+    user_id: str, 
     new_name: str
 ) -> TodoList | None:
     """
-    Update a list's name, verifying ownership.
+    Update a list's name, verifying the user may edit it.
 
     Args:
         db: Database session
         list_id: ID of the list to update
-        owner_id: ID of the user (for ownership check)
+        user_id: ID of the user (owner or editor)
         new_name: New name for the list
 
     Returns:
-        Updated TodoList object if found and owned by user, None otherwise
+        Updated TodoList object if found and editable by the user, None otherwise
     """
-    result = await db.execute(
-        select(TodoList).where(
-            TodoList.id == list_id,
-            TodoList.owner_id == owner_id
-        )
-    )
-    list_obj = result.scalars().first()
-    
+    if await membership.check_access(db, list_id, user_id, policy.LIST_UPDATE):
+        return None
+
+    list_obj = await get_loader(db, TodoList).load(list_id)
     if not list_obj:
         return None
     
-    # Update name and timestamp
+    # Update name, timestamp and version in one statement
     list_obj.name = new_name
     list_obj.updated_at = datetime.now(timezone.utc)
+    list_obj.version = TodoList.version + 1
     
     db.add(list_obj)
+    outbox.add(db, events.LIST_UPDATED, list_obj, user_id)
     await db.commit()
     await db.refresh(list_obj)
     return list_obj
 
 
-async def delete_list(db: AsyncSession, list_id: int, owner_id: str) -> bool:
+async def delete_list(db: AsyncSession, list_id: int, user_id: str) -> bool:
     """
-    Delete a list, verifying ownership.
+    Delete a list and its memberships, verifying ownership.
 
     Args:
         db: Database session
         list_id: ID of the list to delete
-        owner_id: ID of the user (for ownership check)
+        user_id: ID of the user (must own the list)
 
     Returns:
         True if list was deleted, False if not found or not owner
     """
-    result = await db.execute(
-        select(TodoList).where(
-            TodoList.id == list_id,
-            TodoList.owner_id == owner_id
-        )
-    )
-    list_obj = result.scalars().first()
-    
+    if await membership.check_access(db, list_id, user_id, policy.LIST_DELETE):
+        return False
+
+    list_obj = await get_loader(db, TodoList).load(list_id)
     if not list_obj:
         return False
     
+    await membership.remove_all_members(db, list_id)
     await db.delete(list_obj)
+    outbox.add(db, events.LIST_DELETED, list_obj, user_id)
     await db.commit()
+    get_loader(db, TodoList).forget(list_id)
     return True
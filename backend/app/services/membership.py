@@ -0,0 +1,346 @@
+"""
+List membership and the access checks built on it.
+
+Every list and item operation asks for the caller's role in the list and
+hands it, with the list or item, to the rules in ``app.services.policy``. Roles
+are cached twice: in the session, for the rest of the request, and in a
+per-process cache for ``membership_cache_ttl_seconds``. Membership changes
+made here invalidate both when they commit. Other workers drop their cached
+roles for a list when the member.* (or list.deleted) event reaches them
+through the outbox relay and broadcast; the TTL bounds how stale a cached
+role can get should such an event be missed.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.loader import get_loader
+from app.models.list_member import ListMember, ListRole
+from app.models.todo_list import TodoList
+from app.services import events, outbox, policy
+from app.services.policy import Resource, Subject
+
+# Event types after which cached roles for the list are dropped
+INVALIDATING_TYPES = frozenset(
+    {events.MEMBER_ADDED, events.MEMBER_UPDATED, events.MEMBER_REMOVED, events.LIST_DELETED}
+)
+
+_ROLES = "membership_roles"
+_CHANGED = "membership_changed"
+
+lookups_total = registry.counter(
+    "membership_lookups_total",
+    "List role lookups by where they were answered (request, process or database).",
+    ["source"],
+)
+
+
+class RoleCache:
+    """
+    Per-process cache of roles by ``(list_id, user_id)``.
+
+    Non-members are cached too (as None), so repeated denied requests do not
+    reach the database either. Entries expire after ``ttl_seconds``; the
+    least recently used are evicted beyond ``max_entries``. A lookup that
+    started before an invalidation is not cached, so a role read just before
+    a membership change commits cannot outlive the change.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: OrderedDict[tuple[int, str], tuple[float, Optional[str]]] = OrderedDict()
+
+    def get(self, key: tuple[int, str]) -> tuple[bool, Optional[str]]:
+        """Return ``(found, role)`` for ``key``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, role = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, role
+
+    def put(self, key: tuple[int, str], role: Optional[str], generation: int) -> None:
+        """Cache ``role`` if nothing was invalidated since ``generation``."""
+        if self.ttl_seconds <= 0 or generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, role)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_list(self, list_id: int) -> None:
+        self.generation += 1
+        for key in [key for key in self._entries if key[0] == list_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+cache = RoleCache(settings.membership_cache_ttl_seconds, settings.membership_cache_size)
+
+
+async def get_role(db: AsyncSession, list_id: int, user_id: str) -> Optional[str]:
+    """
+    Get a user's role in a list.
+
+    Args:
+        db: Database session
+        list_id: ID of the list
+        user_id: ID of the user
+
+    Returns:
+        The role, or None if the user is not a member (or the list does not exist)
+    """
+    key = (list_id, user_id)
+    roles = db.info.setdefault(_ROLES, {})
+    if key in roles:
+        lookups_total.inc("request")
+        return roles[key]
+
+    found, role = cache.get(key)
+    if found:
+        lookups_total.inc("process")
+    else:
+        lookups_total.inc("database")
+        generation = cache.generation
+        role = await db.scalar(
+            select(ListMember.role).where(
+                ListMember.user_id == user_id, ListMember.list_id == list_id
+            )
+        )
+        # Uncommitted membership changes of this session stay out of the process cache
+        if list_id not in db.info.get(_CHANGED, ()):
+            cache.put(key, role, generation)
+    roles[key] = role
+    return role
+
+
+async def check_access(
+    db: AsyncSession,
+    list_id: int,
+    user_id: str,
+    action: str = policy.LIST_READ,
+    resource: Optional[Resource] = None,
+) -> str | None:
+    """
+    Check that a user may do something with a list or one of its items.
+
+    Only a denied check reads the list itself, to tell a missing list from
+    one the user may not use.
+
+    Args:
+        db: Database session
+        list_id: ID of the list
+        user_id: ID of the user
+        action: One of the ``app.services.policy`` actions
+        resource: The item or list acted on; defaults to the list by id alone
+
+    Returns:
+        None if allowed, otherwise "not_found" or "forbidden"
+    """
+    role = await get_role(db, list_id, user_id)
+    if role is not None:
+        allowed = policy.is_allowed(
+            Subject(user_id, role), action, resource or policy.list_resource(list_id)
+        )
+        return None if allowed else "forbidden"
+    exists = await get_loader(db, TodoList).load(list_id)
+    return "forbidden" if exists is not None else "not_found"
+
+
+async def allowed_many(
+    db: AsyncSession, user_id: str, action: str, resources: list[Resource]
+) -> list[bool]:
+    """
+    Decide one action for many items or lists at once, e.g. for bulk endpoints.
+
+    The user's role is looked up once per list involved.
+
+    Args:
+        db: Database session
+        user_id: ID of the user
+        action: One of the ``app.services.policy`` actions
+        resources: The items or lists acted on
+
+    Returns:
+        One decision per resource, in order; False for lists the user is not in
+    """
+    by_list: dict[int, list[int]] = {}
+    for index, resource in enumerate(resources):
+        by_list.setdefault(resource.list_id, []).append(index)
+
+    decisions = [False] * len(resources)
+    for list_id, indexes in by_list.items():
+        role = await get_role(db, list_id, user_id)
+        allowed = policy.allowed_many(
+            Subject(user_id, role), action, [resources[i] for i in indexes]
+        )
+        for index, decision in zip(indexes, allowed):
+            decisions[index] = decision
+    return decisions
+
+
+async def get_members(
+    db: AsyncSession, list_id: int, user_id: str
+) -> tuple[list[ListMember] | None, str | None]:
+    """
+    Get the members of a list, owner first.
+
+    Args:
+        db: Database session
+        list_id: ID of the list
+        user_id: ID of the user asking (must be a member)
+
+    Returns:
+        Tuple of (members if allowed, None if error, error message or None)
+    """
+    error = await check_access(db, list_id, user_id, policy.LIST_READ)
+    if error:
+        return None, error
+
+    result = await db.execute(
+        select(ListMember)
+        .where(ListMember.list_id == list_id)
+        .order_by(ListMember.role != ListRole.OWNER.value, ListMember.created_at)
+    )
+    return list(result.scalars().all()), None
+
+
+async def set_member_role(
+    db: AsyncSession, list_id: int, member_id: str, role: str, user_id: str
+) -> tuple[ListMember | None, str | None]:
+    """
+    Share a list with a user, or change the role of an existing member.
+
+    Args:
+        db: Database session
+        list_id: ID of the list
+        member_id: ID of the user to share the list with
+        role: "editor" or "viewer"
+        user_id: ID of the user making the change (must own the list)
+
+    Returns:
+        Tuple of (ListMember if successful, None if error, error message or None);
+        the error is "owner" when the target is the list's owner
+    """
+    error = await check_access(db, list_id, user_id, policy.LIST_SHARE)
+    if error:
+        return None, error
+
+    await _lock_list(db, list_id)
+    member = await db.get(ListMember, (member_id, list_id))
+    if member is not None and member.role == ListRole.OWNER.value:
+        return None, "owner"
+
+    if member is None:
+        member = ListMember(
+            user_id=member_id,
+            list_id=list_id,
+            role=role,
+            created_at=datetime.now(timezone.utc),
+        )
+        event_type = events.MEMBER_ADDED
+    elif member.role == role:
+        return member, None
+    else:
+        member.role = role
+        event_type = events.MEMBER_UPDATED
+
+    db.add(member)
+    _changed(db, list_id)
+    outbox.add(db, event_type, member, user_id)
+    await db.commit()
+    await db.refresh(member)
+    return member, None
+
+
+async def remove_member(
+    db: AsyncSession, list_id: int, member_id: str, user_id: str
+) -> tuple[bool, str | None]:
+    """
+    Stop sharing a list with a user; members may also remove themselves.
+
+    Args:
+        db: Database session
+        list_id: ID of the list
+        member_id: ID of the member to remove
+        user_id: ID of the user making the change
+
+    Returns:
+        Tuple of (success: bool, error: str or None); the error is "owner"
+        when the target is the list's owner, who cannot be removed
+    """
+    action = policy.LIST_READ if member_id == user_id else policy.LIST_SHARE
+    error = await check_access(db, list_id, user_id, action)
+    if error:
+        return False, error
+
+    await _lock_list(db, list_id)
+    member = await db.get(ListMember, (member_id, list_id))
+    if member is None:
+        return False, "not_a_member"
+    if member.role == ListRole.OWNER.value:
+        return False, "owner"
+
+    await db.delete(member)
+    _changed(db, list_id)
+    outbox.add(db, events.MEMBER_REMOVED, member, user_id)
+    await db.commit()
+    return True, None
+
+
+async def remove_all_members(db: AsyncSession, list_id: int) -> None:
+    """
+    Delete the memberships of a list that is being deleted.
+
+    Call it in the same transaction as the list's deletion.
+    """
+    await db.execute(delete(ListMember).where(ListMember.list_id == list_id))
+    _changed(db, list_id)
+
+
+async def _lock_list(db: AsyncSession, list_id: int) -> None:
+    """
+    Lock the list's row until commit (on Postgres).
+
+    Item and list changes hold it from their version bump on, so member
+    events are serialized with theirs and keep commit order in the outbox.
+    """
+    await db.execute(select(TodoList.id).where(TodoList.id == list_id).with_for_update())
+
+
+def _changed(db: AsyncSession, list_id: int) -> None:
+    """Note a membership change; cached roles for the list go on commit."""
+    roles = db.info.get(_ROLES)
+    if roles:
+        for key in [key for key in roles if key[0] == list_id]:
+            del roles[key]
+    db.info.setdefault(_CHANGED, set()).add(list_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed(session: Session) -> None:
+    for list_id in session.info.pop(_CHANGED, ()):
+        cache.invalidate_list(list_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed(session: Session) -> None:
+    # Roles read inside the rolled back transaction may reflect its changes
+    if session.info.pop(_CHANGED, None):
+        session.info.pop(_ROLES, None)
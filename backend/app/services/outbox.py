@@ -0,0 +1,285 @@
+"""
+Transactional outbox for list and item domain events.
+
+Services call ``add`` next to the change they make; the event is inserted
+into the ``outbox`` table by the committing transaction itself, so a change
+is never committed without its event. Each worker runs a ``Relay`` that
+claims batches of undelivered events, hands them to its subscribers (list
+event broadcast, activity feed, and any others passed in) and deletes them
+in one transaction. Delivery is at least once: a crash or a failing
+subscriber leaves the batch in place to be delivered again.
+
+On Postgres several relays share the table. Batches are claimed with
+``FOR UPDATE SKIP LOCKED`` plus a per-list advisory lock, so each list's
+events are delivered by one relay at a time in id order. Ids follow commit
+order within a list because every mutation first bumps the list's version,
+and membership changes lock the list row, which serializes writers on it.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.list_member import ListMember
+from app.models.outbox import OutboxEvent
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+from app.schemas.list_member import ListMemberResponse
+from app.schemas.todo_item import TodoItemResponse
+from app.schemas.todo_list import TodoListResponse
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "outbox_pending"
+_WRITTEN = "outbox_written"
+
+# First key of the two-part advisory locks taken per list while relaying
+ADVISORY_LOCK_NAMESPACE = 0x0B0C
+
+Subscriber = Callable[[AsyncSession, list[OutboxEvent]], Awaitable[None]]
+
+delivered_total = registry.counter(
+    "outbox_events_delivered_total", "Outbox events handed to every subscriber."
+)
+failures_total = registry.counter(
+    "outbox_delivery_failures_total", "Outbox batches rolled back because a subscriber failed."
+)
+lag_seconds = registry.gauge(
+    "outbox_lag_seconds", "Age of the oldest undelivered outbox event after a relay pass."
+)
+delivery_lag = registry.histogram(
+    "outbox_delivery_lag_seconds", "Time from an event's commit to its delivery."
+)
+
+
+def add(
+    db: AsyncSession,
+    event_type: str,
+    obj: TodoItem | TodoList | ListMember,
+    actor_id: Optional[str] = None,
+) -> None:
+    """
+    Add a domain event for ``obj`` to the outbox when ``db`` commits.
+
+    The event carries ``obj`` as it is at commit time; repeated events of
+    the same type for the same object in one transaction are written once.
+
+    Args:
+        db: Session the change is made in
+        event_type: One of the ``app.services.events`` event types
+        obj: The changed TodoItem, TodoList or ListMember
+        actor_id: ID of the user making the change
+    """
+    pending = db.info.setdefault(_PENDING, {})
+    key = (id(obj), event_type)
+    pending.pop(key, None)
+    pending[key] = (event_type, obj, actor_id)
+
+
+def build_row(
+    event_type: str, obj: TodoItem | TodoList | ListMember, actor_id: Optional[str]
+) -> dict:
+    """Outbox row for an event: list id, type, actor and the serialized object."""
+    if isinstance(obj, TodoList):
+        list_id, data = obj.id, TodoListResponse.model_validate(obj)
+    elif isinstance(obj, ListMember):
+        list_id, data = obj.list_id, ListMemberResponse.model_validate(obj)
+    else:
+        list_id, data = obj.list_id, TodoItemResponse.model_validate(obj)
+    return {
+        "list_id": list_id,
+        "type": event_type,
+        "actor_id": actor_id,
+        "payload": data.model_dump_json(),
+        # Naive UTC, as compared by the relay: Postgres would convert an
+        # aware value to the session's time zone
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+    }
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    # New rows need their ids before they are serialized
+    session.flush()
+    session.execute(
+        insert(OutboxEvent), [build_row(*entry) for entry in pending.values()]
+    )
+    session.info[_WRITTEN] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session: Session) -> None:
+    if session.info.pop(_WRITTEN, False) and relay is not None:
+        relay.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_WRITTEN, None)
+
+
+class Relay:
+    """
+    Delivers outbox events to subscribers in batches.
+
+    Runs a pass as soon as a local commit adds events and otherwise every
+    ``poll_ms``, which picks up events committed by other workers or left
+    behind by a crash. A batch whose delivery fails is retried on later
+    passes; after ``max_attempts`` failures its events are left in the
+    table, skipped, for someone to look at.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        subscribers: Sequence[Subscriber],
+        batch_size: Optional[int] = None,
+        poll_ms: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.session_maker = session_maker
+        self.subscribers = list(subscribers)
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.poll_seconds = (settings.outbox_poll_ms if poll_ms is None else poll_ms) / 1000
+        self.max_attempts = max_attempts or settings.outbox_max_attempts
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = self.poll_seconds
+        while True:
+            self._wakeup.clear()
+            try:
+                delivered = await self.run_once()
+                delay = self.poll_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox relay pass failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, 30.0)
+                continue
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """
+        Deliver one batch of outbox events.
+
+        Returns:
+            Number of events delivered
+        """
+        async with self.session_maker() as db:
+            batch = await self._claim(db)
+            if batch:
+                ids = [outbox_event.id for outbox_event in batch]
+                try:
+                    for subscriber in self.subscribers:
+                        await subscriber(db, batch)
+                    await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+                    await db.commit()
+                except Exception:
+                    logger.exception(f"Delivering {len(batch)} outbox events failed")
+                    failures_total.inc()
+                    await db.rollback()
+                    await self._record_failure(db, ids)
+                    return 0
+                now = datetime.now(timezone.utc).replace(tzinfo=None)
+                for outbox_event in batch:
+                    delivery_lag.observe(_age(outbox_event.created_at, now))
+                delivered_total.inc(amount=len(batch))
+
+            oldest = await db.scalar(
+                select(func.min(OutboxEvent.created_at)).where(
+                    OutboxEvent.attempts < self.max_attempts
+                )
+            )
+            lag_seconds.set(
+                value=_age(oldest, datetime.now(timezone.utc).replace(tzinfo=None))
+                if oldest else 0
+            )
+            return len(batch)
+
+    async def _claim(self, db: AsyncSession) -> list[OutboxEvent]:
+        query = (
+            select(OutboxEvent)
+            .where(OutboxEvent.attempts < self.max_attempts)
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.where(
+                func.pg_try_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, OutboxEvent.list_id)
+            ).with_for_update(skip_locked=True)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def _record_failure(self, db: AsyncSession, ids: list[int]) -> None:
+        try:
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids))
+                .values(attempts=OutboxEvent.attempts + 1)
+            )
+            await db.commit()
+        except Exception:
+            logger.exception("Could not record failed outbox delivery")
+            await db.rollback()
+
+
+def _age(created_at: datetime, now: datetime) -> float:
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return max(0.0, (now - created_at).total_seconds())
+
+
+def payload(outbox_event: OutboxEvent) -> dict:
+    """The serialized item, list or member an event carries."""
+    return json.loads(outbox_event.payload)
+
+
+relay: Optional[Relay] = None
+
+
+def start_relay(subscribers: Sequence[Subscriber]) -> None:
+    """Start this worker's outbox relay."""
+    global relay
+    from app.db.database import async_session_maker
+
+    relay = Relay(async_session_maker, subscribers)
+    relay.start()
+
+
+async def stop_relay() -> None:
+    global relay
+    if relay is not None:
+        await relay.stop()
+        relay = None
@@ -0,0 +1,264 @@
+"""
+Attribute-based authorization for lists and items.
+
+Rules are declared below as data over subject attributes (the user and
+their role in the list), resource attributes (list or item: owner, item
+creator, status) and the action. ``Policy`` compiles them once, at import,
+into a table from (action, role) to either "allowed" or a short tuple of
+predicates, so a decision is a dict lookup and, for conditional rules, a
+few attribute comparisons. Conditional decisions are memoized by
+(subject, resource version, action): a resource's attributes only change
+together with its version, so a cached decision can never be stale.
+
+Rules only grant; anything no rule allows is denied. Role lookups live in
+``app.services.membership``, which feeds its results in here.
+"""
+
+import operator
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Sequence
+
+from app.core.config import settings
+from app.models.list_member import ListRole
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+
+LIST_READ = "list.read"
+LIST_UPDATE = "list.update"
+LIST_DELETE = "list.delete"
+LIST_SHARE = "list.share"
+ITEM_CREATE = "item.create"
+ITEM_UPDATE = "item.update"
+ITEM_TOGGLE = "item.toggle"
+ITEM_DELETE = "item.delete"
+ITEM_RESTORE = "item.restore"
+
+
+class Subject(NamedTuple):
+    """The user asking, with their role in the resource's list (None if not a member)."""
+
+    id: str
+    role: Optional[str]
+
+
+class Resource(NamedTuple):
+    """
+    A list or an item, reduced to the attributes rules may use.
+
+    ``version`` identifies the state of those attributes: the list version
+    for lists, ``updated_at`` for items. Resources known only by their list
+    id (for list-wide checks) have no version and no attributes.
+    """
+
+    kind: str  # "list" or "item"
+    id: int
+    list_id: int
+    version: Any = None
+    owner_id: Optional[str] = None
+    created_by: Optional[str] = None
+    status: Optional[str] = None
+
+
+class Attr(NamedTuple):
+    """Reference to a subject or resource attribute in a rule condition."""
+
+    source: str  # "subject" or "resource"
+    name: str
+
+
+class _Namespace:
+    def __init__(self, source: str):
+        self._source = source
+
+    def __getattr__(self, name: str) -> Attr:
+        if name not in (Subject._fields if self._source == "subject" else Resource._fields):
+            raise AttributeError(f"{self._source} has no attribute {name!r}")
+        return Attr(self._source, name)
+
+
+subject = _Namespace("subject")
+resource = _Namespace("resource")
+
+# A condition is (left, op, right) with attribute references or literals
+Condition = tuple[Any, str, Any]
+
+
+class Rule(NamedTuple):
+    """Allow ``actions`` to subjects with one of ``roles`` when every condition holds."""
+
+    actions: tuple[str, ...]
+    roles: tuple[str, ...]
+    when: tuple[Condition, ...] = ()
+
+
+OWNER, EDITOR, VIEWER = ListRole.OWNER.value, ListRole.EDITOR.value, ListRole.VIEWER.value
+
+RULES: tuple[Rule, ...] = (
+    Rule((LIST_READ,), (OWNER, EDITOR, VIEWER)),
+    Rule(
+        (LIST_UPDATE, ITEM_CREATE, ITEM_UPDATE, ITEM_TOGGLE, ITEM_RESTORE),
+        (OWNER, EDITOR),
+    ),
+    Rule((LIST_DELETE, LIST_SHARE, ITEM_DELETE), (OWNER,)),
+    # Editors delete what they added, and anyone's finished items
+    Rule((ITEM_DELETE,), (EDITOR,), when=((resource.created_by, "==", subject.id),)),
+    Rule((ITEM_DELETE,), (EDITOR,), when=((resource.status, "==", "completed"),)),
+)
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda value, options: value in options,
+}
+
+Predicate = Callable[[Subject, Resource], bool]
+
+
+def _operand(value) -> Callable[[Subject, Resource], Any]:
+    if isinstance(value, Attr):
+        index = (Subject if value.source == "subject" else Resource)._fields.index(value.name)
+        if value.source == "subject":
+            return lambda s, r: s[index]
+        return lambda s, r: r[index]
+    return lambda s, r: value
+
+
+def _compile_condition(condition: Condition) -> Predicate:
+    left, op, right = condition
+    if op not in _OPERATORS:
+        raise ValueError(f"Unknown operator {op!r} in condition {condition}")
+    compare = _OPERATORS[op]
+    get_left, get_right = _operand(left), _operand(right)
+
+    def predicate(s: Subject, r: Resource) -> bool:
+        found = get_left(s, r)
+        # Missing attributes never satisfy a condition
+        return found is not None and compare(found, get_right(s, r))
+
+    return predicate
+
+
+def _compile_rule(rule: Rule) -> Predicate:
+    conditions = tuple(_compile_condition(condition) for condition in rule.when)
+    if len(conditions) == 1:
+        return conditions[0]
+    return lambda s, r: all(condition(s, r) for condition in conditions)
+
+
+def compile_rules(rules: Iterable[Rule]) -> dict[tuple[str, str], bool | tuple[Predicate, ...]]:
+    """
+    Compile rules into a table from (action, role) to True or predicates.
+
+    True means the role is allowed unconditionally; otherwise any one of
+    the predicates allowing is enough.
+    """
+    table: dict[tuple[str, str], bool | tuple[Predicate, ...]] = {}
+    for rule in rules:
+        predicate = _compile_rule(rule) if rule.when else None
+        for action in rule.actions:
+            for role in rule.roles:
+                key = (action, role)
+                if table.get(key) is True:
+                    continue
+                if predicate is None:
+                    table[key] = True
+                else:
+                    table[key] = (*table.get(key, ()), predicate)
+    return table
+
+
+def _any_allows(predicates: tuple[Predicate, ...], s: Subject, r: Resource) -> bool:
+    for predicate in predicates:
+        if predicate(s, r):
+            return True
+    return False
+
+
+class Policy:
+    """
+    Compiled rules with memoized decisions.
+
+    The memo is bounded by ``cache_size``; when full it is cleared, which is
+    cheaper than tracking recency and fine for entries that are cheap to
+    recompute.
+    """
+
+    def __init__(self, rules: Iterable[Rule], cache_size: Optional[int] = None):
+        self.table = compile_rules(rules)
+        self.cache_size = settings.policy_cache_size if cache_size is None else cache_size
+        self._decisions: dict[tuple, bool] = {}
+
+    def decide(self, s: Subject, action: str, r: Resource) -> bool:
+        """Evaluate the compiled rules, bypassing the memo."""
+        entry = self.table.get((action, s.role))
+        if entry is None or entry is True:
+            return entry is True
+        return _any_allows(entry, s, r)
+
+    def is_allowed(self, s: Subject, action: str, r: Resource) -> bool:
+        """
+        Whether ``s`` may do ``action`` to ``r``.
+
+        Role-only outcomes come straight from the compiled table; only
+        conditional ones are memoized.
+
+        Args:
+            s: The user and their role in ``r``'s list
+            action: One of the action constants of this module
+            r: The list or item acted on
+
+        Returns:
+            True if a rule allows it
+        """
+        entry = self.table.get((action, s.role))
+        if entry is None or entry is True:
+            return entry is True
+        key = (s, action, r.kind, r.id, r.version)
+        decision = self._decisions.get(key)
+        if decision is None:
+            decision = _any_allows(entry, s, r)
+            if len(self._decisions) >= self.cache_size:
+                self._decisions.clear()
+            self._decisions[key] = decision
+        return decision
+
+    def allowed_many(self, s: Subject, action: str, resources: Sequence[Resource]) -> list[bool]:
+        """
+        Decide ``action`` for many resources of one list at once.
+
+        Unconditional outcomes for the subject's role are answered without
+        looking at the resources.
+
+        Returns:
+            One decision per resource, in order
+        """
+        entry = self.table.get((action, s.role))
+        if entry is None:
+            return [False] * len(resources)
+        if entry is True:
+            return [True] * len(resources)
+        is_allowed = self.is_allowed
+        return [is_allowed(s, action, r) for r in resources]
+
+    def clear(self) -> None:
+        self._decisions.clear()
+
+
+def list_resource(list_id: int, todo_list: Optional[TodoList] = None) -> Resource:
+    """Resource for a list; without ``todo_list`` only role-based rules can allow."""
+    if todo_list is None:
+        return Resource("list", list_id, list_id)
+    return Resource("list", list_id, list_id, todo_list.version, todo_list.owner_id)
+
+
+def item_resource(item: TodoItem) -> Resource:
+    """Resource for an item, versioned by its updated_at."""
+    return Resource(
+        "item", item.id, item.list_id, item.updated_at,
+        created_by=item.created_by, status=item.status,
+    )
+
+
+# The application's policy, compiled at import
+default_policy = Policy(RULES)
+is_allowed = default_policy.is_allowed
+allowed_many = default_policy.allowed_many
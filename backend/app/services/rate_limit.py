@@ -0,0 +1,265 @@
+"""
+Per-user admission control for the API.
+
+Each user has two budgets, one for reads (GET and HEAD) and one for writes,
+each a token bucket (sustained rate plus burst) and a cap on requests in
+flight at once. A request over either gets 429 with Retry-After, so one
+runaway client cannot take the connection pool from everyone else.
+
+Token buckets live in a backend: ``LocalBackend`` keeps them in the worker,
+``PostgresBackend`` shares them between workers. In-flight caps are per
+worker, since what they protect (the worker's pool and event loop) is.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+READ = "read"
+WRITE = "write"
+
+rejections_total = registry.counter(
+    "rate_limit_rejections_total",
+    "Requests refused by admission control, by budget and reason (rate or concurrency).",
+    ["budget", "reason"],
+)
+backend_errors_total = registry.counter(
+    "rate_limit_backend_errors_total",
+    "Shared rate limit backend failures; requests are admitted meanwhile.",
+)
+
+
+class Budget(NamedTuple):
+    """Requests per second, burst size and requests in flight allowed per user."""
+
+    rate: float
+    burst: int
+    concurrency: int
+
+
+def budget_for(method: str) -> str:
+    """The budget an HTTP method is charged to."""
+    return READ if method in ("GET", "HEAD") else WRITE
+
+
+class LocalBackend:
+    """
+    Token buckets in this worker's memory.
+
+    Stands in for a shared backend in development and single-worker
+    deployments. The least recently used buckets beyond ``max_keys`` are
+    dropped, which at worst hands an idle user a full bucket early.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, monotonic time they were counted at)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Take one token from a bucket.
+
+        Args:
+            key: Bucket key (budget and user)
+            rate: Tokens added per second
+            burst: Bucket size
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(burst)
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            self._buckets.move_to_end(key)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+# Refill the bucket and hand out up to :lease whole tokens in one statement
+_TAKE_SQL = text("""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, granted, updated_at)
+    VALUES (:key, :burst - :lease, :lease, clock_timestamp()::timestamp)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = {refilled} - LEAST(:lease, FLOOR({refilled})),
+        granted = LEAST(:lease, FLOOR({refilled})),
+        updated_at = clock_timestamp()::timestamp
+    RETURNING tokens, granted
+""".format(
+    refilled=(
+        "LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp()::timestamp"
+        " - b.updated_at) * :rate)"
+    )
+))
+
+
+class PostgresBackend:
+    """
+    Token buckets shared by all workers, in the unlogged rate_limit_buckets table.
+
+    A worker takes up to ``lease`` tokens at once and spends them locally, so
+    only about one request in ``lease`` reaches the database. Leased tokens
+    not used within ``lease_seconds`` are discarded; a user may therefore
+    get slightly less than the budget across workers, never more. If the
+    database cannot be reached, requests are admitted rather than failed.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker, lease: int, lease_seconds: float = 1.0):
+        self.session_maker = session_maker
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        # key -> (leased tokens left, monotonic expiry)
+        self._leases: dict[str, tuple[int, float]] = {}
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; see ``LocalBackend.take``."""
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] > 0 and lease[1] > now:
+            self._leases[key] = (lease[0] - 1, lease[1])
+            return 0.0
+
+        try:
+            async with self.session_maker() as db:
+                result = await db.execute(
+                    _TAKE_SQL,
+                    {"key": key, "rate": rate, "burst": burst, "lease": min(self.lease, burst)},
+                )
+                tokens, granted = result.one()
+                await db.commit()
+        except Exception:
+            backend_errors_total.inc()
+            logger.warning("Rate limit backend unavailable; admitting", exc_info=True)
+            return 0.0
+
+        if granted < 1:
+            self._leases.pop(key, None)
+            return (1 - tokens) / rate
+        self._leases[key] = (int(granted) - 1, now + self.lease_seconds)
+        return 0.0
+
+    def clear(self) -> None:
+        self._leases.clear()
+
+
+class RateLimiter:
+    """Admits requests against each user's read and write budgets."""
+
+    def __init__(self, budgets: dict[str, Budget], backend, enabled: bool = True):
+        self.budgets = budgets
+        self.backend = backend
+        self.enabled = enabled
+        self._in_flight: dict[tuple[str, str], int] = {}
+
+    async def admit(self, user_id: str, budget: str) -> Optional[float]:
+        """
+        Admit a request, counting it in flight until ``release``.
+
+        Args:
+            user_id: ID of the user
+            budget: READ or WRITE
+
+        Returns:
+            None if admitted, otherwise seconds the client should wait
+        """
+        if not self.enabled:
+            return None
+        limits = self.budgets[budget]
+        key = (user_id, budget)
+        in_flight = self._in_flight.get(key, 0)
+        if in_flight >= limits.concurrency:
+            rejections_total.inc(budget, "concurrency")
+            return 1.0
+        # Counted before the backend may suspend, so concurrent admits see it
+        self._in_flight[key] = in_flight + 1
+        wait = await self.backend.take(f"{budget}:{user_id}", limits.rate, limits.burst)
+        if wait:
+            self.release(user_id, budget)
+            rejections_total.inc(budget, "rate")
+            return wait
+        return None
+
+    def release(self, user_id: str, budget: str) -> None:
+        """Stop counting an admitted request as in flight."""
+        if not self.enabled:
+            return
+        key = (user_id, budget)
+        in_flight = self._in_flight.get(key, 0) - 1
+        if in_flight > 0:
+            self._in_flight[key] = in_flight
+        else:
+            self._in_flight.pop(key, None)
+
+    async def take(self, user_id: str, budget: str) -> Optional[float]:
+        """
+        Charge one request to the budget's rate without counting it in flight.
+
+        For long-lived connections (event streams) and commands sent over
+        an open WebSocket.
+
+        Returns:
+            None if allowed, otherwise seconds the client should wait
+        """
+        if not self.enabled:
+            return None
+        limits = self.budgets[budget]
+        wait = await self.backend.take(f"{budget}:{user_id}", limits.rate, limits.burst)
+        if wait:
+            rejections_total.inc(budget, "rate")
+            return wait
+        return None
+
+    def clear(self) -> None:
+        self._in_flight.clear()
+        self.backend.clear()
+
+
+limiter = RateLimiter(
+    {
+        READ: Budget(
+            settings.rate_limit_read_per_second,
+            settings.rate_limit_read_burst,
+            settings.rate_limit_read_concurrency,
+        ),
+        WRITE: Budget(
+            settings.rate_limit_write_per_second,
+            settings.rate_limit_write_burst,
+            settings.rate_limit_write_concurrency,
+        ),
+    },
+    LocalBackend(),
+    enabled=settings.rate_limit_enabled,
+)
+
+
+def start_limiter() -> None:
+    """Share the token buckets through Postgres when configured to."""
+    if settings.rate_limit_backend != "postgres":
+        return
+    if make_url(settings.database_url).get_backend_name() != "postgresql":
+        logger.warning("rate_limit_backend=postgres needs a Postgres database; using local")
+        return
+    from app.db.database import async_session_maker
+
+    limiter.backend = PostgresBackend(async_session_maker, settings.rate_limit_lease)
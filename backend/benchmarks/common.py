@@ -0,0 +1,166 @@
+"""Shared helpers for the benchmark suite."""
+
+import json
+import math
+import os
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_SQLITE_PATH = Path(tempfile.gettempdir()) / "sleekflow_bench.db"
+
+
+def configure_environment(database_url: Optional[str]) -> str:
+    """
+    Point the application at the benchmark database before it is imported.
+
+    Uses BENCH_DATABASE_URL, then the explicit URL, then a throwaway SQLite
+    file. Must run before any ``app.*`` import, since settings and the engine
+    are created at import time.
+    """
+    url = database_url or os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        DEFAULT_SQLITE_PATH.unlink(missing_ok=True)
+        url = f"sqlite+aiosqlite:///{DEFAULT_SQLITE_PATH}?timeout=30"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    # Benchmarks drive a few users far beyond any per-user budget, and
+    # measure the server saturated rather than shedding
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("LOAD_SHED_ENABLED", "false")
+    return url
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class ScenarioResult:
+    """Throughput and latency summary of one benchmark scenario."""
+
+    requests: int
+    errors: int
+    concurrency: int
+    duration_s: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    @classmethod
+    def from_latencies(
+        cls, latencies: list[float], errors: int, concurrency: int, duration: float
+    ) -> "ScenarioResult":
+        ordered = sorted(latencies)
+        return cls(
+            requests=len(ordered),
+            errors=errors,
+            concurrency=concurrency,
+            duration_s=round(duration, 4),
+            throughput_rps=round(len(ordered) / duration, 2) if duration else 0.0,
+            p50_ms=round(percentile(ordered, 50) * 1000, 3),
+            p95_ms=round(percentile(ordered, 95) * 1000, 3),
+            p99_ms=round(percentile(ordered, 99) * 1000, 3),
+        )
+
+
+@dataclass
+class BenchmarkReport:
+    """Results of a benchmark run, saved as JSON for comparison across commits."""
+
+    name: str
+    meta: dict = field(default_factory=dict)
+    results: dict[str, ScenarioResult] = field(default_factory=dict)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "name": self.name,
+            "meta": self.meta,
+            "results": {name: asdict(result) for name, result in self.results.items()},
+        }
+        path.write_text(json.dumps(payload, indent=2) + "\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchmarkReport":
+        payload = json.loads(path.read_text())
+        return cls(
+            name=payload["name"],
+            meta=payload.get("meta", {}),
+            results={
+                name: ScenarioResult(**result)
+                for name, result in payload["results"].items()
+            },
+        )
+
+    def print_table(self) -> None:
+        print(f"{'scenario':<28} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for name, r in self.results.items():
+            print(
+                f"{name:<28} {r.throughput_rps:>10.1f} {r.p50_ms:>9.2f} "
+                f"{r.p95_ms:>9.2f} {r.p99_ms:>9.2f} {r.errors:>7}"
+            )
+
+
+def scenario_errors(report: BenchmarkReport) -> list[str]:
+    """List the scenarios of ``report`` with failed requests."""
+    return [
+        f"{name}: {result.errors} of {result.requests} requests failed"
+        for name, result in report.results.items()
+        if result.errors
+    ]
+
+
+def compare_reports(
+    baseline: BenchmarkReport, current: BenchmarkReport, threshold: float
+) -> list[str]:
+    """
+    List regressions of ``current`` against ``baseline``.
+
+    A scenario regresses when p95 latency grows, or throughput drops, by more
+    than ``threshold`` (a fraction, e.g. 0.15 for 15%). A scenario with
+    failed requests in either report is listed as such instead: its timings
+    would partly be those of error responses.
+    """
+    regressions = scenario_errors(current)
+    for name, before in baseline.results.items():
+        after = current.results.get(name)
+        if after is None or after.errors:
+            continue
+        if before.errors:
+            regressions.append(f"{name}: baseline had {before.errors} errors, not comparable")
+            continue
+        if before.p95_ms and after.p95_ms > before.p95_ms * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {before.p95_ms:.2f}ms -> {after.p95_ms:.2f}ms"
+            )
+        if before.throughput_rps and after.throughput_rps < before.throughput_rps * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {before.throughput_rps:.1f} -> {after.throughput_rps:.1f} req/s"
+            )
+    return regressions
+
+
+def run_metadata(database_url: str, **extra) -> dict:
+    """Commit, time and database backend for a report."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "database": database_url.split(":", 1)[0],
+        **extra,
+    }
@@ -0,0 +1,339 @@
+"""
+Endpoint load test for every route in ``lists.py`` and ``items.py``.
+
+Runs the real FastAPI app in-process (ASGI transport, full middleware stack
+and real sessions) against Postgres or a SQLite stand-in seeded with
+synthetic data (``benchmarks.dataset``), drives each route at a fixed concurrency and reports
+throughput plus p50/p95/p99 latency.
+
+Usage::
+
+    uv run python -m benchmarks.endpoints --output bench/base.json
+    uv run python -m benchmarks.endpoints --output bench/new.json \\
+        --compare bench/base.json --threshold 0.15
+
+BENCH_DATABASE_URL (or --database-url) selects the database; the default is
+a throwaway SQLite file. A Postgres database must already be migrated.
+Authentication uses the trusted proxy headers (X-User-Id), so no BetterAuth
+rows are needed.
+
+A scenario with failed (4xx/5xx) requests fails the run, and is not
+compared against the baseline, since its timings are partly those of
+error responses.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks.common import (
+    BenchmarkReport,
+    ScenarioResult,
+    compare_reports,
+    configure_environment,
+    run_metadata,
+    scenario_errors,
+)
+
+WORDS = (
+    "buy milk call mom review pull request book flights renew passport "
+    "fix leaking tap plan sprint write report pay rent water plants "
+    "schedule dentist update resume clean garage order groceries"
+).split()
+TAGS = ["work", "home", "urgent", "errand", "finance", "health", "someday"]
+
+
+@dataclass
+class Dataset:
+    """Seeded ids the request factories draw from."""
+
+    lists_by_user: dict[str, list[int]] = field(default_factory=dict)
+    items_by_list: dict[int, list[int]] = field(default_factory=dict)
+    # Created during the run, consumed by destructive scenarios
+    created_lists: list[tuple[str, int]] = field(default_factory=list)
+    deleted_items: list[tuple[str, int]] = field(default_factory=list)
+
+    def random_list(self, rng: random.Random) -> tuple[str, int]:
+        user = rng.choice(list(self.lists_by_user))
+        return user, rng.choice(self.lists_by_user[user])
+
+    def random_item(self, rng: random.Random) -> tuple[str, int, int]:
+        while True:
+            user, list_id = self.random_list(rng)
+            items = self.items_by_list.get(list_id)
+            if items:
+                return user, list_id, rng.choice(items)
+
+
+@dataclass
+class RequestSpec:
+    method: str
+    url: str
+    user: str
+    json: Optional[dict] = None
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.sample(WORDS, rng.randint(2, 5))).capitalize()
+
+
+def _item_body(rng: random.Random) -> dict:
+    body = {"text": _text(rng), "tags": rng.sample(TAGS, rng.randint(0, 3))}
+    if rng.random() < 0.5:
+        body["description"] = " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))
+    return body
+
+
+def _pop_created_list(rng: random.Random, data: Dataset) -> RequestSpec:
+    user, list_id = data.created_lists.pop()
+    return RequestSpec("DELETE", f"/api/v1/lists/{list_id}", user)
+
+
+def _delete_item(rng: random.Random, data: Dataset) -> RequestSpec:
+    user, list_id, item_id = data.random_item(rng)
+    data.items_by_list[list_id].remove(item_id)
+    data.deleted_items.append((user, item_id))
+    return RequestSpec("DELETE", f"/api/v1/items/{item_id}", user)
+
+
+def _restore_item(rng: random.Random, data: Dataset) -> RequestSpec:
+    user, item_id = data.deleted_items.pop()
+    return RequestSpec("POST", f"/api/v1/items/{item_id}/restore", user)
+
+
+def _list_request(method: str, suffix: str = "", body=None):
+    def factory(rng: random.Random, data: Dataset) -> RequestSpec:
+        user, list_id = data.random_list(rng)
+        return RequestSpec(
+            method, f"/api/v1/lists/{list_id}{suffix}", user, body(rng) if body else None
+        )
+    return factory
+
+
+def _item_request(method: str, url: str, body=None):
+    def factory(rng: random.Random, data: Dataset) -> RequestSpec:
+        user, list_id, item_id = data.random_item(rng)
+        return RequestSpec(
+            method,
+            url.format(list_id=list_id, item_id=item_id),
+            user,
+            body(rng) if body else None,
+        )
+    return factory
+
+
+# Scenario name -> request factory. Order matters: destructive scenarios
+# consume ids produced by the ones before them.
+SCENARIOS: dict[str, Callable[[random.Random, Dataset], RequestSpec]] = {
+    "lists.get_lists": lambda rng, data: RequestSpec(
+        "GET", "/api/v1/lists", rng.choice(list(data.lists_by_user))
+    ),
+    "lists.get_list_detail": _list_request("GET"),
+    "lists.create_list": lambda rng, data: RequestSpec(
+        "POST", "/api/v1/lists", rng.choice(list(data.lists_by_user)), {"name": _text(rng)}
+    ),
+    "lists.update_name": _list_request("PUT", "/name", lambda rng: {"name": _text(rng)}),
+    "lists.delete_list": _pop_created_list,
+    "items.get_items": _list_request("GET", "/items"),
+    "items.create_item": _list_request("POST", "/items", _item_body),
+    "items.update_item_in_list": _item_request(
+        "PUT", "/api/v1/lists/{list_id}/items/{item_id}", _item_body
+    ),
+    "items.update_item": _item_request("PUT", "/api/v1/items/{item_id}", _item_body),
+    "items.toggle_complete": _item_request(
+        "PATCH", "/api/v1/items/{item_id}/toggle-complete"
+    ),
+    "items.set_due_date": _item_request(
+        "PATCH",
+        "/api/v1/items/{item_id}/due-date",
+        lambda rng: {
+            "due_date": (date.today() + timedelta(days=rng.randint(-5, 30))).isoformat()
+        },
+    ),
+    "items.set_priority": _item_request(
+        "PATCH",
+        "/api/v1/items/{item_id}/priority",
+        lambda rng: {"priority": rng.choice(["low", "medium", "high", None])},
+    ),
+    "items.delete_item": _delete_item,
+    "items.restore_item": _restore_item,
+}
+
+
+async def seed(
+    users: int, lists_per_user: int, items_per_list: int, seed_value: int
+) -> Dataset:
+    """
+    Load a synthetic dataset (see ``benchmarks.dataset``) and index its ids.
+
+    List and item counts are means: list sizes are heavy-tailed, as in
+    production, rather than uniform.
+    """
+    from sqlalchemy import text
+
+    import app.models.activity  # noqa: F401  (register tables for init_db)
+    import app.models.list_member  # noqa: F401
+    import app.models.outbox  # noqa: F401
+    import app.models.todo_item  # noqa: F401
+    import app.models.todo_list  # noqa: F401
+    from app.db.database import engine, init_db
+    from benchmarks.dataset import DatasetSpec, SyntheticDataset, load_async
+
+    await init_db()
+    async with engine.begin() as conn:
+        first_list_id = (
+            await conn.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM todo_lists"))
+        ).scalar_one()
+        dataset = SyntheticDataset(DatasetSpec(
+            users=users,
+            items=users * lists_per_user * items_per_list,
+            seed=seed_value,
+            mean_lists_per_user=lists_per_user,
+            # Keep deleted rows out of the random item pool
+            deleted_fraction=0.0,
+            first_list_id=first_list_id,
+            user_prefix="bench-user",
+        ))
+        await load_async(conn, dataset)
+        if conn.dialect.name == "postgresql":
+            # Explicit list ids bypass the sequence; move it past them
+            await conn.execute(text(
+                "SELECT setval(pg_get_serial_sequence('todo_lists', 'id'), "
+                "(SELECT MAX(id) FROM todo_lists))"
+            ))
+        rows = await conn.execute(
+            text("SELECT id, list_id FROM todo_items WHERE list_id >= :first"),
+            {"first": first_list_id},
+        )
+        item_rows = rows.all()
+
+    data = Dataset()
+    for list_id, _name, owner_id, _created, _updated in dataset.lists():
+        data.lists_by_user.setdefault(owner_id, []).append(list_id)
+    for item_id, list_id in item_rows:
+        data.items_by_list.setdefault(list_id, []).append(item_id)
+    return data
+
+
+async def run_scenario(
+    client, specs: list[RequestSpec], concurrency: int
+) -> tuple[ScenarioResult, list[dict]]:
+    """Issue ``specs`` with ``concurrency`` workers; returns summary and JSON bodies."""
+    latencies: list[float] = []
+    bodies: list[dict] = []
+    errors = 0
+    queue = list(reversed(specs))
+
+    async def worker() -> None:
+        nonlocal errors
+        while queue:
+            spec = queue.pop()
+            start = time.perf_counter()
+            response = await client.request(
+                spec.method, spec.url, json=spec.json, headers={"X-User-Id": spec.user}
+            )
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif spec.method == "POST" and response.content:
+                bodies.append({"user": spec.user, **response.json()})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    return ScenarioResult.from_latencies(latencies, errors, concurrency, duration), bodies
+
+
+async def run(args: argparse.Namespace, database_url: str) -> BenchmarkReport:
+    import httpx
+
+    from app.db.database import engine
+    from app.main import app
+
+    data = await seed(args.users, args.lists_per_user, args.items_per_list, args.seed)
+    rng = random.Random(args.seed + 1)
+    report = BenchmarkReport(
+        name="endpoints",
+        meta=run_metadata(
+            database_url,
+            concurrency=args.concurrency,
+            requests_per_scenario=args.requests,
+            users=args.users,
+            lists_per_user=args.lists_per_user,
+            items_per_list=args.items_per_list,
+        ),
+    )
+    selected = [name for name in SCENARIOS if not args.only or args.only in name]
+
+    # Unhandled endpoint errors become 500s and are counted, not raised
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in selected:
+            factory = SCENARIOS[name]
+            count = args.requests
+            if name == "lists.delete_list":
+                count = min(count, len(data.created_lists))
+            elif name == "items.restore_item":
+                count = min(count, len(data.deleted_items))
+            # Build requests up front so generation is not measured
+            specs = [factory(rng, data) for _ in range(count)]
+            result, bodies = await run_scenario(client, specs, args.concurrency)
+            report.results[name] = result
+            if name == "lists.create_list":
+                data.created_lists = [(body["user"], body["id"]) for body in bodies]
+            elif name == "items.delete_item":
+                # Restore most recent deletions first (5 second undo window)
+                data.deleted_items.reverse()
+    await engine.dispose()
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or SQLite")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--lists-per-user", type=int, default=5, help="Mean lists per user")
+    parser.add_argument("--items-per-list", type=int, default=50, help="Mean items per list")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="Run scenarios whose name contains this string")
+    parser.add_argument("--output", type=Path, default=Path("bench-results/endpoints.json"))
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15,
+        help="Allowed p95/throughput regression as a fraction (default 0.15)",
+    )
+    args = parser.parse_args()
+
+    database_url = configure_environment(args.database_url)
+    report = asyncio.run(run(args, database_url))
+    report.save(args.output)
+    report.print_table()
+    print(f"\nSaved {args.output}")
+
+    errors = scenario_errors(report)
+    if errors and not args.compare:
+        print("\nScenarios with errors:")
+        for line in errors:
+            print(f"  {line}")
+        return 1
+    if args.compare:
+        regressions = compare_reports(BenchmarkReport.load(args.compare), report, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}, and scenarios with errors:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
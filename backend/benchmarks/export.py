@@ -0,0 +1,161 @@
+"""
+Memory of a streaming export.
+
+Loads one user with N items (see ``benchmarks.dataset``) and streams
+``GET /api/v1/export`` through the ASGI app to a client that discards what
+it receives, recording heap and RSS as the body goes out. Rows are read
+and encoded a batch at a time, so memory should stay flat from the first
+megabytes to the last whatever N is.
+
+Usage::
+
+    uv run python -m benchmarks.export --items 1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import configure_environment
+from benchmarks.sse_idle import snapshot
+
+USER_PREFIX = "export-user"
+
+
+async def seed(items: int, lists: int) -> str:
+    """Load one user owning ``lists`` lists holding ``items`` items; returns the user's id."""
+    from sqlalchemy import text
+
+    import app.models.activity  # noqa: F401  (register tables for init_db)
+    import app.models.list_member  # noqa: F401
+    import app.models.outbox  # noqa: F401
+    import app.models.todo_item  # noqa: F401
+    import app.models.todo_list  # noqa: F401
+    from app.db.database import engine, init_db
+    from benchmarks.dataset import DatasetSpec, SyntheticDataset, load_async
+
+    await init_db()
+    async with engine.begin() as conn:
+        first_list_id = (
+            await conn.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM todo_lists"))
+        ).scalar_one()
+        dataset = SyntheticDataset(DatasetSpec(
+            users=1,
+            items=items,
+            mean_lists_per_user=lists,
+            first_list_id=first_list_id,
+            user_prefix=f"{USER_PREFIX}-{first_list_id}",
+        ))
+        started = time.perf_counter()
+        counts = await load_async(conn, dataset, batch_size=5_000)
+        print(
+            f"Loaded {counts['todo_lists']:,} lists and {counts['todo_items']:,} items "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    return dataset.user_id(0)
+
+
+async def run(args: argparse.Namespace) -> int:
+    from app.main import app
+
+    user_id = await seed(args.items, args.lists)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/export",
+        "raw_path": b"/api/v1/export",
+        "query_string": f"format={args.format}".encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"x-user-id", user_id.encode())],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    sent = 0
+    lines = 0
+    status = None
+    samples = []
+    next_sample = args.sample_mb * 2**20
+
+    async def send(message):
+        nonlocal sent, lines, status, next_sample
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            return
+        body = message.get("body", b"")
+        sent += len(body)
+        lines += body.count(b"\n")
+        if sent >= next_sample:
+            heap, rss = snapshot()
+            samples.append((sent, heap, rss))
+            print(f"{sent / 2**20:>9.0f} {lines:>11,} {heap:>9.1f} {rss:>9.1f}")
+            next_sample += args.sample_mb * 2**20
+        if not message.get("more_body", False):
+            done.set()
+
+    tracemalloc.start()
+    print(f"\n{'sent MB':>9} {'lines':>11} {'heap MB':>9} {'rss MB':>9}")
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - started
+    end_heap, end_rss = snapshot()
+    tracemalloc.stop()
+
+    if status != 200:
+        print(f"Export failed with status {status}")
+        return 1
+    print(
+        f"\nExported {lines:,} lines, {sent / 2**20:.0f} MB in {elapsed:.1f}s "
+        f"({lines / max(elapsed, 1e-9):,.0f} lines/s)"
+    )
+    if not samples:
+        print("Export too small to sample; use more --items or a smaller --sample-mb")
+        return 0
+    _, first_heap, first_rss = samples[0]
+    print(
+        f"heap {first_heap:.1f} -> {end_heap:.1f} MB (max {max(s[1] for s in samples):.1f}), "
+        f"rss {first_rss:.1f} -> {end_rss:.1f} MB (max {max(s[2] for s in samples):.1f})"
+    )
+
+    # Measured from the first sample, once connections and caches are warm
+    growth = max(s[2] for s in samples) - first_rss
+    if growth > args.max_growth_mb:
+        print(f"RSS grew {growth:.1f} MB during the export (limit {args.max_growth_mb} MB)")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL, then SQLite")
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--lists", type=int, default=50, help="Mean lists the user owns")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--sample-mb", type=float, default=16.0, help="Output between samples")
+    parser.add_argument(
+        "--max-growth-mb", type=float, default=32.0,
+        help="Fail if RSS grows more than this after the first sample",
+    )
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
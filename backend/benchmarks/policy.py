@@ -0,0 +1,133 @@
+"""
+Authorization decisions per second with the compiled policy.
+
+Measures ``Policy`` in-process, no database involved:
+
+* ``role_only``: a decision settled by the role alone (list read)
+* ``conditional.uncached``: an editor deleting an item, evaluating the
+  creator and status predicates every time
+* ``conditional.memoized``: the same decisions answered from the memo
+* ``batch``: ``allowed_many`` over ``--batch`` items of one list
+
+Usage::
+
+    uv run python -m benchmarks.policy --decisions 200000 --max-us 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.common import (
+    BenchmarkReport,
+    ScenarioResult,
+    compare_reports,
+    configure_environment,
+    run_metadata,
+)
+
+
+def _time_rounds(run_round, rounds: int, decisions_per_round: int) -> list[float]:
+    """Seconds per decision for each round."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run_round()
+        samples.append((time.perf_counter() - start) / decisions_per_round)
+    return samples
+
+
+def run(args) -> tuple[BenchmarkReport, dict[str, float]]:
+    from app.services.policy import ITEM_DELETE, LIST_READ, RULES, Policy, Resource, Subject
+
+    policy = Policy(RULES, cache_size=max(args.batch * 2, 100_000))
+    version = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    users = [f"user-{n}" for n in range(50)]
+    items = [
+        Resource(
+            "item", n, 1, version,
+            created_by=users[n % len(users)],
+            status="completed" if n % 3 == 0 else "not_started",
+        )
+        for n in range(args.batch)
+    ]
+    editor = Subject(users[0], "editor")
+    viewer = Subject(users[1], "viewer")
+    per_round = args.batch
+    rounds = max(1, args.decisions // per_round)
+
+    def role_only():
+        is_allowed = policy.is_allowed
+        for item in items:
+            is_allowed(viewer, LIST_READ, item)
+
+    def uncached():
+        decide = policy.decide
+        for item in items:
+            decide(editor, ITEM_DELETE, item)
+
+    def memoized():
+        is_allowed = policy.is_allowed
+        for item in items:
+            is_allowed(editor, ITEM_DELETE, item)
+
+    def batch():
+        policy.allowed_many(editor, ITEM_DELETE, items)
+
+    memoized()  # warm the memo
+    scenarios = {
+        "role_only": role_only,
+        "conditional.uncached": uncached,
+        "conditional.memoized": memoized,
+        "batch": batch,
+    }
+    report = BenchmarkReport(
+        name="policy",
+        meta=run_metadata("memory", decisions=rounds * per_round, batch=args.batch),
+    )
+    medians_us = {}
+    for name, scenario in scenarios.items():
+        samples = _time_rounds(scenario, rounds, per_round)
+        report.results[name] = ScenarioResult.from_latencies(
+            samples * per_round, errors=0, concurrency=1, duration=sum(samples) * per_round
+        )
+        medians_us[name] = statistics.median(samples) * 1e6
+    return report, medians_us
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--decisions", type=int, default=200_000, help="Decisions per scenario")
+    parser.add_argument("--batch", type=int, default=1_000, help="Items per batch (and per round)")
+    parser.add_argument("--max-us", type=float, help="Fail if a median decision takes longer (µs)")
+    parser.add_argument("--output", type=Path, default=Path("bench-results/policy.json"))
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    configure_environment(None)
+    report, medians_us = run(args)
+    report.save(args.output)
+    print(f"{'scenario':<28} {'decisions/s':>14} {'median µs':>10}")
+    for name, result in report.results.items():
+        print(f"{name:<28} {result.throughput_rps:>14.0f} {medians_us[name]:>10.3f}")
+    print(f"\nSaved {args.output}")
+
+    failures = []
+    if args.max_us is not None:
+        failures += [
+            f"{name}: {median:.3f}µs per decision > {args.max_us}µs"
+            for name, median in medians_us.items() if median > args.max_us
+        ]
+    if args.compare:
+        failures += compare_reports(BenchmarkReport.load(args.compare), report, args.threshold)
+    for line in failures:
+        print(f"  {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
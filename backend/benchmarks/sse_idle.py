@@ -0,0 +1,113 @@
+"""
+Idle Server-Sent Events subscribers per worker.
+
+Opens N list event streams through the same ``EventHub.stream`` generator
+the endpoint serves, spread over many lists, and records memory as they
+ramp up and then while they sit idle receiving heartbeats. Per-subscriber
+cost should be a few KB, and memory should stay flat while idle.
+
+Usage::
+
+    uv run python -m benchmarks.sse_idle --subscribers 10000 --idle-seconds 30
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import configure_environment
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux); 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def snapshot() -> tuple[float, float]:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 2**20, rss_bytes() / 2**20
+
+
+async def run(args: argparse.Namespace) -> int:
+    from app.services.events import EventHub
+
+    hub = EventHub(heartbeat_seconds=args.heartbeat)
+    frames = 0
+
+    async def subscriber(list_id: int) -> None:
+        nonlocal frames
+        async for _frame in hub.stream(list_id):
+            frames += 1
+
+    tracemalloc.start()
+    base_heap, base_rss = snapshot()
+    print(f"{'subscribers':>11} {'heap MB':>9} {'rss MB':>9} {'KB/sub':>8}")
+    print(f"{0:>11} {base_heap:>9.1f} {base_rss:>9.1f} {'':>8}")
+
+    tasks = []
+    step = max(args.subscribers // 4, 1)
+    while len(tasks) < args.subscribers:
+        for _ in range(min(step, args.subscribers - len(tasks))):
+            tasks.append(asyncio.create_task(subscriber(len(tasks) % args.lists)))
+        await asyncio.sleep(0)
+        heap, rss = snapshot()
+        per_sub = (heap - base_heap) * 1024 / len(tasks)
+        print(f"{len(tasks):>11} {heap:>9.1f} {rss:>9.1f} {per_sub:>8.2f}")
+
+    # Let every stream receive a few heartbeats before measuring the idle phase
+    await asyncio.sleep(args.heartbeat * 3)
+    start_heap, start_rss = snapshot()
+    start_frames = frames
+    samples = []
+    deadline = time.perf_counter() + args.idle_seconds
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(min(1.0, args.idle_seconds))
+        samples.append(snapshot())
+    end_heap, end_rss = samples[-1]
+    heartbeats = (frames - start_frames) / len(tasks)
+
+    print(
+        f"\nIdle {args.idle_seconds:.0f}s, {heartbeats:.1f} heartbeats/subscriber: "
+        f"heap {start_heap:.1f} -> {end_heap:.1f} MB "
+        f"(max {max(s[0] for s in samples):.1f}), "
+        f"rss {start_rss:.1f} -> {end_rss:.1f} MB"
+    )
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tracemalloc.stop()
+
+    growth = end_heap - start_heap
+    if growth > args.max_growth_mb:
+        print(f"Heap grew {growth:.2f} MB while idle (limit {args.max_growth_mb} MB)")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--lists", type=int, default=2_000, help="Lists to spread subscribers over")
+    parser.add_argument("--heartbeat", type=float, default=0.5, help="Heartbeat interval (s)")
+    parser.add_argument("--idle-seconds", type=float, default=15.0)
+    parser.add_argument(
+        "--max-growth-mb", type=float, default=1.0,
+        help="Fail if the heap grows more than this while idle",
+    )
+    args = parser.parse_args()
+
+    configure_environment(None)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Item mutations per second over HTTP versus the list WebSocket channel.
+
+Starts the app under uvicorn in a subprocess, seeds lists and items, then
+has ``--concurrency`` clients each toggle items in their own list:
+
+* ``http``: ``PATCH /items/{id}/toggle-complete`` on a keep-alive connection
+* ``http.preflight``: the same, preceded by the CORS preflight a browser
+  sends for a cross-origin PATCH
+* ``ws.sequential``: one ``toggle`` command at a time on the list socket
+* ``ws.pipelined``: up to ``--window`` commands in flight per socket
+
+Usage::
+
+    uv run python -m benchmarks.ws_vs_http --ops 2000 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.common import (
+    BenchmarkReport,
+    ScenarioResult,
+    compare_reports,
+    configure_environment,
+    run_metadata,
+)
+from benchmarks.endpoints import seed
+
+ORIGIN = "http://localhost:3001"
+
+
+async def _wait_for_server(base_url: str, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise
+            await asyncio.sleep(0.2)
+
+
+async def _http_worker(client, user: str, items: list[int], ops: int, preflight: bool, latencies):
+    errors = 0
+    for n in range(ops):
+        url = f"/api/v1/items/{items[n % len(items)]}/toggle-complete"
+        start = time.perf_counter()
+        if preflight:
+            await client.options(url, headers={
+                "Origin": ORIGIN,
+                "Access-Control-Request-Method": "PATCH",
+                "Access-Control-Request-Headers": "x-user-id",
+            })
+        response = await client.patch(url, headers={"X-User-Id": user, "Origin": ORIGIN})
+        latencies.append(time.perf_counter() - start)
+        errors += response.status_code >= 400
+    return errors
+
+
+async def _ws_worker(ws_url: str, user: str, list_id: int, items: list[int], ops: int, window: int, latencies):
+    import websockets
+
+    errors = 0
+    in_flight: dict[str, float] = {}
+    async with websockets.connect(
+        f"{ws_url}/api/v1/lists/{list_id}/ws",
+        additional_headers={"X-User-Id": user, "Origin": ORIGIN},
+    ) as ws:
+        async def receive_ack() -> None:
+            nonlocal errors
+            ack = json.loads(await ws.recv())
+            latencies.append(time.perf_counter() - in_flight.pop(ack["id"]))
+            errors += not ack["ok"]
+
+        for n in range(ops):
+            if len(in_flight) >= window:
+                await receive_ack()
+            in_flight[str(n)] = time.perf_counter()
+            await ws.send(json.dumps({"id": str(n), "op": "toggle", "item_id": items[n % len(items)]}))
+        while in_flight:
+            await receive_ack()
+    return errors
+
+
+async def run_mode(mode: str, args, base_url: str, targets) -> ScenarioResult:
+    import httpx
+
+    latencies: list[float] = []
+    per_worker = args.ops // len(targets)
+    start = time.perf_counter()
+    if mode.startswith("http"):
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            errors = await asyncio.gather(*(
+                _http_worker(client, user, items, per_worker, mode == "http.preflight", latencies)
+                for user, _list_id, items in targets
+            ))
+    else:
+        window = 1 if mode == "ws.sequential" else args.window
+        ws_url = base_url.replace("http://", "ws://")
+        errors = await asyncio.gather(*(
+            _ws_worker(ws_url, user, list_id, items, per_worker, window, latencies)
+            for user, list_id, items in targets
+        ))
+    duration = time.perf_counter() - start
+    return ScenarioResult.from_latencies(latencies, sum(errors), len(targets), duration)
+
+
+async def run(args, database_url: str) -> BenchmarkReport:
+    from app.db.database import engine
+
+    data = await seed(args.concurrency, 1, args.items_per_list, args.seed)
+    await engine.dispose()
+    rng = random.Random(args.seed)
+    targets = []
+    for user, lists in data.lists_by_user.items():
+        list_id = rng.choice(lists)
+        items = data.items_by_list.get(list_id) or []
+        if items:
+            targets.append((user, list_id, items))
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, "CORS_ORIGINS": ORIGIN},
+    )
+    report = BenchmarkReport(
+        name="ws_vs_http",
+        meta=run_metadata(
+            database_url, ops=args.ops, concurrency=len(targets), window=args.window
+        ),
+    )
+    try:
+        await _wait_for_server(base_url)
+        for mode in ("http", "http.preflight", "ws.sequential", "ws.pipelined"):
+            report.results[mode] = await run_mode(mode, args, base_url, targets)
+    finally:
+        server.terminate()
+        server.wait()
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or SQLite")
+    parser.add_argument("--ops", type=int, default=2000, help="Toggles per mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients, one list each")
+    parser.add_argument("--window", type=int, default=16, help="In-flight commands per socket when pipelined")
+    parser.add_argument("--items-per-list", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", type=Path, default=Path("bench-results/ws_vs_http.json"))
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    database_url = configure_environment(args.database_url)
+    report = asyncio.run(run(args, database_url))
+    report.save(args.output)
+    report.print_table()
+    http = report.results["http"].throughput_rps
+    for mode in ("ws.sequential", "ws.pipelined"):
+        if http:
+            print(f"{mode} vs http: {report.results[mode].throughput_rps / http:.2f}x ops/s")
+    print(f"\nSaved {args.output}")
+
+    if args.compare:
+        regressions = compare_reports(BenchmarkReport.load(args.compare), report, args.threshold)
+        for line in regressions:
+            print(f"  {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Tests for the activity feed and its batch writer."""
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from app.models.activity import Activity
+from app.services import activity, events
+from app.services.activity import (
+    ActivityWriter,
+    drop_partitions_before,
+    ensure_partitions,
+    get_list_activity,
+    get_user_activity,
+)
+from app.services.item_service import create_item, toggle_item_completion
+from app.services.list_service import create_list, update_list_name
+from app.services.outbox import Relay
+
+# Postgres for the partition test, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    """File-backed SQLite, so the writer's sessions get their own connections."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'activity.db'}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_committed_changes_reach_the_feeds(session_maker, monkeypatch):
+    """Test delivered events are batched into the list and user feeds, newest first."""
+    writer = ActivityWriter(session_maker, batch_size=3, flush_ms=10)
+    monkeypatch.setattr(activity, "writer", writer)
+    writer.start()
+
+    db_session = session_maker()
+    todo_list = await create_list(db_session, "Groceries", "user-1")
+    item = await create_item(db_session, todo_list.id, "Milk", "user-1")
+    await toggle_item_completion(db_session, item.id, "user-1")
+    await update_list_name(db_session, todo_list.id, "user-1", "Shopping")
+    other = await create_list(db_session, "Work", "user-2")
+    list_id, item_id, other_id = todo_list.id, item.id, other.id
+    await Relay(session_maker, [activity.deliver]).run_once()
+    await writer.stop()
+
+    entries, cursor = await get_list_activity(db_session, list_id, limit=3)
+    assert [e.action for e in entries] == [
+        events.LIST_UPDATED, events.ITEM_TOGGLED, events.ITEM_CREATED,
+    ]
+    assert entries[1].item_id == item_id and '"completed"' in entries[1].detail
+    rest, end = await get_list_activity(db_session, list_id, limit=3, before=cursor)
+    assert [e.action for e in rest] == [events.LIST_CREATED]
+    assert end is None
+
+    mine, _ = await get_user_activity(db_session, "user-1")
+    assert len(mine) == 4
+    theirs, _ = await get_user_activity(db_session, "user-2")
+    assert [(e.list_id, e.action) for e in theirs] == [(other_id, events.LIST_CREATED)]
+    await db_session.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_full_batches_without_waiting(session_maker):
+    """Test a full batch is written before the flush interval elapses."""
+    writer = ActivityWriter(session_maker, batch_size=50, flush_ms=60_000, queue_size=60)
+    now = datetime.now(timezone.utc)
+    row = {"list_id": 1, "item_id": None, "actor_id": "user-1", "action": events.LIST_UPDATED,
+           "detail": "{}", "created_at": now}
+    writer.start()
+
+    writer.submit([row] * 70)
+    for _ in range(100):
+        async with session_maker() as session:
+            written = await session.scalar(select(func.count()).select_from(Activity))
+        if written:
+            break
+        await asyncio.sleep(0.01)
+    assert written == 50
+
+    await writer.stop()
+    async with session_maker() as session:
+        # 10 of the 70 did not fit the queue and were dropped
+        assert await session.scalar(select(func.count()).select_from(Activity)) == 60
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_monthly_partitions_are_created_and_dropped():
+    """Test partitions are prepared ahead and whole old months dropped."""
+    engine = create_async_engine(
+        POSTGRES_URL, connect_args={"options": "-c search_path=activity_partition_test"}
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS activity_partition_test CASCADE"))
+            await conn.execute(text("CREATE SCHEMA activity_partition_test"))
+            await conn.execute(text(
+                "CREATE TABLE activity (id BIGINT GENERATED BY DEFAULT AS IDENTITY, "
+                "list_id INTEGER NOT NULL, item_id INTEGER, actor_id VARCHAR NOT NULL, "
+                "action VARCHAR(32) NOT NULL, detail VARCHAR NOT NULL DEFAULT '{}', "
+                "created_at TIMESTAMP NOT NULL, PRIMARY KEY (id, created_at)) "
+                "PARTITION BY RANGE (created_at)"
+            ))
+            await conn.execute(text("CREATE TABLE activity_default PARTITION OF activity DEFAULT"))
+
+        async with session_maker() as db:
+            created = await ensure_partitions(db, 1, datetime(2025, 12, 15))
+            assert created == ["activity_y2025m12", "activity_y2026m01"]
+            assert await ensure_partitions(db, 1, datetime(2025, 12, 15)) == []
+            dropped = await drop_partitions_before(db, datetime(2026, 1, 31))
+            assert dropped == ["activity_y2025m12"]
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS activity_partition_test CASCADE"))
+        await engine.dispose()
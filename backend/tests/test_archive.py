@@ -0,0 +1,207 @@
+"""Tests for archiving old completed items."""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.api.deps import get_db
+from app.main import app
+from app.models.todo_item import ArchivedItem, Priority, TodoItem
+from app.models.todo_list import TodoList
+from app.services import archive, export_service
+from app.services.item_service import VersionConflict, toggle_item_completion
+from app.services.membership import set_member_role
+
+# Postgres for row locking and table sizes, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+async def _seed(session, owner="user-1") -> tuple[int, dict[str, int]]:
+    """A list with old and recent, completed and open items; returns ids by text."""
+    todo_list = TodoList(name="Chores", owner_id=owner, created_at=NOW, updated_at=NOW)
+    session.add(todo_list)
+    await session.commit()
+    old, recent = NOW - timedelta(days=60), NOW - timedelta(days=1)
+    items = [
+        TodoItem(list_id=todo_list.id, text="Old done", status="completed", priority=Priority.LOW,
+                 created_by=owner, created_at=old, updated_at=old),
+        TodoItem(list_id=todo_list.id, text="Old open", created_by=owner,
+                 created_at=old + timedelta(hours=1), updated_at=old),
+        TodoItem(list_id=todo_list.id, text="Old deleted", status="completed", created_by=owner,
+                 created_at=old, updated_at=old, deleted_at=old),
+        TodoItem(list_id=todo_list.id, text="Recent done", status="completed", created_by=owner,
+                 created_at=recent, updated_at=recent),
+        TodoItem(list_id=todo_list.id, text="Old done too", status="completed", created_by=owner,
+                 created_at=old + timedelta(hours=2), updated_at=old),
+    ]
+    session.add_all(items)
+    await session.commit()
+    return todo_list.id, {item.text: item.id for item in items}
+
+
+@pytest.mark.asyncio
+async def test_old_completed_items_move_to_the_archive(db_session):
+    """Test only old, completed, live items are archived, in batches, and stay readable."""
+    list_id, ids = await _seed(db_session)
+    version = (await db_session.get(TodoList, list_id)).version
+
+    archived = await archive.archive_completed(db_session, timedelta(days=28), batch_size=1, now=NOW)
+
+    assert archived == 2
+    live = (await db_session.execute(select(TodoItem.text).order_by(TodoItem.id))).scalars().all()
+    assert live == ["Old open", "Old deleted", "Recent done"]
+    moved = (await db_session.execute(select(ArchivedItem))).scalars().all()
+    assert {item.id for item in moved} == {ids["Old done"], ids["Old done too"]}
+    assert {item.priority for item in moved} == {Priority.LOW, None}
+    sizes = await archive.table_sizes(db_session)
+    assert (sizes["todo_items"].rows, sizes["todo_items_archive"].rows) == (3, 2)
+    todo_list = await db_session.get(TodoList, list_id, populate_existing=True)
+    assert todo_list.version == version + 2
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            default = await client.get(f"/api/v1/lists/{list_id}/items", headers={"X-User-Id": "user-1"})
+            everything = await client.get(
+                f"/api/v1/lists/{list_id}/items?include_archived=true",
+                headers={"X-User-Id": "user-1"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [item["text"] for item in default.json()] == ["Old open", "Recent done"]
+    assert [item["text"] for item in everything.json()] == [
+        "Old done", "Old open", "Old done too", "Recent done"
+    ]
+    assert default.headers["etag"] != everything.headers["etag"]
+
+    exported = b"".join(
+        [chunk async for chunk in export_service.export_chunks(db_session, "user-1", "ndjson", 100)]
+    )
+    texts = [line.get("text") for line in map(json.loads, exported.splitlines())]
+    assert sorted(filter(None, texts)) == ["Old done", "Old done too", "Old open", "Recent done"]
+
+
+@pytest.mark.asyncio
+async def test_editing_an_archived_item_moves_it_back(db_session):
+    """Test an edit of an archived item applies to it, back in todo_items, at its version."""
+    list_id, ids = await _seed(db_session)
+    await archive.archive_completed(db_session, timedelta(days=28), batch_size=10, now=NOW)
+    item_id = ids["Old done"]
+    version = (await db_session.get(ArchivedItem, item_id)).version
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            toggled = await client.patch(
+                f"/api/v1/items/{item_id}/toggle-complete",
+                headers={"X-User-Id": "user-1", "If-Match": f'"item-{item_id}-{version}"'},
+            )
+            missing = await client.patch(
+                "/api/v1/items/999999/toggle-complete", headers={"X-User-Id": "user-1"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert toggled.status_code == 200
+    assert toggled.json()["id"] == item_id
+    assert toggled.json()["status"] == "not_started"
+    assert toggled.json()["version"] == version + 1
+    assert missing.status_code == 404
+    assert await db_session.get(ArchivedItem, item_id, populate_existing=True) is None
+    item = await db_session.get(TodoItem, (item_id, list_id), populate_existing=True)
+    assert item.text == "Old done"
+
+
+@pytest.mark.asyncio
+async def test_archived_items_can_be_updated_through_either_route(db_session):
+    """Test PUTs of archived items move them back, or answer 403 to users who may not edit."""
+    list_id, ids = await _seed(db_session)
+    await set_member_role(db_session, list_id, "viewer", "viewer", "user-1")
+    await archive.archive_completed(db_session, timedelta(days=28), batch_size=10, now=NOW)
+    done, done_too = ids["Old done"], ids["Old done too"]
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            scoped = await client.put(
+                f"/api/v1/lists/{list_id}/items/{done}",
+                json={"text": "Done again"}, headers={"X-User-Id": "user-1"},
+            )
+            denied = await client.put(
+                f"/api/v1/items/{done_too}", json={"text": "Nope"}, headers={"X-User-Id": "viewer"}
+            )
+            direct = await client.put(
+                f"/api/v1/items/{done_too}", json={"text": "Done too"}, headers={"X-User-Id": "user-1"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert scoped.status_code == 200
+    assert scoped.json()["text"] == "Done again"
+    assert denied.status_code == 403
+    assert direct.status_code == 200
+    assert direct.json()["text"] == "Done too"
+    archived = await db_session.execute(select(ArchivedItem.id).where(ArchivedItem.list_id == list_id))
+    assert archived.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_refused_edits_leave_an_archived_item_archived(db_session):
+    """Test an edit the user may not make, or based on another version, moves nothing back."""
+    list_id, ids = await _seed(db_session)
+    await set_member_role(db_session, list_id, "viewer", "viewer", "user-1")
+    await archive.archive_completed(db_session, timedelta(days=28), batch_size=10, now=NOW)
+    item_id = ids["Old done"]
+    version = (await db_session.get(ArchivedItem, item_id)).version
+
+    async def still_archived() -> bool:
+        # Read in the edit's transaction, before anything rolls it back
+        live = await db_session.execute(select(TodoItem.id).where(TodoItem.id == item_id))
+        archived = await db_session.execute(select(ArchivedItem.id).where(ArchivedItem.id == item_id))
+        return live.first() is None and archived.first() is not None
+
+    assert await toggle_item_completion(db_session, item_id, "viewer") == (None, "forbidden")
+    assert await still_archived()
+    with pytest.raises(VersionConflict) as conflict:
+        await toggle_item_completion(db_session, item_id, "user-1", if_match={version + 1})
+    assert conflict.value.item.version == version
+    assert await still_archived()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_archiving_on_postgres_reports_sizes():
+    """Test archiving and unarchiving on Postgres, with on-disk sizes reported."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    owner = f"archiver-{os.urandom(4).hex()}"
+    try:
+        async with session_maker() as db:
+            list_id, ids = await _seed(db, owner)
+            await archive.archive_completed(db, timedelta(days=28), batch_size=1, now=NOW)
+            sizes = await archive.table_sizes(db)
+            archived = (
+                await db.execute(select(ArchivedItem.id).where(ArchivedItem.list_id == list_id))
+            ).scalars().all()
+            item = await archive.unarchive_item(db, ids["Old done"], list_id)
+            await db.commit()
+            still_archived = await db.get(ArchivedItem, ids["Old done"])
+    finally:
+        await engine.dispose()
+
+    assert sorted(archived) == sorted([ids["Old done"], ids["Old done too"]])
+    assert sizes["todo_items_archive"].table_bytes > 0
+    assert sizes["todo_items"].index_bytes > 0
+    assert (item.id, item.priority) == (ids["Old done"], Priority.LOW)
+    assert still_archived is None
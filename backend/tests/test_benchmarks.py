@@ -0,0 +1,92 @@
+"""Tests for benchmark reporting and regression comparison."""
+from benchmarks.common import (
+    BenchmarkReport,
+    ScenarioResult,
+    compare_reports,
+    percentile,
+    scenario_errors,
+)
+
+
+def _result(rps: float, p95: float, errors: int = 0) -> ScenarioResult:
+    return ScenarioResult(
+        requests=100, errors=errors, concurrency=10, duration_s=1.0,
+        throughput_rps=rps, p50_ms=p95 / 2, p95_ms=p95, p99_ms=p95 * 1.5,
+    )
+
+
+def test_percentile_nearest_rank():
+    """Test nearest-rank percentiles on a sorted sample."""
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test p95 growth and throughput drops beyond the threshold are reported."""
+    baseline = BenchmarkReport("endpoints", results={
+        "items.get_items": _result(rps=100, p95=10),
+        "lists.get_lists": _result(rps=100, p95=10),
+    })
+    current = BenchmarkReport("endpoints", results={
+        "items.get_items": _result(rps=80, p95=13),
+        "lists.get_lists": _result(rps=95, p95=11),
+    })
+
+    regressions = compare_reports(baseline, current, threshold=0.15)
+
+    assert len(regressions) == 2
+    assert all(line.startswith("items.get_items") for line in regressions)
+
+
+def test_scenarios_with_errors_are_flagged_not_compared():
+    """Test a scenario with failed requests is reported whatever its timings."""
+    baseline = BenchmarkReport("endpoints", results={
+        "items.restore_item": _result(rps=100, p95=10),
+        "items.toggle_complete": _result(rps=100, p95=10, errors=3),
+    })
+    current = BenchmarkReport("endpoints", results={
+        # Faster, because every request failed
+        "items.restore_item": _result(rps=500, p95=2, errors=100),
+        "items.toggle_complete": _result(rps=100, p95=10),
+    })
+
+    regressions = compare_reports(baseline, current, threshold=0.15)
+
+    assert scenario_errors(current) == ["items.restore_item: 100 of 100 requests failed"]
+    assert regressions == [
+        "items.restore_item: 100 of 100 requests failed",
+        "items.toggle_complete: baseline had 3 errors, not comparable",
+    ]
+
+
+def test_report_roundtrip(tmp_path):
+    """Test reports survive a save/load cycle."""
+    report = BenchmarkReport("endpoints", meta={"commit": "abc"}, results={
+        "items.get_items": _result(rps=100, p95=10),
+    })
+    path = tmp_path / "report.json"
+
+    report.save(path)
+    loaded = BenchmarkReport.load(path)
+
+    assert loaded.meta == {"commit": "abc"}
+    assert loaded.results == report.results
+
+
+def test_policy_benchmark_reports_every_scenario():
+    """Test the policy benchmark runs each scenario and reports per-decision times."""
+    from argparse import Namespace
+
+    from benchmarks.policy import run
+
+    report, medians_us = run(Namespace(decisions=200, batch=50))
+
+    assert set(report.results) == {
+        "role_only", "conditional.uncached", "conditional.memoized", "batch",
+    }
+    assert report.results["batch"].requests == 200
+    assert all(median > 0 for median in medians_us.values())
@@ -0,0 +1,83 @@
+"""Tests for cross-worker list event broadcasting."""
+import asyncio
+import json
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.services import broadcast, events, outbox
+from app.services.events import EventHub
+from app.services.item_service import create_item
+
+# Postgres for the LISTEN/NOTIFY round trip, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def test_oversized_payload_sent_by_reference():
+    """Test messages over the NOTIFY limit carry only the item id."""
+    small = {"list_id": 1, "type": events.ITEM_UPDATED, "data": {"id": 7, "text": "x"}}
+    large = {**small, "data": {"id": 7, "description": "x" * 9000}}
+
+    assert json.loads(broadcast.encode_message(small)) == small
+    assert json.loads(broadcast.encode_message(large)) == {
+        "list_id": 1, "type": events.ITEM_UPDATED, "ref": 7,
+    }
+
+
+def test_coalesce_keeps_latest_update_per_item():
+    """Test superseded updates in a burst are dropped; lifecycle events are kept."""
+    def message(event_type, item_id, text=""):
+        return {"list_id": 1, "type": event_type, "data": {"id": item_id, "text": text}}
+
+    burst = [
+        message(events.ITEM_CREATED, 1),
+        message(events.ITEM_UPDATED, 1, "a"),
+        message(events.ITEM_UPDATED, 2, "b"),
+        message(events.ITEM_UPDATED, 1, "c"),
+        message(events.ITEM_DELETED, 2),
+    ]
+
+    assert broadcast.coalesce(burst) == [burst[0], burst[2], burst[3], burst[4]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_notify_reaches_every_worker(make_list):
+    """Test a commit is delivered to each worker's hub, large items by reference."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    workers = [
+        broadcast.Broadcaster(POSTGRES_URL, session_maker, hub=EventHub(heartbeat_seconds=60))
+        for _ in range(2)
+    ]
+    relay = outbox.Relay(session_maker, [broadcast.deliver], poll_ms=50)
+    for worker in workers:
+        worker.start()
+    relay.start()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(worker.connected.wait() for worker in workers)), timeout=5
+        )
+        async with session_maker() as session:
+            todo_list = await make_list(session)
+            subscriptions = [worker.hub.subscribe(todo_list.id) for worker in workers]
+            # 2000 non-ASCII characters escape to ~12KB of JSON
+            item = await create_item(
+                session, todo_list.id, "Milk", "user-1", description="é" * 2000
+            )
+
+        for subscription in subscriptions:
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=5)
+            assert event.type == events.ITEM_CREATED
+            assert event.data["id"] == item.id
+            assert event.data["description"] == "é" * 2000
+    finally:
+        await relay.stop()
+        for worker in workers:
+            await worker.stop()
+        await engine.dispose()
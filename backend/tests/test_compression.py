@@ -0,0 +1,142 @@
+"""Tests for the response compression middleware."""
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.api.etag import if_match_versions
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware, choose_encoding
+
+ROWS = [{"id": n, "text": f"Item {n}", "created_by": "user-1"} for n in range(2000)]
+
+
+async def _large(request):
+    return JSONResponse(ROWS, headers={"ETag": 'W/"items-1-7"'})
+
+
+async def _item(request):
+    return JSONResponse(ROWS, headers={"ETag": '"item-5-3"'})
+
+
+async def _small(request):
+    return JSONResponse({"ok": True})
+
+
+async def _stream(request):
+    async def rows():
+        for row in ROWS:
+            yield (json.dumps(row) + "\n").encode()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+async def _events(request):
+    return StreamingResponse(iter([b"data: x\n\n" * 500]), media_type="text/event-stream")
+
+
+def _client(**options) -> AsyncClient:
+    app = Starlette(
+        routes=[
+            Route("/large", _large),
+            Route("/item", _item),
+            Route("/small", _small),
+            Route("/stream", _stream),
+            Route("/events", _events),
+        ]
+    )
+    return AsyncClient(
+        transport=ASGITransport(app=CompressionMiddleware(app, **options)), base_url="http://test"
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    compression.cache.clear()
+    yield
+    compression.cache.clear()
+
+
+def test_choose_encoding_honours_q_values():
+    """Test the accepted encoding with the highest q-value is chosen."""
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("deflate, identity") is None
+    assert choose_encoding("*") == next(iter(compression.ENCODERS))
+    assert choose_encoding("") is None
+
+
+@pytest.mark.asyncio
+async def test_only_large_responses_are_compressed():
+    """Test bodies above the threshold are gzipped and small ones are not."""
+    async with _client(min_size=1024) as client:
+        large = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+        small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/large", headers={"Accept-Encoding": "identity"})
+        events = await client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert int(large.headers["content-length"]) < len(json.dumps(ROWS)) / 4
+    assert large.json() == ROWS
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in plain.headers
+    assert "content-encoding" not in events.headers
+
+
+@pytest.mark.asyncio
+async def test_streamed_responses_are_compressed_as_they_stream():
+    """Test a large streamed body is compressed in flushed chunks."""
+    async with _client(chunk_size=4096) as client:
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == ROWS
+
+
+@pytest.mark.asyncio
+async def test_repeated_representations_reuse_compressed_bytes(monkeypatch):
+    """Test a body sent with an ETag is compressed once, off the loop when large."""
+    calls = []
+    offloaded = []
+    real_compress, real_to_thread = compression.compress, compression.asyncio.to_thread
+
+    def counting_compress(encoding, body):
+        calls.append(encoding)
+        return real_compress(encoding, body)
+
+    async def to_thread(func, *args):
+        offloaded.append(func)
+        return await real_to_thread(func, *args)
+
+    monkeypatch.setattr(compression, "compress", counting_compress)
+    monkeypatch.setattr(compression.asyncio, "to_thread", to_thread)
+    async with _client(offload_size=1024) as client:
+        responses = [
+            await client.get("/large", headers={"Accept-Encoding": "gzip"}) for _ in range(3)
+        ]
+
+    assert calls == ["gzip"]
+    assert len(offloaded) == 1
+    assert all(response.json() == ROWS for response in responses)
+
+
+@pytest.mark.asyncio
+async def test_compressed_responses_do_not_reuse_a_strong_etag():
+    """Test a strong ETag gets the encoding appended, which If-Match still accepts."""
+    async with _client() as client:
+        compressed = await client.get("/item", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/item", headers={"Accept-Encoding": "identity"})
+        weak = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["etag"] == '"item-5-3-gzip"'
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert plain.headers["etag"] == '"item-5-3"'
+    assert weak.headers["etag"] == 'W/"items-1-7"'
+    request = Request({"type": "http", "headers": [(b"if-match", b'"item-5-3-gzip"')]})
+    assert if_match_versions(request, 5) == {3}
@@ -0,0 +1,60 @@
+"""Tests for the synthetic dataset generator."""
+import pytest
+from sqlalchemy import text
+
+from benchmarks.dataset import (
+    LISTS_PER_CHUNK,
+    DatasetSpec,
+    SyntheticDataset,
+    _copy_value,
+    load_async,
+)
+
+
+def test_same_seed_same_rows():
+    """Test generation is deterministic per seed."""
+    spec = DatasetSpec(users=50, items=2_000, seed=7)
+
+    first, second = SyntheticDataset(spec), SyntheticDataset(spec)
+    other = SyntheticDataset(DatasetSpec(users=50, items=2_000, seed=8))
+
+    assert list(first.lists()) == list(second.lists())
+    assert list(first.items()) == list(second.items())
+    assert list(first.items()) != list(other.items())
+
+
+def test_item_count_exact_and_chunks_match_serial():
+    """Test list sizes sum to the requested count and chunked output matches serial."""
+    dataset = SyntheticDataset(DatasetSpec(users=600, items=20_000, mean_lists_per_user=4))
+    assert dataset.chunk_count > 1
+
+    serial = list(dataset.items())
+    by_chunk = [row for chunk in range(dataset.chunk_count) for row in dataset.items([chunk])]
+
+    assert len(serial) == 20_000
+    assert by_chunk == serial
+    assert max(row[0] for row in dataset.items([0])) < dataset.spec.first_list_id + LISTS_PER_CHUNK
+
+
+def test_copy_value_escaping():
+    """Test COPY text encoding of NULLs, booleans and control characters."""
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(True) == "t"
+    assert _copy_value("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+
+
+@pytest.mark.asyncio
+async def test_load_async(sqlite_engine):
+    """Test the portable loader inserts every list, owner membership and item."""
+    dataset = SyntheticDataset(DatasetSpec(users=20, items=500))
+
+    async with sqlite_engine.begin() as conn:
+        counts = await load_async(conn, dataset, batch_size=100)
+        stored = (await conn.execute(text("SELECT COUNT(*) FROM todo_items"))).scalar_one()
+
+    assert counts == {
+        "todo_lists": dataset.list_count,
+        "list_members": dataset.list_count,
+        "todo_items": 500,
+    }
+    assert stored == 500
@@ -0,0 +1,120 @@
+"""Tests for request deadlines and their propagation to the database."""
+import os
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.deps import get_db
+from app.api.v1.endpoints import items as items_endpoints
+from app.core import deadline
+from app.core.deadline import DeadlineExceeded
+from app.db.instrumentation import TimedQueuePool
+from app.main import app
+from app.services.list_service import create_list
+
+# Postgres for statement_timeout, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def test_budget_prefers_the_header_up_to_the_max(monkeypatch):
+    """Test the header overrides the route budget but cannot exceed the cap."""
+    monkeypatch.setattr(deadline.settings, "request_timeout_seconds", 15.0)
+    monkeypatch.setattr(deadline.settings, "request_timeout_max_seconds", 60.0)
+    assert deadline.budget(None, None) == 15.0
+    assert deadline.budget(None, 30.0) == 30.0
+    assert deadline.budget(None, 0) is None
+    assert deadline.budget("2.5", 30.0) == 2.5
+    assert deadline.budget("3600", None) == 60.0
+    assert deadline.budget("soon", 30.0) == 30.0
+
+
+@pytest.mark.asyncio
+async def test_requests_out_of_time_get_504(db_session, monkeypatch):
+    """Test an exhausted budget fails fast and a timeout in items.py is a 504, not a 500."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+
+    async def slow_items(db, list_id, include_archived=False):
+        raise DeadlineExceeded("statement")
+
+    monkeypatch.setattr(items_endpoints, "get_items_by_list", slow_items)
+    app.dependency_overrides[get_db] = lambda: db_session
+    headers = {"X-User-Id": "owner"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            spent = await client.get(
+                "/api/v1/lists", headers={**headers, "X-Request-Timeout": "0"}
+            )
+            timed_out = await client.get(f"/api/v1/lists/{todo_list.id}/items", headers=headers)
+            ok = await client.get("/api/v1/lists", headers={**headers, "X-Request-Timeout": "5"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert spent.status_code == 504
+    assert timed_out.status_code == 504
+    assert timed_out.json() == {"detail": "Request deadline exceeded"}
+    assert ok.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_pool_checkout_waits_no_longer_than_the_deadline(tmp_path):
+    """Test a checkout behind a busy pool gives up when the request's time is up."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=30,
+    )
+    try:
+        async with engine.connect() as busy:
+            await busy.execute(text("SELECT 1"))
+            assert engine.pool._timeout == 30
+
+            token = deadline.start(time.perf_counter(), 0.1)
+            try:
+                start = time.perf_counter()
+                with pytest.raises(DeadlineExceeded):
+                    async with engine.connect():
+                        pass
+                assert time.perf_counter() - start < 1
+                with pytest.raises(DeadlineExceeded):
+                    async with engine.connect():
+                        pass
+                # As engine.dispose() does within a request
+                recreated = engine.pool.recreate()
+            finally:
+                deadline.reset(token)
+        assert recreated._timeout == 30
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_postgres_statements_are_cancelled_at_the_deadline():
+    """Test each transaction gets the remaining budget as statement_timeout."""
+    engine = create_async_engine(POSTGRES_URL)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as db:
+            assert (await db.scalar(text("SHOW statement_timeout"))) == "0"
+
+        token = deadline.start(time.perf_counter(), 0.3)
+        try:
+            async with session_maker() as db:
+                timeout_ms = int((await db.scalar(text("SHOW statement_timeout"))).rstrip("ms"))
+                assert 0 < timeout_ms <= 300
+                await db.commit()
+                start = time.perf_counter()
+                with pytest.raises(DeadlineExceeded):
+                    await db.execute(text("SELECT pg_sleep(5)"))
+                assert time.perf_counter() - start < 1
+        finally:
+            deadline.reset(token)
+
+        # The timeout was local to the request's transactions
+        async with session_maker() as db:
+            assert (await db.scalar(text("SHOW statement_timeout"))) == "0"
+    finally:
+        await engine.dispose()
@@ -0,0 +1,164 @@
+"""Tests for the list event hub and SSE endpoint."""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.database import get_db
+from app.main import app
+from app.models.todo_list import TodoList
+from app.services import broadcast, events
+from app.services.events import EventHub
+from app.services.item_service import create_item
+from app.services.membership import remove_member, set_member_role
+from app.services.outbox import Relay
+
+
+async def _next_frame(stream) -> str:
+    return await asyncio.wait_for(stream.__anext__(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_stream_delivers_list_events_only():
+    """Test subscribers receive events for their list and nothing else."""
+    hub = EventHub(heartbeat_seconds=60)
+    stream = hub.stream(1)
+    assert (await _next_frame(stream)).startswith("retry:")
+
+    hub.publish(2, events.ITEM_CREATED, {"id": 20})
+    hub.publish(1, events.ITEM_UPDATED, {"id": 10})
+
+    assert await _next_frame(stream) == (
+        f'id: {hub.epoch}-2\nevent: item.updated\ndata: {{"id": 10}}\n\n'
+    )
+    await stream.aclose()
+    assert hub.subscriptions == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_evicted():
+    """Test a full queue evicts the subscriber and ends its stream."""
+    hub = EventHub(queue_size=2, heartbeat_seconds=60)
+    stream = hub.stream(1)
+    await _next_frame(stream)
+
+    for n in range(3):
+        hub.publish(1, events.ITEM_UPDATED, {"n": n})
+
+    assert hub.subscriptions == {}
+    with pytest.raises(StopAsyncIteration):
+        await _next_frame(stream)
+
+
+@pytest.mark.asyncio
+async def test_resume_from_last_event_id():
+    """Test reconnects replay missed events, or reset when history is gone."""
+    hub = EventHub(history_size=3, heartbeat_seconds=60)
+    for n in range(3):
+        hub.publish(1, events.ITEM_UPDATED, {"n": n})
+
+    stream = hub.stream(1, last_event_id=f"{hub.epoch}-1")
+    await _next_frame(stream)
+    assert (await _next_frame(stream)).startswith(f"id: {hub.epoch}-2\n")
+    assert (await _next_frame(stream)).startswith(f"id: {hub.epoch}-3\n")
+    await stream.aclose()
+
+    hub.publish(1, events.ITEM_UPDATED, {"n": 3})
+    # Evicted from the ring buffer, or issued by another worker
+    for last_event_id in (f"{hub.epoch}-0", "0badc0de-4"):
+        stream = hub.stream(1, last_event_id=last_event_id)
+        await _next_frame(stream)
+        assert "event: reset" in await _next_frame(stream)
+        await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat():
+    """Test idle streams receive keep-alive comments."""
+    hub = EventHub(heartbeat_seconds=0.01)
+    stream = hub.stream(1)
+    await _next_frame(stream)
+
+    assert await _next_frame(stream) == ": keep-alive\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_item_service_publishes(db_session, sqlite_engine, monkeypatch):
+    """Test committed item changes reach the list's subscribers through the outbox."""
+    hub = EventHub(heartbeat_seconds=60)
+    monkeypatch.setattr(events, "hub", hub)
+    now = datetime.now(timezone.utc)
+    todo_list = TodoList(name="Groceries", owner_id="user-1", created_at=now, updated_at=now)
+    db_session.add(todo_list)
+    await db_session.commit()
+    subscription = hub.subscribe(todo_list.id)
+
+    item = await create_item(db_session, todo_list.id, "Milk", "user-1")
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    await Relay(session_maker, [broadcast.deliver]).run_once()
+
+    event = subscription.queue.get_nowait()
+    assert event.type == events.ITEM_CREATED
+    assert event.data["id"] == item.id
+    assert event.data["text"] == "Milk"
+    hub.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_removing_a_member_ends_their_stream(db_session, sqlite_engine, monkeypatch):
+    """Test a member removed from a list stops receiving its events; others carry on."""
+    hub = EventHub(heartbeat_seconds=60)
+    monkeypatch.setattr(events, "hub", hub)
+    now = datetime.now(timezone.utc)
+    todo_list = TodoList(name="Groceries", owner_id="user-1", created_at=now, updated_at=now)
+    db_session.add(todo_list)
+    await db_session.commit()
+    for member in ("viewer", "editor"):
+        await set_member_role(db_session, todo_list.id, member, "viewer", "user-1")
+    relay = Relay(
+        async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False),
+        [broadcast.deliver],
+    )
+    await relay.run_once()
+    removed = hub.stream(todo_list.id, user_id="viewer")
+    remaining = hub.stream(todo_list.id, user_id="editor")
+    await _next_frame(removed)
+    await _next_frame(remaining)
+
+    assert await remove_member(db_session, todo_list.id, "viewer", "user-1") == (True, None)
+    await relay.run_once()
+
+    assert "event: member.removed" in await _next_frame(removed)
+    with pytest.raises(StopAsyncIteration):
+        await _next_frame(removed)
+    assert "event: member.removed" in await _next_frame(remaining)
+    await remaining.aclose()
+    assert hub.subscriptions == {}
+
+
+@pytest.mark.asyncio
+async def test_events_endpoint_checks_access(db_session):
+    """Test the stream is refused for missing or foreign lists."""
+    now = datetime.now(timezone.utc)
+    todo_list = TodoList(name="Private", owner_id="owner", created_at=now, updated_at=now)
+    db_session.add(todo_list)
+    await db_session.commit()
+    app.dependency_overrides[get_db] = lambda: db_session
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            missing = await client.get(
+                "/api/v1/lists/999/events", headers={"X-User-Id": "owner"}
+            )
+            foreign = await client.get(
+                f"/api/v1/lists/{todo_list.id}/events", headers={"X-User-Id": "intruder"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert missing.status_code == 404
+    assert foreign.status_code == 403
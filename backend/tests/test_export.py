@@ -0,0 +1,117 @@
+"""Tests for the streaming export."""
+import csv
+import io
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.database import get_session_maker
+from app.main import app
+from app.models.todo_item import Priority, TodoItem
+from app.models.todo_list import TodoList
+from app.services import export_service
+
+
+async def _seed(session) -> tuple[TodoList, TodoList]:
+    now = datetime.now(timezone.utc)
+    groceries = TodoList(name="Groceries", owner_id="user-1", created_at=now, updated_at=now)
+    empty = TodoList(name="Empty", owner_id="user-1", created_at=now, updated_at=now)
+    other = TodoList(name="Private", owner_id="user-2", created_at=now, updated_at=now)
+    session.add_all([groceries, empty, other])
+    await session.commit()
+    session.add_all(
+        [
+            TodoItem(list_id=groceries.id, text="Milk", tags='["dairy"]', created_by="user-1",
+                     priority=Priority.HIGH, due_date=date(2026, 1, 2)),
+            TodoItem(list_id=groceries.id, text="Bread", created_by="user-1"),
+            TodoItem(list_id=groceries.id, text="Gone", created_by="user-1", deleted_at=now),
+            TodoItem(list_id=other.id, text="Secret", created_by="user-2"),
+        ]
+    )
+    await session.commit()
+    return groceries, empty
+
+
+async def _export(sqlite_engine, format: str):
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(
+                "/api/v1/export", params={"format": format}, headers={"X-User-Id": "user-1"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_lists_each_list_then_its_items(db_session, sqlite_engine):
+    """Test the NDJSON export covers only the caller's lists and live items."""
+    groceries, empty = await _seed(db_session)
+
+    response = await _export(sqlite_engine, "ndjson")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["type"], line.get("name") or line.get("text")) for line in lines] == [
+        ("list", "Groceries"),
+        ("item", "Milk"),
+        ("item", "Bread"),
+        ("list", "Empty"),
+    ]
+    milk = lines[1]
+    assert milk["list_id"] == groceries.id
+    assert milk["tags"] == ["dairy"]
+    assert milk["priority"] == "high"
+    assert milk["due_date"] == "2026-01-02"
+
+
+@pytest.mark.asyncio
+async def test_csv_export_has_a_row_per_item(db_session, sqlite_engine):
+    """Test the CSV export has a header, a row per item and a row per empty list."""
+    groceries, empty = await _seed(db_session)
+
+    response = await _export(sqlite_engine, "csv")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["list_name"], row["item_text"]) for row in rows] == [
+        ("Groceries", "Milk"),
+        ("Groceries", "Bread"),
+        ("Empty", ""),
+    ]
+    assert json.loads(rows[0]["item_tags"]) == ["dairy"]
+
+
+@pytest.mark.asyncio
+async def test_export_reads_and_encodes_in_batches(db_session):
+    """Test rows are fetched and encoded batch_size at a time."""
+    groceries, _ = await _seed(db_session)
+    db_session.add_all(
+        [TodoItem(list_id=groceries.id, text=f"Item {n}", created_by="user-1") for n in range(7)]
+    )
+    await db_session.commit()
+
+    chunks = [
+        chunk
+        async for chunk in export_service.export_chunks(
+            db_session, "user-1", export_service.NDJSON, batch_size=3
+        )
+    ]
+
+    # 9 items of Groceries and the empty list's row, 3 rows per chunk
+    assert len(chunks) == 4
+    assert sum(chunk.count(b"\n") for chunk in chunks) == 2 + 9
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_unknown_formats(sqlite_engine):
+    """Test an unsupported format is a validation error."""
+    response = await _export(sqlite_engine, "xml")
+
+    assert response.status_code == 422
@@ -0,0 +1,183 @@
+"""Tests for Idempotency-Key support on create endpoints."""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from starlette.requests import Request
+
+from app.api.deps import get_db
+from app.api.idempotency import REPLAYED_HEADER, idempotent
+from app.main import app
+from app.models.idempotency import IdempotencyKey
+from app.models.todo_item import TodoItem
+from app.schemas.todo_list import TodoListCreate, TodoListResponse
+from app.services import idempotency
+from app.services.list_service import create_list
+
+# Postgres for racing duplicates through real transactions, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def _request(path: str = "/api/v1/lists") -> Request:
+    return Request({"type": "http", "method": "POST", "path": path, "headers": [], "query_string": b""})
+
+
+@pytest.mark.asyncio
+async def test_retried_creates_replay_the_first_response(db_session):
+    """Test a retry gets the stored response back and creates nothing."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    user = {"X-User-Id": "mobile"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.post(
+                "/api/v1/lists", json={"name": "Trip"}, headers={**user, "Idempotency-Key": "list-1"}
+            )
+            retry = await client.post(
+                "/api/v1/lists", json={"name": "Trip"}, headers={**user, "Idempotency-Key": "list-1"}
+            )
+            list_id = first.json()["id"]
+            items = [
+                await client.post(
+                    f"/api/v1/lists/{list_id}/items",
+                    json={"text": "Passport"},
+                    headers={**user, "Idempotency-Key": "item-1"},
+                )
+                for _ in range(2)
+            ]
+            reused = await client.post(
+                f"/api/v1/lists/{list_id}/items",
+                json={"text": "Tickets"},
+                headers={**user, "Idempotency-Key": "item-1"},
+            )
+            # Keys are per user
+            other = await client.post(
+                "/api/v1/lists",
+                json={"name": "Trip"},
+                headers={"X-User-Id": "other", "Idempotency-Key": "list-1"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert REPLAYED_HEADER not in first.headers
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert [response.status_code for response in items] == [201, 201]
+    assert items[1].json() == items[0].json()
+    assert reused.status_code == 422
+    assert other.status_code == 201 and other.json()["id"] != list_id
+    count = await db_session.scalar(select(func.count()).select_from(TodoItem))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_waits_for_the_request_in_flight(db_session):
+    """Test a duplicate arriving mid-request gets the first request's response."""
+    started = asyncio.Event()
+    proceed = asyncio.Event()
+    calls = []
+
+    async def create():
+        calls.append(1)
+        started.set()
+        await proceed.wait()
+        return await create_list(db_session, "Trip", "mobile")
+
+    payload = TodoListCreate(name="Trip")
+    first = asyncio.create_task(
+        idempotent(db_session, _request(), "mobile", "k", payload, create, TodoListResponse)
+    )
+    await started.wait()
+    duplicate = asyncio.create_task(
+        idempotent(db_session, _request(), "mobile", "k", payload, create, TodoListResponse)
+    )
+    await asyncio.sleep(0.1)
+    assert not duplicate.done()
+    proceed.set()
+    first_response, duplicate_response = await asyncio.gather(first, duplicate)
+
+    assert calls == [1]
+    assert duplicate_response.body == first_response.body
+    assert duplicate_response.headers[REPLAYED_HEADER] == "true"
+
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_its_key(db_session):
+    """Test a retry after a failure runs the request again."""
+    payload = TodoListCreate(name="Trip")
+
+    async def fail():
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        await idempotent(db_session, _request(), "mobile", "k", payload, fail, TodoListResponse)
+    response = await idempotent(
+        db_session,
+        _request(),
+        "mobile",
+        "k",
+        payload,
+        lambda: create_list(db_session, "Trip", "mobile"),
+        TodoListResponse,
+    )
+    assert response.status_code == 201
+    assert REPLAYED_HEADER not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_expired_keys_in_batches(db_session):
+    """Test purging removes every expired key and keeps live ones."""
+    now = datetime(2026, 10, 19, 12, 0)
+    for n in range(5):
+        db_session.add(
+            IdempotencyKey(
+                id=idempotency.key_digest("mobile", str(n)),
+                fingerprint=b"\x00" * 16,
+                status_code=201,
+                response="{}",
+                expires_at=now + timedelta(minutes=1 if n == 0 else -1),
+            )
+        )
+    await db_session.commit()
+
+    assert await idempotency.purge_expired(db_session, batch_size=2, now=now) == 4
+    remaining = (await db_session.execute(select(IdempotencyKey.id))).scalars().all()
+    assert remaining == [idempotency.key_digest("mobile", "0")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_concurrent_duplicates_create_once_on_postgres():
+    """Test duplicates racing on separate connections run the create once."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    user_id = f"mobile-{os.urandom(4).hex()}"
+    calls = []
+
+    async def attempt():
+        async with session_maker() as db:
+            async def create():
+                calls.append(1)
+                await asyncio.sleep(0.2)
+                return await create_list(db, "Trip", user_id)
+
+            return await idempotent(
+                db, _request(), user_id, "k", TodoListCreate(name="Trip"), create, TodoListResponse
+            )
+
+    try:
+        responses = await asyncio.gather(*(attempt() for _ in range(4)))
+    finally:
+        await engine.dispose()
+
+    assert calls == [1]
+    assert len({response.body for response in responses}) == 1
+    assert sum(REPLAYED_HEADER in response.headers for response in responses) == 3
@@ -0,0 +1,242 @@
+"""Tests for bulk item imports."""
+import json
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.api.deps import get_db
+from app.core.config import settings
+from app.db.database import get_session_maker
+from app.main import app
+from app.models.import_job import ImportJob
+from app.models.todo_item import Priority, TodoItem
+from app.services import import_service
+
+# Postgres for the COPY path, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+async def _items(session, list_id: int) -> list[TodoItem]:
+    result = await session.execute(
+        select(TodoItem).where(TodoItem.list_id == list_id).order_by(TodoItem.id)
+    )
+    return list(result.scalars())
+
+
+async def _post(db_session, sqlite_engine, url: str, body: bytes, user: str = "user-1"):
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(url, content=_chunks(body, 64), headers={"X-User-Id": user})
+            job = None
+            if "location" in response.headers:
+                job = await client.get(response.headers["location"], headers={"X-User-Id": user})
+            return response, job
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_are_parsed_across_chunks():
+    """Test CSV records spanning chunks and lines are read with their first line."""
+    data = (
+        "﻿Text,Description,Tags,Priority\r\n"
+        'Milk,"Two ""large""\nbottles","dairy, fresh",high\r\n'
+        "\r\n"
+        'Bread,,"[""bakery""]",\r\n'
+        '"Open\n'
+    ).encode()
+
+    rows = [row async for row in import_service.parse_rows(_chunks(data), "csv", 100)]
+
+    assert rows == [
+        (2, {"text": "Milk", "description": 'Two "large"\nbottles',
+             "tags": ["dairy", "fresh"], "priority": "high"}),
+        (5, {"text": "Bread", "tags": ["bakery"]}),
+        (6, "Unterminated quoted field"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_overlong_ndjson_lines_are_rejected():
+    """Test lines past the limit are rejected rows, read on from the next line."""
+    milk, bread = json.dumps({"text": "Milk"}), json.dumps({"text": "Bread"})
+    data = f"{milk}\n{'x' * 200}\n{bread}\n{'y' * 200}".encode()
+
+    rows = [row async for row in import_service.parse_rows(_chunks(data), "ndjson", 40)]
+    unbroken = [row async for row in import_service.parse_rows(_chunks(b"z" * 10_000), "ndjson", 40)]
+
+    assert rows == [
+        (1, {"text": "Milk"}),
+        (2, "Line longer than 40 characters"),
+        (3, {"text": "Bread"}),
+        (4, "Line longer than 40 characters"),
+    ]
+    assert unbroken == [(1, "Line longer than 40 characters")]
+
+
+@pytest.mark.asyncio
+async def test_an_unterminated_csv_quote_fails_the_import(
+    db_session, sqlite_engine, monkeypatch, make_list
+):
+    """Test a CSV record running past the limit fails the import at the line it starts on."""
+    monkeypatch.setattr(settings, "import_max_line_length", 100)
+    list_id = (await make_list(db_session)).id
+    body = ("Text\nMilk\n\"Bread\n" + "Eggs\n" * 100).encode()
+
+    response, _ = await _post(
+        db_session, sqlite_engine, f"/api/v1/import?list_id={list_id}&format=csv", body
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Line 3: record longer than 100 characters"
+    job = (await db_session.execute(select(ImportJob))).scalar_one()
+    assert (job.status, job.detail) == ("failed", response.json()["detail"])
+    assert await _items(db_session, list_id) == []
+
+
+@pytest.mark.asyncio
+async def test_ndjson_import_adds_valid_rows_and_reports_the_rest(
+    db_session, sqlite_engine, make_list
+):
+    """Test valid rows are imported in order and each rejected row is reported."""
+    todo_list = await make_list(db_session)
+    version = todo_list.version
+    body = "\n".join(
+        [
+            json.dumps({"text": "Milk", "tags": ["dairy"], "priority": "high"}),
+            json.dumps({"text": ""}),
+            "{not json",
+            json.dumps({"type": "list", "name": "Skipped"}),
+            json.dumps({"type": "item", "text": "Bread", "due_date": "2026-11-01"}),
+            json.dumps({"text": "Eggs", "priority": "urgent"}),
+        ]
+    ).encode()
+
+    response, job = await _post(
+        db_session, sqlite_engine, f"/api/v1/import?list_id={todo_list.id}", body
+    )
+
+    assert response.status_code == 201
+    result = response.json()
+    assert result["status"] == "completed"
+    assert (result["rows_read"], result["rows_imported"], result["rows_failed"]) == (5, 2, 3)
+    assert [error["line"] for error in result["errors"]] == [2, 3, 6]
+    assert result["errors"][1]["errors"] == ["Invalid JSON"]
+    assert result["errors"][2]["errors"][0].startswith("priority:")
+    assert job.json() == result
+
+    items = await _items(db_session, todo_list.id)
+    assert [item.text for item in items] == ["Milk", "Bread"]
+    assert items[0].priority == Priority.HIGH
+    assert items[0].get_tags() == ["dairy"]
+    assert items[0].created_by == "user-1"
+    assert str(items[1].due_date) == "2026-11-01"
+    await db_session.refresh(todo_list)
+    assert todo_list.version == version + 1
+
+
+@pytest.mark.asyncio
+async def test_an_export_can_be_imported(db_session, sqlite_engine, make_list):
+    """Test a CSV export's item rows import into another list."""
+    source = await make_list(db_session)
+    db_session.add_all(
+        [TodoItem(list_id=source.id, text=f"Item {n}", tags='["x"]', created_by="user-1") for n in range(3)]
+    )
+    await db_session.commit()
+    target = await make_list(db_session)
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            export = await client.get("/api/v1/export?format=csv", headers={"X-User-Id": "user-1"})
+    finally:
+        app.dependency_overrides.clear()
+
+    response, _ = await _post(
+        db_session, sqlite_engine, f"/api/v1/import?list_id={target.id}&format=csv", export.content
+    )
+
+    assert response.json()["rows_imported"] == 3
+    # The empty target list's own export row has no item text
+    assert response.json()["rows_failed"] == 1
+    items = await _items(db_session, target.id)
+    assert [(item.text, item.get_tags()) for item in items] == [(f"Item {n}", ["x"]) for n in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_a_failed_import_adds_nothing(db_session, sqlite_engine, make_list):
+    """Test an upload that cannot be decoded fails the job and imports no rows."""
+    list_id = (await make_list(db_session)).id
+    body = ("\n".join(json.dumps({"text": f"Item {n}"}) for n in range(50)) + "\n").encode() + b"\xff\xfe"
+
+    response, _ = await _post(db_session, sqlite_engine, f"/api/v1/import?list_id={list_id}", body)
+
+    assert response.status_code == 400
+    job = (await db_session.execute(select(ImportJob))).scalar_one()
+    assert job.status == "failed"
+    assert "utf-8" in job.detail
+    assert await _items(db_session, list_id) == []
+
+
+@pytest.mark.asyncio
+async def test_imports_need_access_to_the_list(db_session, sqlite_engine, make_list):
+    """Test other users can neither import into a list nor see its imports."""
+    url = f"/api/v1/import?list_id={(await make_list(db_session)).id}"
+
+    denied, _ = await _post(db_session, sqlite_engine, url, b'{"text": "x"}', "user-2")
+    done, own = await _post(db_session, sqlite_engine, url, b'{"text": "x"}')
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            other = await client.get(done.headers["location"], headers={"X-User-Id": "user-2"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert denied.status_code in (403, 404)
+    assert done.status_code == 201
+    assert own.status_code == 200
+    assert other.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_rows_are_staged_with_copy_on_postgres(make_list):
+    """Test an import through COPY on Postgres, with progress saved per batch."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    user_id = f"importer-{os.urandom(4).hex()}"
+    body = "\n".join(
+        json.dumps({"text": f"Item {n}", "priority": "low", "due_date": "2026-12-01"})
+        for n in range(25)
+    ).encode()
+    try:
+        async with session_maker() as db:
+            todo_list = await make_list(db, user_id)
+            job = await import_service.create_job(session_maker, user_id, todo_list.id, "ndjson")
+            await import_service.run_import(
+                db, session_maker, job, import_service.parse_rows(_chunks(body), "ndjson", 100),
+                batch_size=10, max_errors=10,
+            )
+            job = await import_service.get_job(db, job.id, user_id)
+            items = await _items(db, todo_list.id)
+    finally:
+        await engine.dispose()
+
+    assert (job.status, job.rows_imported) == ("completed", 25)
+    assert [item.text for item in items] == [f"Item {n}" for n in range(25)]
+    assert {item.priority for item in items} == {Priority.LOW}
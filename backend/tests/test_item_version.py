@@ -0,0 +1,107 @@
+"""Tests for optimistic concurrency on item mutations."""
+from datetime import datetime, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.deps import get_db
+from app.main import app
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+from app.services.item_service import (
+    VersionConflict,
+    create_item,
+    get_item,
+    toggle_item_completion,
+    update_item,
+)
+
+
+async def _make_item(session, owner="user-1") -> TodoItem:
+    now = datetime.now(timezone.utc)
+    todo_list = TodoList(name="Groceries", owner_id=owner, created_at=now, updated_at=now)
+    session.add(todo_list)
+    await session.commit()
+    return await create_item(session, todo_list.id, "Milk", owner)
+
+
+@pytest.mark.asyncio
+async def test_if_match_applies_only_to_the_current_version(db_session):
+    """Test a stale If-Match gets 412 with the current item and changes nothing."""
+    item = await _make_item(db_session)
+    assert item.version == 1
+    app.dependency_overrides[get_db] = lambda: db_session
+    headers = {"X-User-Id": "user-1"}
+    etag = f'"item-{item.id}-1"'
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            toggled = await client.patch(
+                f"/api/v1/items/{item.id}/toggle-complete", headers={**headers, "If-Match": etag}
+            )
+            stale = await client.put(
+                f"/api/v1/items/{item.id}",
+                json={"text": "Oat milk"},
+                headers={**headers, "If-Match": etag},
+            )
+            weak = await client.delete(
+                f"/api/v1/items/{item.id}", headers={**headers, "If-Match": f"W/{toggled.headers['etag']}"}
+            )
+            current = await client.put(
+                f"/api/v1/items/{item.id}",
+                json={"text": "Oat milk"},
+                headers={**headers, "If-Match": f'"item-{item.id}-1", {toggled.headers["etag"]}'},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert toggled.status_code == 200
+    assert toggled.json()["version"] == 2
+    assert toggled.headers["etag"] == f'"item-{item.id}-2"'
+    assert stale.status_code == 412
+    assert stale.headers["etag"] == toggled.headers["etag"]
+    assert stale.json()["item"]["status"] == "completed"
+    assert stale.json()["item"]["text"] == "Milk"
+    assert weak.status_code == 412
+    assert current.status_code == 200
+    assert current.json()["text"] == "Oat milk" and current.json()["version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_write_makes_the_update_conflict(db_session):
+    """Test an If-Match update based on a version another writer replaced is not written."""
+    item = await _make_item(db_session)
+    # Read in this session before another writer changes the row
+    await get_item(db_session, item.id)
+    await db_session.execute(
+        update(TodoItem)
+        .where(TodoItem.id == item.id)
+        .values(text="Soy milk", version=TodoItem.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+
+    with pytest.raises(VersionConflict) as exc_info:
+        await update_item(db_session, item.id, "Oat milk", "user-1", if_match={1})
+
+    assert exc_info.value.item.text == "Soy milk"
+    assert exc_info.value.item.version == 2
+
+
+@pytest.mark.asyncio
+async def test_racing_writes_without_if_match_both_apply(db_session, sqlite_engine):
+    """Test a change that loses a race without If-Match is re-applied on top of the winner."""
+    item = await _make_item(db_session)
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as first, session_maker() as second:
+        # Both writers read version 1 before either writes
+        await get_item(first, item.id)
+        await get_item(second, item.id)
+
+        toggled, error = await toggle_item_completion(first, item.id, "user-1")
+        assert error is None
+        updated = await update_item(second, item.id, "Oat milk", "user-1")
+
+    assert toggled.version == 2
+    assert (updated.text, updated.status, updated.version) == ("Oat milk", "completed", 3)
@@ -424,6 +424,25 @@ async def test_restore_item_not_deleted(mock_db, mock_current_user):
     assert error == "not_deleted"
 
 
+@pytest.mark.asyncio
+async def test_restore_item_read_back_from_the_database(db_session):
+    """Test an item deleted in one request can be restored in the next."""
+    from app.services.item_service import create_item, delete_item, restore_item
+    from app.services.list_service import create_list
+
+    todo_list = await create_list(db_session, "Groceries", "user-123")
+    item = await create_item(db_session, todo_list.id, "Milk", "user-123")
+    assert await delete_item(db_session, item.id, "user-123") == (True, None)
+    # As read by the next request: naive, from the database
+    db_session.info.clear()
+    db_session.expunge_all()
+
+    result, error = await restore_item(db_session, item.id, "user-123")
+
+    assert error is None
+    assert result.deleted_at is None
+
+
 # ============== Tests for Story 3-5: Due Date and Priority ==============
 
 @pytest.mark.asyncio
@@ -0,0 +1,111 @@
+"""Tests for the per-list version counter."""
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.api.deps import get_db
+from app.main import app
+from app.models.todo_list import TodoList
+from app.services.item_service import (
+    create_item,
+    delete_item,
+    permanently_delete_item,
+    set_item_priority,
+    toggle_item_completion,
+    update_item,
+)
+from app.services.list_service import bump_list_version, update_list_name
+
+# Postgres for the concurrency test, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.mark.asyncio
+async def test_every_mutation_bumps_version(db_session, make_list):
+    """Test each list and item mutation increments the version once."""
+    todo_list = await make_list(db_session)
+    assert todo_list.version == 0
+
+    item = await create_item(db_session, todo_list.id, "Milk", "user-1")
+    await update_item(db_session, item.id, "Oat milk", "user-1")
+    await toggle_item_completion(db_session, item.id, "user-1")
+    await set_item_priority(db_session, item.id, None, "user-1")
+    await delete_item(db_session, item.id, "user-1")
+    item.deleted_at = datetime.now(timezone.utc) - timedelta(seconds=10)
+    await db_session.commit()
+    await permanently_delete_item(db_session, item.id)
+    renamed = await update_list_name(db_session, todo_list.id, "user-1", "Shopping")
+
+    assert renamed.version == 7
+    await db_session.refresh(todo_list)
+    assert todo_list.version == 7
+
+
+@pytest.mark.asyncio
+async def test_etag_tracks_list_version(db_session, make_list):
+    """Test conditional GETs are answered with 304 until the list changes."""
+    todo_list = await make_list(db_session)
+    app.dependency_overrides[get_db] = lambda: db_session
+    headers = {"X-User-Id": "user-1"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            url = f"/api/v1/lists/{todo_list.id}/items"
+            first = await client.get(url, headers=headers)
+            etag = first.headers["etag"]
+            cached = await client.get(url, headers={**headers, "If-None-Match": etag})
+
+            await create_item(db_session, todo_list.id, "Milk", "user-1")
+            changed = await client.get(url, headers={**headers, "If-None-Match": etag})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert cached.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [item["text"] for item in changed.json()] == ["Milk"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_concurrent_mutations_get_distinct_versions(make_list):
+    """Test concurrent transactions never observe or produce the same version."""
+    engine = create_async_engine(POSTGRES_URL, pool_size=20)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as session:
+            todo_list = await make_list(session)
+            items = [
+                await create_item(session, todo_list.id, f"Item {n}", "user-1")
+                for n in range(20)
+            ]
+
+        async def toggle(item_id: int) -> None:
+            async with session_maker() as session:
+                await toggle_item_completion(session, item_id, "user-1")
+
+        async def bump() -> int:
+            async with session_maker() as session:
+                version = await bump_list_version(session, todo_list.id)
+                await asyncio.sleep(0)
+                await session.commit()
+                return version
+
+        await asyncio.gather(*(toggle(item.id) for item in items))
+        versions = await asyncio.gather(*(bump() for _ in range(20)))
+
+        async with session_maker() as session:
+            final = await session.get(TodoList, todo_list.id)
+        # 20 creates, 20 toggles and 20 bare bumps, none lost
+        assert final.version == 60
+        assert sorted(versions) == list(range(41, 61))
+    finally:
+        await engine.dispose()
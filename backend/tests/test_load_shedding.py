@@ -0,0 +1,116 @@
+"""Tests for overload detection and the load shedding middleware."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.deps import get_db
+from app.core.load_shedding import DelayDetector, LoopLagMonitor, shedder
+from app.db.instrumentation import TimedQueuePool
+from app.main import app
+
+
+def test_only_a_standing_delay_is_overload():
+    """Test a burst above target is tolerated for an interval, a dip ends overload."""
+    detector = DelayDetector("pool", target=0.05, interval=0.5)
+    detector.observe(0.2, now=0.0)
+    detector.observe(0.2, now=0.3)
+    assert not detector.is_overloaded(now=0.3)
+
+    detector.observe(0.2, now=0.6)
+    assert detector.is_overloaded(now=0.6)
+    # Without samples for an interval the state is not trusted
+    assert not detector.is_overloaded(now=1.2)
+
+    detector.observe(0.2, now=1.3)
+    detector.observe(0.2, now=1.9)
+    assert detector.is_overloaded(now=1.9)
+    detector.observe(0.01, now=2.0)
+    assert not detector.is_overloaded(now=2.0)
+
+
+def _overload(detector: DelayDetector) -> None:
+    now = time.monotonic()
+    detector.observe(1.0, now=now - 1)
+    detector.observe(1.0, now=now)
+
+
+@pytest.mark.asyncio
+async def test_low_priority_requests_are_shed_while_overloaded(db_session):
+    """Test whole-list reads get 503 while mutations and delta syncs go through."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    headers = {"X-User-Id": "owner"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            created = await client.post("/api/v1/lists", json={"name": "Groceries"}, headers=headers)
+            changes_url = f"/api/v1/lists/{created.json()['id']}/items/changes"
+            token = (await client.get(changes_url, headers=headers)).json()["token"]
+
+            _overload(shedder.pool)
+            assert shedder.overloaded_signal() == "pool"
+            lists = await client.get("/api/v1/lists", headers=headers)
+            items = await client.get(f"/api/v1/lists/{created.json()['id']}/items", headers=headers)
+            full_sync = await client.get(changes_url, headers=headers)
+            delta_sync = await client.get(changes_url, params={"since": token}, headers=headers)
+            add_item = await client.post(
+                f"/api/v1/lists/{created.json()['id']}/items", json={"text": "Milk"}, headers=headers
+            )
+            health = await client.get("/api/v1/health")
+
+            shedder.clear()
+            after = await client.get("/api/v1/lists", headers=headers)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [lists.status_code, items.status_code, full_sync.status_code] == [503, 503, 503]
+    assert lists.headers["Retry-After"] == "1"
+    assert delta_sync.status_code == 200
+    assert add_item.status_code == 201
+    assert health.status_code == 200
+    assert after.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_pool_checkouts_report_their_wait(tmp_path, monkeypatch):
+    """Test a checkout queued behind a busy pool reports how long it waited."""
+    waits = []
+    monkeypatch.setattr(shedder, "observe_pool_wait", waits.append)
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=0,
+    )
+    try:
+        async with engine.connect() as busy:
+            await busy.execute(text("SELECT 1"))
+
+            async def queued():
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+
+            task = asyncio.create_task(queued())
+            await asyncio.sleep(0.1)
+        await task
+    finally:
+        await engine.dispose()
+
+    assert len(waits) == 2
+    assert waits[1] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_is_measured():
+    """Test blocking the event loop shows up as lag."""
+    lags = []
+    monitor = LoopLagMonitor(SimpleNamespace(observe_loop_lag=lags.append), period=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # a blocking call on the loop
+        await asyncio.sleep(0.02)
+    finally:
+        await monitor.stop()
+    assert max(lags) >= 0.08
@@ -0,0 +1,126 @@
+"""Tests for the request-scoped loader of lists and items."""
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.db.instrumentation import capture_queries, instrument_engine
+from app.db.loader import get_loader
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+from app.services.item_service import create_item, get_item, update_item
+from app.services.list_service import create_list, delete_list
+
+# Postgres for the ANY(:ids) statement, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def _lookups(queries, table: str) -> int:
+    """Lookups by id sent by the loader (not refreshes after commits)."""
+    return sum(
+        n for statement, n in queries.statements.items()
+        if f"WHERE {table}.id IN" in statement or f"WHERE {table}.id = ANY" in statement
+    )
+
+
+@pytest.mark.asyncio
+async def test_loads_are_deduped_and_batched(db_session):
+    """Test repeated loads reuse one object and loads of one tick share a query."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    ids = [(await create_item(db_session, todo_list.id, f"Item {n}", "owner")).id for n in range(3)]
+    db_session.info.clear()
+    db_session.expunge_all()
+
+    with capture_queries() as queries:
+        items = await asyncio.gather(*(get_item(db_session, item_id) for item_id in ids))
+        again = await get_loader(db_session, TodoItem).load_many([ids[2], ids[0], ids[0] + 100])
+        assert await get_item(db_session, ids[1]) is items[1]
+    assert [item.id for item in items] == ids
+    assert again == [items[2], items[0], None]
+    assert _lookups(queries, "todo_items") == 2
+
+
+@pytest.mark.asyncio
+async def test_loads_within_lists_are_batched_by_list(db_session):
+    """Test item loads naming their list share one query filtered on list_id too."""
+    groceries = await create_list(db_session, "Groceries", "owner")
+    chores = await create_list(db_session, "Chores", "owner")
+    milk = (await create_item(db_session, groceries.id, "Milk", "owner")).id
+    sweep = (await create_item(db_session, chores.id, "Sweep", "owner")).id
+    db_session.info.clear()
+    db_session.expunge_all()
+
+    loader = get_loader(db_session, TodoItem)
+    with capture_queries() as queries:
+        found = await asyncio.gather(
+            loader.load(milk, groceries.id),
+            loader.load(sweep, chores.id),
+            loader.load(sweep, groceries.id),
+        )
+        assert await loader.load(milk) is found[0]
+    assert [item.text if item else None for item in found] == ["Milk", "Sweep", None]
+    assert _lookups(queries, "todo_items") == 1
+    assert "todo_items.list_id IN" in next(iter(queries.statements))
+
+
+@pytest.mark.asyncio
+async def test_services_share_lookups_within_a_request(db_session):
+    """Test an endpoint's item and list lookups are not repeated by the services."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    item = await create_item(db_session, todo_list.id, "Milk", "owner")
+    db_session.info.clear()
+    db_session.expunge_all()
+
+    with capture_queries() as queries:
+        assert (await get_item(db_session, item.id)).text == "Milk"
+        assert (await update_item(db_session, item.id, "Oat milk", "owner")).text == "Oat milk"
+        assert await delete_list(db_session, todo_list.id, "stranger") is False
+        assert await delete_list(db_session, todo_list.id, "owner") is True
+    assert _lookups(queries, "todo_items") == 1
+    assert _lookups(queries, "todo_lists") == 1
+    assert await get_loader(db_session, TodoList).load(todo_list.id) is None
+
+
+@pytest.mark.asyncio
+async def test_rollback_clears_loaded_objects(db_session):
+    """Test a rollback drops loaded objects and a failed batch is not cached."""
+    list_id = (await create_list(db_session, "Groceries", "owner")).id
+    loader = get_loader(db_session, TodoList)
+    assert await loader.load(list_id) is not None
+
+    await db_session.rollback()
+    assert get_loader(db_session, TodoList) is not loader
+
+    broken = get_loader(db_session, TodoList)
+    broken.model = object  # no columns to select
+    with pytest.raises(AttributeError):
+        await broken.load(list_id)
+    broken.model = TodoList
+    assert (await broken.load(list_id)).name == "Groceries"
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_postgres_batches_use_one_statement():
+    """Test batches of any size send the same ANY(:ids) statement on Postgres."""
+    engine = create_async_engine(POSTGRES_URL)
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as db:
+            lists = [await create_list(db, f"List {n}", "owner") for n in range(3)]
+        async with session_maker() as db:
+            with capture_queries() as queries:
+                loader = get_loader(db, TodoList)
+                await loader.load(lists[0].id)
+                found = await loader.load_many([todo_list.id for todo_list in lists])
+            assert [todo_list.name for todo_list in found] == ["List 0", "List 1", "List 2"]
+            assert len(queries.statements) == 1
+            assert "ANY" in next(iter(queries.statements))
+    finally:
+        await engine.dispose()
@@ -0,0 +1,196 @@
+"""Tests for list sharing and the cached membership checks."""
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.deps import get_db
+from app.db.instrumentation import capture_queries
+from app.main import app
+from app.models.list_member import ListMember, ListRole
+from app.services import events, membership
+from app.services.broadcast import Broadcaster
+from app.services.item_service import create_item, toggle_item_completion, update_item
+from app.services.list_service import create_list, delete_list, get_user_lists
+from app.services.membership import (
+    check_access,
+    get_members,
+    get_role,
+    remove_member,
+    set_member_role,
+)
+from app.services.policy import ITEM_UPDATE, LIST_READ, LIST_SHARE
+
+
+def _member_lookups(queries) -> int:
+    return sum(n for statement, n in queries.statements.items() if "list_members" in statement)
+
+
+@pytest.mark.asyncio
+async def test_roles_grant_permissions(db_session):
+    """Test owners manage, editors edit and viewers only read a shared list."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    item = await create_item(db_session, todo_list.id, "Milk", "owner")
+    await set_member_role(db_session, todo_list.id, "editor", "editor", "owner")
+    await set_member_role(db_session, todo_list.id, "viewer", "viewer", "owner")
+
+    for user_id, allowed in (
+        ("owner", {LIST_READ, ITEM_UPDATE, LIST_SHARE}),
+        ("editor", {LIST_READ, ITEM_UPDATE}),
+        ("viewer", {LIST_READ}),
+        ("stranger", set()),
+    ):
+        for action in (LIST_READ, ITEM_UPDATE, LIST_SHARE):
+            error = await check_access(db_session, todo_list.id, user_id, action)
+            assert error == (None if action in allowed else "forbidden")
+    assert await check_access(db_session, todo_list.id + 1, "owner") == "not_found"
+
+    toggled, error = await toggle_item_completion(db_session, item.id, "editor")
+    assert error is None and toggled.status == "completed"
+    assert await toggle_item_completion(db_session, item.id, "viewer") == (None, "forbidden")
+    assert await update_item(db_session, item.id, "Oat milk", "viewer") is None
+    assert await delete_list(db_session, todo_list.id, "editor") is False
+
+    shared = await get_user_lists(db_session, "viewer")
+    assert [todo_list.name for todo_list in shared] == ["Groceries"]
+    members, _ = await get_members(db_session, todo_list.id, "viewer")
+    assert [(m.user_id, m.role) for m in members] == [
+        ("owner", "owner"), ("editor", "editor"), ("viewer", "viewer"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_owner_cannot_be_changed_or_removed(db_session):
+    """Test sharing never touches the owner's membership; members may leave."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    await set_member_role(db_session, todo_list.id, "viewer", "viewer", "owner")
+
+    assert await set_member_role(db_session, todo_list.id, "owner", "viewer", "owner") == (None, "owner")
+    assert await remove_member(db_session, todo_list.id, "owner", "owner") == (False, "owner")
+    assert await set_member_role(db_session, todo_list.id, "other", "editor", "viewer") == (None, "forbidden")
+    assert await remove_member(db_session, todo_list.id, "viewer", "viewer") == (True, None)
+    assert await get_role(db_session, todo_list.id, "viewer") is None
+
+
+@pytest.mark.asyncio
+async def test_roles_are_cached_per_request_and_per_process(sqlite_engine):
+    """Test repeated checks reuse the session's and then the process's answer."""
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        todo_list = await create_list(db, "Groceries", "owner")
+        item = await create_item(db, todo_list.id, "Milk", "owner")
+        list_id, item_id = todo_list.id, item.id
+
+    async with session_maker() as db:
+        with capture_queries() as queries:
+            assert await check_access(db, list_id, "owner", ITEM_UPDATE) is None
+            await toggle_item_completion(db, item_id, "owner")
+            assert await check_access(db, list_id, "stranger") == "forbidden"
+            assert await check_access(db, list_id, "stranger") == "forbidden"
+        assert _member_lookups(queries) == 2
+
+    async with session_maker() as db:
+        with capture_queries() as queries:
+            await toggle_item_completion(db, item_id, "owner")
+            assert await check_access(db, list_id, "stranger") == "forbidden"
+        assert _member_lookups(queries) == 0
+
+
+@pytest.mark.asyncio
+async def test_membership_changes_invalidate_cached_roles(sqlite_engine):
+    """Test a committed change is seen at once and a rolled back one never."""
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        todo_list = await create_list(db, "Groceries", "owner")
+        list_id = todo_list.id
+        await set_member_role(db, list_id, "friend", "viewer", "owner")
+
+    async with session_maker() as db:
+        assert await check_access(db, list_id, "friend", ITEM_UPDATE) == "forbidden"
+
+    async with session_maker() as db:
+        await set_member_role(db, list_id, "friend", "editor", "owner")
+    async with session_maker() as db:
+        assert await check_access(db, list_id, "friend", ITEM_UPDATE) is None
+
+    async with session_maker() as db:
+        db.add(ListMember(user_id="intruder", list_id=list_id, role=ListRole.EDITOR.value))
+        membership._changed(db, list_id)
+        assert await get_role(db, list_id, "intruder") == "editor"
+        await db.rollback()
+    async with session_maker() as db:
+        assert await get_role(db, list_id, "intruder") is None
+
+    async with session_maker() as db:
+        await remove_member(db, list_id, "friend", "owner")
+    async with session_maker() as db:
+        assert await check_access(db, list_id, "friend") == "forbidden"
+        assert await delete_list(db, list_id, "owner") is True
+    async with session_maker() as db:
+        assert await check_access(db, list_id, "owner") == "not_found"
+
+
+@pytest.mark.asyncio
+async def test_member_events_from_other_workers_invalidate_cached_roles():
+    """Test a broadcast member.* event drops this worker's cached roles for the list."""
+    membership.cache.put((1, "friend"), "editor", membership.cache.generation)
+    membership.cache.put((2, "friend"), "editor", membership.cache.generation)
+    broadcaster = Broadcaster(
+        "postgresql+psycopg://localhost/test", session_maker=None, hub=events.EventHub()
+    )
+
+    await broadcaster.dispatch([json.dumps({
+        "list_id": 1, "type": events.MEMBER_REMOVED,
+        "data": {"list_id": 1, "user_id": "friend", "role": "editor"},
+    })])
+
+    assert membership.cache.get((1, "friend")) == (False, None)
+    assert membership.cache.get((2, "friend")) == (True, "editor")
+
+
+@pytest.mark.asyncio
+async def test_members_api(db_session):
+    """Test sharing a list over the API and the status codes for refusals."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    app.dependency_overrides[get_db] = lambda: db_session
+    url = f"/api/v1/lists/{todo_list.id}/members"
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            shared = await client.put(
+                f"{url}/friend", json={"role": "viewer"}, headers={"X-User-Id": "owner"}
+            )
+            listed = await client.get(url, headers={"X-User-Id": "friend"})
+            items = await client.get(
+                f"/api/v1/lists/{todo_list.id}/items", headers={"X-User-Id": "friend"}
+            )
+            add_item = await client.post(
+                f"/api/v1/lists/{todo_list.id}/items",
+                json={"text": "Milk"},
+                headers={"X-User-Id": "friend"},
+            )
+            reshare = await client.put(
+                f"{url}/other", json={"role": "editor"}, headers={"X-User-Id": "friend"}
+            )
+            owner_role = await client.put(
+                f"{url}/owner", json={"role": "viewer"}, headers={"X-User-Id": "owner"}
+            )
+            bad_role = await client.put(
+                f"{url}/friend", json={"role": "owner"}, headers={"X-User-Id": "owner"}
+            )
+            left = await client.delete(f"{url}/friend", headers={"X-User-Id": "friend"})
+            missing = await client.get(
+                f"/api/v1/lists/{todo_list.id + 1}/members", headers={"X-User-Id": "owner"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert shared.status_code == 200 and shared.json()["role"] == "viewer"
+    assert [m["user_id"] for m in listed.json()] == ["owner", "friend"]
+    assert items.status_code == 200
+    assert add_item.status_code == 403
+    assert reshare.status_code == 403
+    assert owner_role.status_code == 400
+    assert bad_role.status_code == 422
+    assert left.status_code == 204
+    assert missing.status_code == 404
@@ -0,0 +1,112 @@
+"""Tests for the list WebSocket mutation channel."""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from starlette.websockets import WebSocketDisconnect
+
+from app.db.database import get_session_maker
+from app.main import app
+from app.models.todo_item import TodoItem
+from app.models.todo_list import TodoList
+from app.services import rate_limit
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    """File-backed SQLite (the test client runs its own event loop) with two lists."""
+    path = tmp_path / "mutations.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    now = datetime.now(timezone.utc)
+    with Session(sync_engine) as session:
+        mine = TodoList(name="Mine", owner_id="owner", created_at=now, updated_at=now)
+        other = TodoList(name="Other", owner_id="owner", created_at=now, updated_at=now)
+        session.add_all([mine, other])
+        session.flush()
+        item = TodoItem(list_id=mine.id, text="Milk", created_by="owner")
+        elsewhere = TodoItem(list_id=other.id, text="Eggs", created_by="owner")
+        session.add_all([item, elsewhere])
+        session.commit()
+        ids = {"list": mine.id, "item": item.id, "elsewhere": elsewhere.id}
+    sync_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    yield ids
+    app.dependency_overrides.clear()
+
+
+def test_ops_are_acked_in_order(seeded):
+    """Test commands apply through the item service and are acked by op id."""
+    client = TestClient(app)
+    url = f"/api/v1/lists/{seeded['list']}/ws"
+    item_id = seeded["item"]
+
+    with client.websocket_connect(url, headers={"X-User-Id": "owner"}) as ws:
+        ws.send_json({"id": "a", "op": "toggle", "item_id": item_id})
+        ws.send_json({"id": "b", "op": "edit", "item_id": item_id, "text": "Oat milk", "tags": ["home"]})
+        ws.send_json({"id": "c", "op": "reorder", "item_id": item_id, "position": 0})
+        ws.send_json({"id": "d", "op": "toggle", "item_id": seeded["elsewhere"]})
+        ws.send_json({"id": "e", "op": "explode", "item_id": item_id})
+        acks = [ws.receive_json() for _ in range(5)]
+
+    assert [ack["id"] for ack in acks] == ["a", "b", "c", "d", "e"]
+    assert acks[0]["ok"] and acks[0]["item"]["status"] == "completed"
+    assert acks[1]["item"]["text"] == "Oat milk"
+    assert acks[1]["item"]["tags"] == ["home"]
+    assert acks[1]["item"]["status"] == "completed"
+    assert [ack["error"] for ack in acks[2:]] == ["unsupported", "not_found", "invalid"]
+
+
+def test_handshake_rejected_without_access(seeded):
+    """Test foreign users and unknown lists are refused at the handshake."""
+    client = TestClient(app)
+
+    for list_id, user in ((seeded["list"], "intruder"), (999, "owner")):
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(
+                f"/api/v1/lists/{list_id}/ws", headers={"X-User-Id": user}
+            ) as ws:
+                ws.receive_text()
+        assert exc_info.value.code == 1008
+
+
+def test_commands_over_the_write_rate_are_refused(seeded, monkeypatch):
+    """Test each command is charged to the user's write rate."""
+    monkeypatch.setitem(rate_limit.limiter.budgets, rate_limit.WRITE, rate_limit.Budget(1, 2, 8))
+    client = TestClient(app)
+    item_id = seeded["item"]
+
+    with client.websocket_connect(
+        f"/api/v1/lists/{seeded['list']}/ws", headers={"X-User-Id": "owner"}
+    ) as ws:
+        for op_id in "abc":
+            ws.send_json({"id": op_id, "op": "toggle", "item_id": item_id})
+        acks = [ws.receive_json() for _ in range(3)]
+
+    assert [ack["ok"] for ack in acks] == [True, True, False]
+    assert acks[2]["error"] == "rate_limited" and 0 < acks[2]["retry_after"] <= 1
+
+
+def test_versioned_commands_conflict_with_newer_changes(seeded):
+    """Test a command for an older version is refused with the current item."""
+    client = TestClient(app)
+    item_id = seeded["item"]
+
+    with client.websocket_connect(
+        f"/api/v1/lists/{seeded['list']}/ws", headers={"X-User-Id": "owner"}
+    ) as ws:
+        ws.send_json({"id": "a", "op": "toggle", "item_id": item_id, "version": 1})
+        ws.send_json({"id": "b", "op": "edit", "item_id": item_id, "text": "Oat milk", "version": 1})
+        acks = [ws.receive_json() for _ in range(2)]
+
+    assert acks[0]["ok"] and acks[0]["item"]["version"] == 2
+    assert acks[1]["error"] == "conflict"
+    assert acks[1]["item"]["text"] == "Milk" and acks[1]["item"]["version"] == 2
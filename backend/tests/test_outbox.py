@@ -0,0 +1,196 @@
+"""Tests for the transactional outbox and its relay."""
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.models.outbox import OutboxEvent
+from app.models.todo_list import TodoList
+from app.services import events, outbox
+from app.services.item_service import create_item, toggle_item_completion
+from app.services.list_service import bump_list_version, create_list
+from app.services.membership import set_member_role
+from app.services.outbox import Relay
+
+# Postgres for the competing relays test, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+async def _pending(session) -> list[OutboxEvent]:
+    result = await session.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_only_with_their_commit(db_session, make_list):
+    """Test rolled back changes leave nothing in the outbox."""
+    todo_list = await make_list(db_session)
+    item = await create_item(db_session, todo_list.id, "Milk", "user-1")
+    item_id = item.id
+
+    item.text = "Oat milk"
+    outbox.add(db_session, events.ITEM_UPDATED, item, "user-1")
+    await db_session.rollback()
+    await toggle_item_completion(db_session, item_id, "user-1")
+
+    rows = await _pending(db_session)
+    assert [(row.type, row.actor_id) for row in rows] == [
+        (events.ITEM_CREATED, "user-1"), (events.ITEM_TOGGLED, "user-1"),
+    ]
+    assert outbox.payload(rows[1])["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_relay_delivers_at_least_once(db_session, sqlite_engine, make_list):
+    """Test a failed batch is redelivered to every subscriber, then removed."""
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    todo_list = await make_list(db_session)
+    for text in ("Milk", "Eggs", "Bread"):
+        await create_item(db_session, todo_list.id, text, "user-1")
+
+    received, failures = [], [True]
+
+    async def record(db, batch):
+        received.append([outbox.payload(e)["text"] for e in batch])
+
+    async def flaky(db, batch):
+        if failures:
+            failures.pop()
+            raise RuntimeError("webhook down")
+
+    relay = Relay(session_maker, [record, flaky], batch_size=2)
+    assert await relay.run_once() == 0
+    assert [row.attempts for row in await _pending(db_session)] == [1, 1, 0]
+    assert await relay.run_once() == 2
+    assert await relay.run_once() == 1
+
+    assert received == [["Milk", "Eggs"], ["Milk", "Eggs"], ["Bread"]]
+    assert await _pending(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_events_failing_too_often_are_set_aside(db_session, sqlite_engine, make_list):
+    """Test events past max_attempts are skipped so later ones still flow."""
+    session_maker = async_sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    todo_list = await make_list(db_session)
+    await create_item(db_session, todo_list.id, "Poison", "user-1")
+
+    async def broken(db, batch):
+        raise RuntimeError("cannot handle")
+
+    relay = Relay(session_maker, [broken], max_attempts=2)
+    for _ in range(3):
+        await relay.run_once()
+
+    assert [row.attempts for row in await _pending(db_session)] == [2]
+    assert await Relay(session_maker, [], max_attempts=2).run_once() == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_competing_relays_keep_per_list_order(make_list):
+    """Test two relays sharing the table deliver each list's events in order."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as session:
+            lists = [await make_list(session) for _ in range(3)]
+            list_ids = {todo_list.id for todo_list in lists}
+            for n in range(20):
+                for todo_list in lists:
+                    await create_item(session, todo_list.id, f"Item {n}", "user-1")
+
+        delivered: dict[int, list[int]] = {list_id: [] for list_id in list_ids}
+
+        async def collect(db, batch):
+            await asyncio.sleep(0.01)
+            for outbox_event in batch:
+                if outbox_event.list_id in delivered:
+                    delivered[outbox_event.list_id].append(outbox_event.id)
+
+        async def drain(relay):
+            while await relay.run_once():
+                pass
+
+        relays = [Relay(session_maker, [collect], batch_size=7) for _ in range(2)]
+        await asyncio.gather(*(drain(relay) for relay in relays))
+
+        for ids in delivered.values():
+            assert len(ids) == 20
+            assert ids == sorted(ids)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_member_changes_wait_for_the_lists_other_writers():
+    """Test a member change queues behind an uncommitted list change, keeping event order."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as writer, session_maker() as owner:
+            todo_list = await create_list(owner, "Groceries", "user-1")
+            # A rename in flight: the list's version is bumped, not yet committed
+            renamed = await writer.get(TodoList, todo_list.id)
+            renamed.name = "Shopping"
+            await bump_list_version(writer, todo_list.id)
+            share = asyncio.create_task(
+                set_member_role(owner, todo_list.id, "user-2", "viewer", "user-1")
+            )
+            await asyncio.sleep(0.2)
+            assert not share.done()
+
+            outbox.add(writer, events.LIST_UPDATED, renamed, "user-1")
+            await writer.commit()
+            _, error = await share
+            assert error is None
+
+            result = await owner.execute(
+                select(OutboxEvent.type)
+                .where(OutboxEvent.list_id == todo_list.id)
+                .order_by(OutboxEvent.id)
+            )
+            assert result.scalars().all()[-2:] == [events.LIST_UPDATED, events.MEMBER_ADDED]
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_event_times_are_utc_whatever_the_session_time_zone(make_list):
+    """Test events written by a session in another time zone are not hours old."""
+    engine = create_async_engine(
+        POSTGRES_URL, connect_args={"options": "-c timezone=America/New_York"}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as session:
+            todo_list = await make_list(session)
+            item = await create_item(session, todo_list.id, "Milk", "user-1")
+            row = (
+                await session.execute(
+                    select(OutboxEvent)
+                    .where(OutboxEvent.list_id == todo_list.id)
+                    .order_by(OutboxEvent.id.desc())
+                )
+            ).scalars().first()
+            await session.delete(row)
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert outbox.payload(row)["id"] == item.id
+    assert abs((now - row.created_at).total_seconds()) < 60
@@ -0,0 +1,154 @@
+"""Tests that item statements carry todo_items' partition key."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, inspect, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.db.instrumentation import capture_queries
+from app.models.todo_item import TodoItem
+from app.services.item_service import (
+    create_item,
+    delete_item,
+    get_item,
+    get_items_by_list,
+    toggle_item_completion,
+    update_item,
+)
+from app.services.list_service import create_list
+
+# Postgres to partition todo_items on, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def _item_statements(queries) -> list[str]:
+    """Statements reading or changing todo_items, refreshes after commits aside."""
+    return [
+        statement for statement in queries.statements
+        if "todo_items" in statement and "todo_items_archive" not in statement
+        and not statement.startswith("INSERT")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_item_changes_name_the_list(db_session):
+    """Test list-scoped lookups, list reads, edits and deletes filter on list_id."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    items = [await create_item(db_session, todo_list.id, f"Item {n}", "owner") for n in range(3)]
+    db_session.info.clear()
+    db_session.expunge_all()
+
+    with capture_queries() as queries:
+        assert await get_item(db_session, items[0].id, list_id=todo_list.id) is not None
+        updated = await update_item(db_session, items[0].id, "Milk", "owner", list_id=todo_list.id)
+        assert updated.text == "Milk"
+        await toggle_item_completion(db_session, items[1].id, "owner", list_id=todo_list.id)
+        await delete_item(db_session, items[2].id, "owner", list_id=todo_list.id)
+        await get_items_by_list(db_session, todo_list.id)
+
+    statements = _item_statements(queries)
+    assert all("list_id" in s.split("WHERE", 1)[-1] for s in statements), statements
+    assert any(s.startswith("UPDATE todo_items") for s in statements)
+    # Which ORM DELETEs name as well, with the rest of the identity
+    assert [column.name for column in inspect(TodoItem).primary_key] == ["id", "list_id"]
+
+
+@pytest.mark.asyncio
+async def test_list_scoped_lookup_only_finds_items_of_the_list(db_session):
+    """Test an item is not found through another list, and is reused once found."""
+    groceries = await create_list(db_session, "Groceries", "owner")
+    chores = await create_list(db_session, "Chores", "owner")
+    item = await create_item(db_session, groceries.id, "Milk", "owner")
+    db_session.info.clear()
+    db_session.expunge_all()
+
+    assert await get_item(db_session, item.id, list_id=chores.id) is None
+    with capture_queries() as queries:
+        found = await get_item(db_session, item.id, list_id=groceries.id)
+        assert await get_item(db_session, item.id) is found
+    assert len(_item_statements(queries)) == 1
+
+
+def _alembic(url: str, *args: str, partitions: int = 0) -> None:
+    env = {**os.environ, "DATABASE_URL": url, "ITEM_PARTITIONS": str(partitions)}
+    subprocess.run(
+        [sys.executable, "-m", "alembic", *args], cwd=BACKEND, env=env, check=True,
+        capture_output=True,
+    )
+
+
+def _partitions(plan: dict) -> set[str]:
+    """Partitions of todo_items a plan reads or writes."""
+    name = plan.get("Relation Name", "")
+    names = {name} if name.startswith("todo_items_p") else set()
+    return names.union(*(_partitions(child) for child in plan.get("Plans", ())))
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_item_mutations_touch_one_partition():
+    """Test an edit within a list reads and writes one partition of a migrated todo_items."""
+    admin = create_async_engine(POSTGRES_URL, isolation_level="AUTOCOMMIT")
+    name = f"partitions_{os.urandom(4).hex()}"
+    url = make_url(POSTGRES_URL).set(database=name)
+    async with admin.connect() as conn:
+        await conn.execute(text(f"CREATE DATABASE {name}"))
+    engine = create_async_engine(url)
+    try:
+        # The migrations before this one leave out some item columns, so the
+        # tables it starts from are the models'
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            await conn.execute(text("DROP INDEX ix_todo_items_live_list_id_created_at"))
+        database_url = url.render_as_string(hide_password=False)
+        _alembic(database_url, "stamp", "20261019_items_archive")
+        _alembic(database_url, "upgrade", "head", partitions=4)
+
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_maker() as db:
+            todo_list = await create_list(db, "Groceries", "owner")
+            item = await create_item(db, todo_list.id, "Milk", "owner")
+
+        sent = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "todo_items" in statement and not statement.startswith("INSERT"):
+                sent.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            async with session_maker() as db:
+                await toggle_item_completion(db, item.id, "owner", list_id=todo_list.id)
+                await update_item(db, item.id, "Oat milk", "owner", list_id=todo_list.id)
+                scoped = len(sent)
+            async with session_maker() as db:
+                await get_item(db, item.id)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        touched = []
+        async with engine.connect() as conn:
+            for statement, parameters in sent:
+                result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = result.scalar_one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                touched.append(_partitions(plan[0]["Plan"]))
+    finally:
+        await engine.dispose()
+        async with admin.connect() as conn:
+            await conn.execute(text(f"DROP DATABASE {name} WITH (FORCE)"))
+        await admin.dispose()
+
+    assert any(statement.startswith("UPDATE todo_items") for statement, _ in sent[:scoped])
+    assert [len(partitions) for partitions in touched[:scoped]] == [1] * scoped
+    # A lookup by id alone has to look in every partition
+    assert [len(partitions) for partitions in touched[scoped:]] == [4]
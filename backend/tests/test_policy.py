@@ -0,0 +1,115 @@
+"""Tests for the compiled authorization policy."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import membership
+from app.services.item_service import create_item, delete_item, toggle_item_completion
+from app.services.list_service import create_list
+from app.services.membership import set_member_role
+from app.services.policy import (
+    ITEM_DELETE,
+    ITEM_TOGGLE,
+    LIST_READ,
+    Policy,
+    Resource,
+    Rule,
+    RULES,
+    Subject,
+    compile_rules,
+    item_resource,
+    resource,
+    subject,
+)
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def _item(item_id=1, created_by="alice", status="not_started", version=NOW) -> Resource:
+    return Resource("item", item_id, 7, version, created_by=created_by, status=status)
+
+
+def test_rules_compile_to_constants_and_predicates():
+    """Test role-only grants compile to True and conditional ones to predicates."""
+    table = compile_rules(RULES)
+    assert table[(LIST_READ, "viewer")] is True
+    assert table[(ITEM_DELETE, "owner")] is True
+    assert len(table[(ITEM_DELETE, "editor")]) == 2
+    assert (ITEM_DELETE, "viewer") not in table
+
+
+def test_editors_delete_their_own_and_completed_items():
+    """Test the creator and status conditions on item deletion."""
+    policy = Policy(RULES)
+    editor, owner, viewer = Subject("bob", "editor"), Subject("carol", "owner"), Subject("dan", "viewer")
+
+    assert policy.is_allowed(editor, ITEM_DELETE, _item(1, created_by="bob"))
+    assert policy.is_allowed(editor, ITEM_DELETE, _item(2, status="completed"))
+    assert not policy.is_allowed(editor, ITEM_DELETE, _item(3))
+    assert policy.is_allowed(owner, ITEM_DELETE, _item(3))
+    assert not policy.is_allowed(viewer, ITEM_DELETE, _item(4, created_by="dan"))
+    assert not policy.is_allowed(Subject("eve", None), LIST_READ, _item(4))
+
+
+def test_decisions_are_memoized_per_resource_version():
+    """Test a cached decision is reused for one version and recomputed for the next."""
+    policy = Policy(RULES)
+    editor = Subject("bob", "editor")
+
+    assert not policy.is_allowed(editor, ITEM_DELETE, _item())
+    # Same version: the memo answers, even for (impossible) changed attributes
+    assert not policy.is_allowed(editor, ITEM_DELETE, _item(status="completed"))
+    later = NOW + timedelta(seconds=1)
+    assert policy.is_allowed(editor, ITEM_DELETE, _item(status="completed", version=later))
+
+
+def test_memo_is_bounded():
+    """Test the memo is cleared rather than growing past its size."""
+    policy = Policy(RULES, cache_size=10)
+    editor = Subject("bob", "editor")
+    for item_id in range(25):
+        policy.is_allowed(editor, ITEM_DELETE, _item(item_id))
+    assert len(policy._decisions) <= 10
+
+
+def test_batch_evaluation():
+    """Test allowed_many decides each resource and short-cuts role-only outcomes."""
+    policy = Policy(RULES)
+    items = [_item(1, created_by="bob"), _item(2), _item(3, status="completed")]
+
+    assert policy.allowed_many(Subject("bob", "editor"), ITEM_DELETE, items) == [True, False, True]
+    assert policy.allowed_many(Subject("carol", "owner"), ITEM_DELETE, items) == [True] * 3
+    assert policy.allowed_many(Subject("dan", "viewer"), ITEM_DELETE, items) == [False] * 3
+
+
+def test_invalid_rules_are_rejected_at_compile_time():
+    """Test unknown attributes and operators fail when the policy is built."""
+    with pytest.raises(AttributeError):
+        resource.colour
+    with pytest.raises(ValueError):
+        Policy([Rule((LIST_READ,), ("viewer",), when=((subject.id, "~", "x"),))])
+    in_rule = Rule((ITEM_TOGGLE,), ("viewer",), when=((resource.status, "in", ("a", "b")),))
+    assert Policy([in_rule]).is_allowed(Subject("dan", "viewer"), ITEM_TOGGLE, _item(status="b"))
+
+
+@pytest.mark.asyncio
+async def test_item_services_apply_the_policy(db_session):
+    """Test an editor can delete their own and completed items, not others' open ones."""
+    todo_list = await create_list(db_session, "Groceries", "owner")
+    await set_member_role(db_session, todo_list.id, "editor", "editor", "owner")
+    mine = await create_item(db_session, todo_list.id, "Milk", "editor")
+    theirs = await create_item(db_session, todo_list.id, "Eggs", "owner")
+    done = await create_item(db_session, todo_list.id, "Bread", "owner")
+    await toggle_item_completion(db_session, done.id, "owner")
+
+    other = await create_list(db_session, "Work", "owner")
+    elsewhere = await create_item(db_session, other.id, "Report", "owner")
+    decisions = await membership.allowed_many(
+        db_session, "editor", ITEM_DELETE,
+        [item_resource(item) for item in (mine, theirs, done, elsewhere)],
+    )
+    assert decisions == [True, False, True, False]
+
+    assert await delete_item(db_session, theirs.id, "editor") == (False, "forbidden")
+    assert await delete_item(db_session, mine.id, "editor") == (True, None)
+    assert await delete_item(db_session, done.id, "editor") == (True, None)
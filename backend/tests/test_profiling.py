@@ -0,0 +1,74 @@
+"""Tests for on-demand request profiling and stack sampling."""
+import json
+import threading
+import time
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.core import profiling
+from app.core.profiling import StackSampler, sign_profile_token, verify_profile_token
+from app.main import app
+
+
+def test_profile_token_roundtrip():
+    """Test signed tokens verify and tampered or expired ones do not."""
+    token = sign_profile_token(int(time.time()) + 60, secret="s3cret")
+
+    assert verify_profile_token(token, secret="s3cret")
+    assert not verify_profile_token(token, secret="other")
+    tampered = token[:-1] + ("1" if token.endswith("0") else "0")
+    assert not verify_profile_token(tampered, secret="s3cret")
+    assert not verify_profile_token(
+        sign_profile_token(int(time.time()) - 1, secret="s3cret"), secret="s3cret"
+    )
+    assert not verify_profile_token("garbage", secret="s3cret")
+
+
+@pytest.mark.asyncio
+async def test_profiled_request_writes_output(tmp_path, monkeypatch):
+    """Test a request with a valid token is profiled with route and user metadata."""
+    monkeypatch.setattr(profiling.settings, "profile_dir", str(tmp_path))
+    token = sign_profile_token(int(time.time()) + 60)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(
+            "/api/v1/auth/me",
+            headers={"X-Profile-Token": token, "X-User-Id": "user-123"},
+        )
+
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+    metadata = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert metadata["route"] == "/api/v1/auth/me"
+    assert metadata["user_id"] == "user-123"
+
+
+@pytest.mark.asyncio
+async def test_unsigned_request_not_profiled(tmp_path, monkeypatch):
+    """Test requests without a valid token pass through untouched."""
+    monkeypatch.setattr(profiling.settings, "profile_dir", str(tmp_path))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/v1/health?profile=1.deadbeef")
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_sampler_folds_app_stacks(tmp_path):
+    """Test sampled stacks keep app frames only and are written folded."""
+    sampler = StackSampler(hz=100, output=tmp_path / "stacks.folded")
+    # Sample the current thread: only StackSampler.sample itself is app code
+    sampler._target_thread_id = threading.get_ident()
+
+    sampler.sample()
+    sampler.sample()
+    sampler.flush()
+
+    assert dict(sampler.stacks) == {"profiling:sample": 2}
+    assert (tmp_path / "stacks.folded").read_text() == "profiling:sample 2\n"
@@ -0,0 +1,88 @@
+"""Tests for per-request SQL instrumentation."""
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.instrumentation import (
+    QueryStats,
+    capture_queries,
+    instrument_engine,
+    parameter_shape,
+)
+from app.services.item_service import create_item, get_items_by_list, update_item
+from app.services.list_service import create_list
+from app.services.membership import check_access
+from app.services.policy import ITEM_UPDATE
+
+
+def test_parameter_shape_hides_values():
+    """Test slow-query logging only exposes parameter types."""
+    assert parameter_shape({"token": "secret", "id": 3}) == {"token": "str", "id": "int"}
+    assert parameter_shape(("secret", 3)) == ["str", "int"]
+    assert parameter_shape([{"id": 1}, {"id": 2}]) == {"rows": 2, "shape": {"id": "int"}}
+
+
+def test_duplicate_and_n_plus_one_detection():
+    """Test repeated statements are classified correctly."""
+    stats = QueryStats()
+    stats.record("SELECT * FROM todo_lists WHERE id = ?", (1,), 0.001)
+    stats.record("SELECT * FROM todo_lists WHERE id = ?", (1,), 0.001)
+    for item_id in range(5):
+        stats.record("SELECT * FROM todo_items WHERE id = ?", (item_id,), 0.001)
+
+    assert stats.count == 7
+    assert stats.duplicates() == [("SELECT * FROM todo_lists WHERE id = ?", 2)]
+    assert stats.n_plus_one() == [("SELECT * FROM todo_items WHERE id = ?", 5)]
+    with pytest.raises(AssertionError):
+        stats.assert_no_duplicates()
+    with pytest.raises(AssertionError):
+        stats.assert_max(6)
+
+
+@pytest.mark.asyncio
+async def test_capture_queries_counts_statements(db_session):
+    """Test statements executed on an instrumented engine are captured."""
+    todo_list = await create_list(db_session, "Groceries", "user-123")
+    await create_item(db_session, todo_list.id, "Milk", "user-123")
+
+    with capture_queries() as queries:
+        items = await get_items_by_list(db_session, todo_list.id)
+
+    assert len(items) == 1
+    queries.assert_count(1)
+    assert queries.total_time > 0
+
+
+@pytest.mark.asyncio
+async def test_update_flow_reads_membership_once(db_session):
+    """Test the endpoint-then-service access check no longer repeats queries."""
+    todo_list = await create_list(db_session, "Work", "user-123")
+    item = await create_item(db_session, todo_list.id, "Report", "user-123")
+
+    with capture_queries() as queries:
+        # What update_todo_item does: check access, then call update_item
+        assert await check_access(db_session, todo_list.id, "user-123", ITEM_UPDATE) is None
+        await update_item(db_session, item.id, "Final report", "user-123")
+
+    assert not any(
+        "todo_lists" in statement or "list_members" in statement
+        for statement, _ in queries.duplicates()
+    )
+    assert sum(n for statement, n in queries.statements.items() if "list_members" in statement) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logged_with_shapes(monkeypatch, caplog):
+    """Test slow statements are logged with parameter types, not values."""
+    monkeypatch.setattr("app.db.instrumentation.settings.slow_query_ms", 0)
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine)
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT :value"), {"value": "top-secret"})
+    await engine.dispose()
+
+    assert "Slow query" in caplog.text
+    assert "top-secret" not in caplog.text
@@ -0,0 +1,101 @@
+"""Tests for per-user admission control."""
+import asyncio
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.api.deps import get_db
+from app.main import app
+from app.services import rate_limit
+from app.services.rate_limit import (
+    READ,
+    WRITE,
+    Budget,
+    LocalBackend,
+    PostgresBackend,
+    RateLimiter,
+)
+
+# Postgres for the shared backend, e.g.
+# postgresql+psycopg://postgres@localhost:5432/sleekflow_test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_bursts_then_the_rate():
+    """Test a bucket admits its burst, then one request per 1/rate seconds."""
+    backend = LocalBackend()
+    assert [await backend.take("read:a", 10, 2) for _ in range(2)] == [0.0, 0.0]
+    wait = await backend.take("read:a", 10, 2)
+    assert 0 < wait <= 0.1
+    assert await backend.take("read:b", 10, 2) == 0.0
+
+    await asyncio.sleep(wait + 0.01)
+    assert await backend.take("read:a", 10, 2) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_requests_in_flight_per_budget():
+    """Test in-flight slots are per user and budget, and freed on release."""
+    limiter = RateLimiter(
+        {READ: Budget(1000, 1000, 1), WRITE: Budget(1000, 1000, 1)}, LocalBackend()
+    )
+    assert await limiter.admit("a", READ) is None
+    assert await limiter.admit("a", READ) == 1.0
+    assert await limiter.admit("a", WRITE) is None
+    assert await limiter.admit("b", READ) is None
+
+    limiter.release("a", READ)
+    assert await limiter.admit("a", READ) is None
+
+    # Rejected by rate, the slot is not kept
+    limiter = RateLimiter({READ: Budget(1, 1, 5)}, LocalBackend())
+    assert await limiter.admit("a", READ) is None
+    assert await limiter.admit("a", READ) > 0
+    assert limiter._in_flight == {("a", READ): 1}
+
+
+@pytest.mark.asyncio
+async def test_api_returns_429_with_retry_after(db_session, monkeypatch):
+    """Test requests over a user's read budget are refused and others are not."""
+    monkeypatch.setitem(rate_limit.limiter.budgets, READ, Budget(0.5, 2, 16))
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            mine = [
+                await client.get("/api/v1/lists", headers={"X-User-Id": "runaway"})
+                for _ in range(3)
+            ]
+            other = await client.get("/api/v1/lists", headers={"X-User-Id": "other"})
+            write = await client.post(
+                "/api/v1/lists", json={"name": "Groceries"}, headers={"X-User-Id": "runaway"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [response.status_code for response in mine] == [200, 200, 429]
+    assert mine[2].headers["Retry-After"] == "2"
+    assert other.status_code == 200
+    assert write.status_code == 201
+    assert rate_limit.limiter._in_flight == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_postgres_backend_shares_buckets_between_workers():
+    """Test workers leasing from one bucket admit no more than its burst together."""
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    key = f"write:{os.urandom(8).hex()}"
+    try:
+        workers = [PostgresBackend(session_maker, lease=2) for _ in range(2)]
+        waits = [await workers[n % 2].take(key, 0.01, 5) for n in range(8)]
+        assert waits[:5] == [0.0] * 5
+        assert all(wait > 0 for wait in waits[5:])
+    finally:
+        await engine.dispose()
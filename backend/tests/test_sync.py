@@ -0,0 +1,115 @@
+"""Tests for delta sync of list items."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.todo_list import TodoList
+from app.services.archive import archive_completed
+from app.services.item_service import (
+    create_item,
+    delete_item,
+    permanently_delete_item,
+    toggle_item_completion,
+    update_item,
+)
+from app.services.sync_service import (
+    InvalidSyncToken,
+    SyncCursor,
+    decode_sync_token,
+    encode_sync_token,
+    get_item_changes,
+)
+
+
+@pytest.mark.asyncio
+async def test_changes_since_token(db_session, monkeypatch):
+    """Test only changed items and both kinds of deletion are returned."""
+    monkeypatch.setattr("app.core.config.settings.sync_overlap_seconds", 0)
+    now = datetime.now(timezone.utc)
+    todo_list = TodoList(name="Groceries", owner_id="user-1", created_at=now, updated_at=now)
+    db_session.add(todo_list)
+    await db_session.commit()
+    milk, eggs, bread, jam = [
+        await create_item(db_session, todo_list.id, text, "user-1")
+        for text in ("Milk", "Eggs", "Bread", "Jam")
+    ]
+
+    full = await get_item_changes(db_session, todo_list.id)
+    assert [item.id for item in full.items] == [milk.id, eggs.id, bread.id, jam.id]
+    assert full.deleted == []
+
+    # Soft-deleted long enough ago for the purge to remove it
+    bread.deleted_at = datetime.now(timezone.utc) - timedelta(seconds=10)
+    await db_session.commit()
+    since = decode_sync_token(full.token)
+    await update_item(db_session, milk.id, "Oat milk", "user-1")
+    await delete_item(db_session, eggs.id, "user-1")
+    assert await permanently_delete_item(db_session, bread.id)
+
+    changes = await get_item_changes(db_session, todo_list.id, since)
+    assert [item.text for item in changes.items] == ["Oat milk"]
+    assert {item_id for item_id, _ in changes.deleted} == {eggs.id, bread.id}
+
+    quiet = await get_item_changes(db_session, todo_list.id, decode_sync_token(changes.token))
+    assert quiet.items == [] and quiet.deleted == []
+
+
+@pytest.mark.asyncio
+async def test_changes_since_token_report_archived_items(
+    db_session, sqlite_engine, monkeypatch, make_list
+):
+    """Test items archived after the token are deleted, unless edited back since."""
+    monkeypatch.setattr("app.core.config.settings.sync_overlap_seconds", 0)
+    todo_list = await make_list(db_session)
+    milk, eggs, bread = [
+        await create_item(db_session, todo_list.id, text, "user-1")
+        for text in ("Milk", "Eggs", "Bread")
+    ]
+    for item in (milk, eggs):
+        await toggle_item_completion(db_session, item.id, "user-1")
+
+    since = decode_sync_token((await get_item_changes(db_session, todo_list.id)).token)
+    # In its own session, as from cron; every completed item is old enough
+    async with async_sessionmaker(sqlite_engine, class_=AsyncSession)() as cron:
+        assert await archive_completed(cron, timedelta(seconds=-1), batch_size=10) == 2
+    # Later requests start with sessions of their own
+    db_session.expunge_all()
+    await update_item(db_session, eggs.id, "Free-range eggs", "user-1")
+
+    changes = await get_item_changes(db_session, todo_list.id, since)
+    assert [item.text for item in changes.items] == ["Free-range eggs"]
+    assert [item_id for item_id, _ in changes.deleted] == [milk.id]
+
+    quiet = await get_item_changes(db_session, todo_list.id, decode_sync_token(changes.token))
+    assert quiet.items == [] and quiet.deleted == []
+
+
+def test_sync_token_round_trip():
+    """Test tokens decode to the cursor they encode and reject garbage."""
+    cursor = datetime(2026, 10, 19, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+    assert decode_sync_token(encode_sync_token(cursor)) == (cursor, None)
+    assert decode_sync_token(encode_sync_token(cursor, 42)) == (cursor, 42)
+    for token in ("", "not-a-token", encode_sync_token(cursor)[:-4]):
+        with pytest.raises(InvalidSyncToken):
+            decode_sync_token(token)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_version_skips_the_scan(db_session):
+    """Test a token taken at the list's current version returns nothing."""
+    now = datetime.now(timezone.utc)
+    todo_list = TodoList(name="Groceries", owner_id="user-1", created_at=now, updated_at=now)
+    db_session.add(todo_list)
+    await db_session.commit()
+    await create_item(db_session, todo_list.id, "Milk", "user-1")
+    await db_session.refresh(todo_list)
+
+    stale = SyncCursor(now - timedelta(hours=1), todo_list.version - 1)
+    current = SyncCursor(now - timedelta(hours=1), todo_list.version)
+
+    assert len((await get_item_changes(db_session, todo_list.id, stale, todo_list.version)).items) == 1
+    unchanged = await get_item_changes(db_session, todo_list.id, current, todo_list.version)
+    assert unchanged.items == []
+    assert decode_sync_token(unchanged.token) == current